@@ -0,0 +1,9 @@
+"""Нагрузочные замеры страниц Yatube на локальной SQLite.
+
+Запуск из папки с manage.py:
+
+    python -m benchmarks run --posts 20000 --output bench.json
+    python -m benchmarks compare old.json bench.json
+    python -m benchmarks concurrency --readers 8 --writers 2
+    python -m benchmarks servers --concurrency 16
+"""
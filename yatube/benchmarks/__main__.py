@@ -0,0 +1,200 @@
+import argparse
+import os
+import sys
+import tempfile
+
+
+def setup(settings_module, workdir, engine=None):
+    """Django на временной базе, кеше и медиа, чтобы не трогать рабочие.
+
+    engine подменяет бэкенд базы, например стандартным
+    django.db.backends.sqlite3 для сравнения с core.sqlite.
+    """
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+    import django
+    from django.conf import settings
+
+    database = settings.DATABASES['default']
+    database['NAME'] = os.path.join(workdir, 'bench.sqlite3')
+    if engine is not None and engine != database['ENGINE']:
+        database.update(ENGINE=engine, CONN_MAX_AGE=0, OPTIONS={})
+    settings.CACHES['default']['LOCATION'] = os.path.join(workdir, 'cache')
+    settings.CACHES['sessions']['LOCATION'] = os.path.join(
+        workdir, 'cache', 'sessions')
+    settings.MEDIA_ROOT = os.path.join(workdir, 'media')
+    settings.ALLOWED_HOSTS = ['testserver']
+    django.setup()
+
+
+def run(args):
+    with tempfile.TemporaryDirectory() as workdir:
+        setup(args.settings, workdir)
+        from django.core.management import call_command
+
+        from benchmarks import data, report, runner
+
+        dataset = {
+            'users': args.users,
+            'groups': args.groups,
+            'posts': args.posts,
+            'comments': args.comments,
+            'follows_per_user': args.follows,
+            'alpha': args.alpha,
+            'seed': args.seed,
+        }
+        call_command('migrate', verbosity=0)
+        data.generate(stdout=sys.stderr, **dataset)
+        results = runner.run(args.iterations, args.warm_cache, dataset)
+    for name, result in results['results'].items():
+        print(
+            f"{name}: p50 {result['p50_ms']:.1f} мс, "
+            f"p90 {result['p90_ms']:.1f} мс, "
+            f"p99 {result['p99_ms']:.1f} мс, "
+            f"запросов {result['queries']}, "
+            f"память {result['peak_memory_kb']:.0f} КБ"
+        )
+    if args.output:
+        report.dump(results, args.output)
+
+
+def concurrency(args):
+    with tempfile.TemporaryDirectory() as workdir:
+        setup(args.settings, workdir, args.engine)
+        from django.core.management import call_command
+
+        from benchmarks import concurrency, data, report
+
+        call_command('migrate', verbosity=0)
+        data.generate(
+            users=args.users, posts=args.posts, comments=args.posts,
+            stdout=sys.stderr,
+        )
+        result = concurrency.run(args.readers, args.writers, args.seconds)
+    print(
+        f"{result['engine']} ({result['journal_mode']}): "
+        f"чтений {result['reads_per_sec']:.1f}/с, "
+        f"записей {result['writes_per_sec']:.1f}/с, "
+        f"ошибок чтения {result['read_errors']}, "
+        f"ошибок записи {result['write_errors']}"
+    )
+    if args.output:
+        report.dump(result, args.output)
+
+
+def servers(args):
+    with tempfile.TemporaryDirectory() as workdir:
+        setup(args.settings, workdir)
+        from django.core.management import call_command
+
+        from benchmarks import data, report, servers
+
+        call_command('migrate', verbosity=0)
+        data.generate(
+            users=args.users, posts=args.posts, comments=args.posts,
+            stdout=sys.stderr,
+        )
+        result = servers.run(
+            args.url, args.concurrency, args.threads, args.seconds
+        )
+    print(
+        f"{result['url']}: WSGI по одному {result['wsgi_rps']:.1f} запр/с, "
+        f"ASGI ({result['concurrency']} клиентов, {result['threads']} "
+        f"потоков) {result['asgi_rps']:.1f} запр/с"
+    )
+    if args.output:
+        report.dump(result, args.output)
+
+
+def compare(args):
+    from benchmarks import report
+
+    lines, regressed = report.compare(
+        report.load(args.old), report.load(args.new), args.threshold / 100
+    )
+    print('\n'.join(lines))
+    return 1 if regressed else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks',
+        description='Замеры страниц постов на синтетических данных.',
+    )
+    commands = parser.add_subparsers(dest='command')
+    commands.required = True
+
+    run_parser = commands.add_parser('run', help='Провести замер.')
+    run_parser.add_argument(
+        '--settings',
+        default=os.environ.get('DJANGO_SETTINGS_MODULE', 'yatube.settings'),
+    )
+    run_parser.add_argument('--users', type=int, default=200)
+    run_parser.add_argument('--groups', type=int, default=10)
+    run_parser.add_argument('--posts', type=int, default=5000)
+    run_parser.add_argument('--comments', type=int, default=10000)
+    run_parser.add_argument('--follows', type=int, default=20,
+                            help='Подписок на пользователя.')
+    run_parser.add_argument('--alpha', type=float, default=1.2,
+                            help='Показатель степенного распределения.')
+    run_parser.add_argument('--seed', type=int, default=0)
+    run_parser.add_argument('--iterations', type=int, default=50)
+    run_parser.add_argument(
+        '--warm-cache', action='store_true',
+        help='Не очищать кеш между запросами.',
+    )
+    run_parser.add_argument('--output', help='Файл для JSON-отчёта.')
+    run_parser.set_defaults(handler=run)
+
+    concurrency_parser = commands.add_parser(
+        'concurrency',
+        help='Пропускная способность при параллельных чтении и записи.',
+    )
+    concurrency_parser.add_argument(
+        '--settings',
+        default=os.environ.get('DJANGO_SETTINGS_MODULE', 'yatube.settings'),
+    )
+    concurrency_parser.add_argument(
+        '--engine', help='Другой бэкенд базы для сравнения.')
+    concurrency_parser.add_argument('--readers', type=int, default=8)
+    concurrency_parser.add_argument('--writers', type=int, default=2)
+    concurrency_parser.add_argument('--seconds', type=float, default=10)
+    concurrency_parser.add_argument('--users', type=int, default=50)
+    concurrency_parser.add_argument('--posts', type=int, default=1000)
+    concurrency_parser.add_argument(
+        '--output', help='Файл для JSON-отчёта.')
+    concurrency_parser.set_defaults(handler=concurrency)
+
+    servers_parser = commands.add_parser(
+        'servers', help='Сравнить WSGI и ASGI-вход под нагрузкой.'
+    )
+    servers_parser.add_argument(
+        '--settings',
+        default=os.environ.get('DJANGO_SETTINGS_MODULE', 'yatube.settings'),
+    )
+    servers_parser.add_argument('--url', default='/')
+    servers_parser.add_argument('--concurrency', type=int, default=16)
+    servers_parser.add_argument('--threads', type=int, default=8)
+    servers_parser.add_argument('--seconds', type=float, default=10)
+    servers_parser.add_argument('--users', type=int, default=50)
+    servers_parser.add_argument('--posts', type=int, default=1000)
+    servers_parser.add_argument(
+        '--output', help='Файл для JSON-отчёта.')
+    servers_parser.set_defaults(handler=servers)
+
+    compare_parser = commands.add_parser(
+        'compare', help='Сравнить два отчёта.'
+    )
+    compare_parser.add_argument('old')
+    compare_parser.add_argument('new')
+    compare_parser.add_argument(
+        '--threshold', type=float, default=10,
+        help='Допустимое замедление p50, в процентах.',
+    )
+    compare_parser.set_defaults(handler=compare)
+
+    args = parser.parse_args()
+    return args.handler(args) or 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,104 @@
+"""Пропускная способность при одновременных читателях и писателях.
+
+Каждый поток - отдельный клиент со своим соединением с базой. Читатели
+открывают главную и страницы постов, писатели комментируют посты через
+add_comment. Ошибкой считается ответ 5xx или исключение базы, например
+"database is locked".
+"""
+import random
+import threading
+import time
+
+from django.db import OperationalError, close_old_connections, connection
+from django.test import Client
+from django.urls import reverse
+
+from posts.models import Post, User
+
+
+def _reader(client, post_ids, rng):
+    if rng.random() < 0.5:
+        return client.get(reverse('posts:index'))
+    return client.get(
+        reverse('posts:post_detail', args=[rng.choice(post_ids)])
+    )
+
+
+def _writer(client, post_ids, rng):
+    return client.post(
+        reverse('posts:add_comment', args=[rng.choice(post_ids)]),
+        {'text': 'Комментарий из замера'},
+    )
+
+
+def _worker(action, user, post_ids, deadline, seed, totals, lock):
+    close_old_connections()
+    rng = random.Random(seed)
+    client = Client()
+    if user is not None:
+        client.force_login(user)
+    done = errors = 0
+    try:
+        while time.perf_counter() < deadline:
+            try:
+                response = action(client, post_ids, rng)
+            except OperationalError:
+                errors += 1
+                continue
+            if response.status_code >= 500:
+                errors += 1
+            else:
+                done += 1
+    finally:
+        connection.close()
+        with lock:
+            totals['done'] += done
+            totals['errors'] += errors
+
+
+def _run_group(specs, seconds):
+    """specs - список (action, user); возвращает итоги по группам."""
+    post_ids = list(Post.objects.values_list('id', flat=True)[:500])
+    lock = threading.Lock()
+    totals = {action: {'done': 0, 'errors': 0} for action, _ in specs}
+    deadline = time.perf_counter() + seconds
+    threads = [
+        threading.Thread(target=_worker, args=(
+            action, user, post_ids, deadline, seed, totals[action], lock
+        ))
+        for seed, (action, user) in enumerate(specs)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return totals
+
+
+def run(readers=8, writers=2, seconds=10):
+    users = list(User.objects.order_by('pk')[:max(writers, 1)])
+    specs = (
+        [(_reader, None)] * readers
+        + [(_writer, users[index % len(users)]) for index in range(writers)]
+    )
+    # Соединение главного потока не должно держать транзакцию открытой.
+    connection.close()
+    totals = _run_group(specs, seconds)
+    reads, writes = totals.get(_reader), totals.get(_writer)
+    return {
+        'engine': connection.settings_dict['ENGINE'],
+        'journal_mode': _journal_mode(),
+        'readers': readers,
+        'writers': writers,
+        'seconds': seconds,
+        'reads_per_sec': reads['done'] / seconds if reads else 0,
+        'writes_per_sec': writes['done'] / seconds if writes else 0,
+        'read_errors': reads['errors'] if reads else 0,
+        'write_errors': writes['errors'] if writes else 0,
+    }
+
+
+def _journal_mode():
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA journal_mode')
+        return cursor.fetchone()[0]
@@ -0,0 +1,110 @@
+"""Генератор тестовых данных для замеров.
+
+Подписки распределены по степенному закону: несколько авторов собирают
+большую часть подписчиков, как в настоящей социальной сети. Данные
+пишутся через bulk_create, после чего производные структуры (счётчики,
+ленты, поисковый индекс) пересобираются штатными командами.
+"""
+import random
+from datetime import timedelta
+from itertools import accumulate, islice
+
+from django.core.management import call_command
+from django.db import transaction
+from django.utils import timezone
+
+from posts.models import Comment, Follow, Group, Post, User
+from posts.transfer import bulk_create_dated
+
+BATCH_SIZE = 1000
+WORDS = (
+    'кот собака погода город море лес книга музыка кино работа дом '
+    'утро вечер друг путешествие поезд код проект идея новость'
+).split()
+
+
+def _bulk(model, objects):
+    objects = iter(objects)
+    while True:
+        batch = list(islice(objects, BATCH_SIZE))
+        if not batch:
+            return
+        model.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def _text(rng, words):
+    return ' '.join(rng.choice(WORDS) for _ in range(words)).capitalize()
+
+
+def power_law_weights(count, alpha):
+    """Вес i-го по популярности объекта пропорционален 1 / i^alpha."""
+    return [1 / (rank ** alpha) for rank in range(1, count + 1)]
+
+
+@transaction.atomic
+def generate(users=200, groups=10, posts=5000, comments=10000,
+             follows_per_user=20, alpha=1.2, seed=0, stdout=None):
+    rng = random.Random(seed)
+    now = timezone.now()
+    _bulk(User, (
+        User(username=f'bench_user_{index}', first_name='Пользователь',
+             last_name=str(index))
+        for index in range(users)
+    ))
+    _bulk(Group, (
+        Group(title=f'Группа {index}', slug=f'bench-group-{index}',
+              description=_text(rng, 10))
+        for index in range(groups)
+    ))
+    user_ids = list(
+        User.objects.filter(
+            username__startswith='bench_user_'
+        ).order_by('pk').values_list('pk', flat=True)
+    )
+    group_ids = list(
+        Group.objects.filter(
+            slug__startswith='bench-group-'
+        ).values_list('pk', flat=True)
+    )
+    group_choices = group_ids + [None]
+    # Накопленные веса считаются один раз: с weights= choices()
+    # пересчитывал бы их на каждый вызов, за O(числа объектов).
+    user_weights = list(accumulate(power_law_weights(len(user_ids), alpha)))
+
+    _bulk(Follow, (
+        Follow(user_id=user_id, author_id=author_id)
+        for user_id in user_ids
+        for author_id in set(rng.choices(
+            user_ids, cum_weights=user_weights, k=follows_per_user
+        )) - {user_id}
+    ))
+    # Популярные авторы и пишут чаще. bulk_create_dated сохраняет даты
+    # публикации, которые bulk_create заменил бы на now().
+    new_posts = (
+        Post(
+            text=_text(rng, rng.randint(5, 60)),
+            author_id=rng.choices(user_ids, cum_weights=user_weights)[0],
+            group_id=rng.choice(group_choices),
+            pub_date=now - timedelta(minutes=posts - index),
+        )
+        for index in range(posts)
+    )
+    while True:
+        batch = list(islice(new_posts, BATCH_SIZE))
+        if not batch:
+            break
+        bulk_create_dated(Post, batch)
+    post_ids = list(Post.objects.values_list('pk', flat=True))
+    post_weights = list(accumulate(power_law_weights(len(post_ids), alpha)))
+    rng.shuffle(post_ids)
+    _bulk(Comment, (
+        Comment(
+            post_id=rng.choices(post_ids, cum_weights=post_weights)[0],
+            author_id=rng.choice(user_ids),
+            text=_text(rng, rng.randint(3, 20)),
+        )
+        for _ in range(comments)
+    ))
+    for command in ('reconcile_counters', 'rebuild_timelines',
+                    'rebuild_search_index'):
+        call_command(command, stdout=stdout)
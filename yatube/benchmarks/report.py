@@ -0,0 +1,35 @@
+"""Сохранение и сравнение отчётов; Django здесь не нужен."""
+import json
+
+
+def compare(old, new, threshold):
+    """Строки отчёта и признак регрессии сверх threshold (доля)."""
+    lines = []
+    regressed = False
+    for name, current in new['results'].items():
+        previous = old['results'].get(name)
+        if previous is None:
+            lines.append(f'{name}: нет в базовом замере')
+            continue
+        change = current['p50_ms'] / previous['p50_ms'] - 1
+        slower = change > threshold
+        more_queries = current['queries'] > previous['queries']
+        regressed = regressed or slower or more_queries
+        lines.append(
+            f"{name}: p50 {previous['p50_ms']:.1f} -> "
+            f"{current['p50_ms']:.1f} мс ({change:+.0%}), "
+            f"p90 {previous['p90_ms']:.1f} -> {current['p90_ms']:.1f} мс, "
+            f"запросов {previous['queries']} -> {current['queries']}"
+            + (' РЕГРЕССИЯ' if slower or more_queries else '')
+        )
+    return lines, regressed
+
+
+def load(path):
+    with open(path, encoding='utf-8') as source:
+        return json.load(source)
+
+
+def dump(report, path):
+    with open(path, 'w', encoding='utf-8') as output:
+        json.dump(report, output, ensure_ascii=False, indent=2)
@@ -0,0 +1,171 @@
+"""Замер задержки, числа запросов и памяти для страниц постов."""
+import platform
+import sqlite3
+import subprocess
+import time
+import tracemalloc
+
+import django
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Count
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from core.compression import ENCODERS
+from posts.models import AuthorStats, Group, Post
+from posts.paginator import CursorPaginator
+from posts.settings import ITEMS_PER_PAGE
+
+DEEP_PAGE = 50
+
+
+def percentile(samples, fraction):
+    """Перцентиль методом ближайшего ранга."""
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1,
+                       round(fraction * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+def scenarios():
+    """Набор (имя, адрес, пользователь) по самым тяжёлым объектам базы."""
+    star = AuthorStats.objects.select_related(
+        'user'
+    ).order_by('-followers_count').first().user
+    reader = AuthorStats.objects.select_related(
+        'user'
+    ).order_by('-following_count').first().user
+    group = Group.objects.annotate(
+        total=Count('posts')
+    ).order_by('-total').first()
+    post = Post.objects.order_by('-comments_count').first()
+    posts = Post.objects.order_by('-pub_date', '-id')
+    deep_item = posts[
+        min(DEEP_PAGE * ITEMS_PER_PAGE, posts.count()) - 1
+    ]
+    deep_cursor = CursorPaginator(Post.objects.all()).encode_cursor(
+        deep_item
+    )
+    index_url = reverse('posts:index')
+    return [
+        ('index', index_url, None),
+        ('index_deep_cursor', f'{index_url}?cursor={deep_cursor}', None),
+        ('index_legacy_page', f'{index_url}?page={DEEP_PAGE}', None),
+        ('index_authenticated', index_url, reader),
+        ('group_list', reverse('posts:group_list', args=[group.slug]),
+         None),
+        ('profile', reverse('posts:profile', args=[star.username]), None),
+        ('follow_index', reverse('posts:follow_index'), reader),
+        ('post_detail', reverse('posts:post_detail', args=[post.id]),
+         None),
+        ('search', f"{reverse('posts:search')}?q=кот", None),
+    ]
+
+
+def measure(client, url, iterations, warm_cache):
+    timings = []
+    queries = 0
+    response = None
+    for _ in range(iterations):
+        if not warm_cache:
+            cache.clear()
+        with CaptureQueriesContext(connection) as captured:
+            start = time.perf_counter()
+            response = client.get(url)
+            timings.append((time.perf_counter() - start) * 1000)
+        queries = len(captured)
+    # Память меряется отдельным прогоном: tracemalloc сильно искажает время.
+    if not warm_cache:
+        cache.clear()
+    tracemalloc.start()
+    client.get(url)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        'url': url,
+        'status': response.status_code,
+        'iterations': iterations,
+        'mean_ms': sum(timings) / len(timings),
+        'min_ms': min(timings),
+        'p50_ms': percentile(timings, 0.5),
+        'p90_ms': percentile(timings, 0.9),
+        'p99_ms': percentile(timings, 0.99),
+        'max_ms': max(timings),
+        'queries': queries,
+        'peak_memory_kb': peak / 1024,
+        'response_bytes': len(response.content),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            stderr=subprocess.DEVNULL,
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def encoding_scenarios(iterations, warm_cache):
+    """Главная страница без минификации и в каждой кодировке сжатия:
+    цена CompressionMiddleware по времени и выигрыш в байтах."""
+    url = reverse('posts:index')
+    results = {}
+    with override_settings(HTML_MINIFY=False):
+        results['index_unminified'] = measure(
+            Client(), url, iterations, warm_cache
+        )
+    for encoding in ENCODERS:
+        results[f'index_{encoding}'] = measure(
+            Client(HTTP_ACCEPT_ENCODING=encoding), url, iterations,
+            warm_cache,
+        )
+    return results
+
+
+def auth_scenarios(user_scenarios, iterations, warm_cache):
+    """Страницы пользователя со стандартными сессиями в базе и
+    ModelBackend: на сколько запросов больше без кеша сессий и
+    пользователей."""
+    results = {}
+    with override_settings(
+        SESSION_ENGINE='django.contrib.sessions.backends.db',
+        AUTHENTICATION_BACKENDS=['django.contrib.auth.backends.ModelBackend'],
+    ):
+        for name, url, user in user_scenarios:
+            client = Client()
+            client.force_login(user)
+            results[f'{name}_uncached_auth'] = measure(
+                client, url, iterations, warm_cache
+            )
+    return results
+
+
+def run(iterations=50, warm_cache=False, dataset=None):
+    results = {}
+    user_scenarios = []
+    for name, url, user in scenarios():
+        client = Client()
+        if user is not None:
+            client.force_login(user)
+            user_scenarios.append((name, url, user))
+        results[name] = measure(client, url, iterations, warm_cache)
+    results.update(encoding_scenarios(iterations, warm_cache))
+    results.update(auth_scenarios(user_scenarios, iterations, warm_cache))
+    return {
+        'meta': {
+            'commit': git_commit(),
+            'created': timezone.now().isoformat(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'warm_cache': warm_cache,
+            'dataset': dataset or {},
+            'posts': Post.objects.count(),
+        },
+        'results': results,
+    }
@@ -0,0 +1,75 @@
+"""Запросов в секунду через WSGI и через ASGI-вход.
+
+WSGI-путь - обработчик Django, которому запросы подаются по одному, как
+синхронному воркеру. ASGI-путь - core.asgi.ASGIHandler, на который
+concurrency клиентов одновременно шлют запросы из цикла событий. Оба
+вызываются в процессе, без сети, так что видна разница самих моделей
+обработки.
+"""
+import asyncio
+import time
+from wsgiref.util import setup_testing_defaults
+
+from django.core.wsgi import get_wsgi_application
+
+from core.asgi import ASGIHandler
+
+
+def _wsgi(application, url, seconds):
+    done = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        environ = {'PATH_INFO': url, 'HTTP_HOST': 'testserver'}
+        setup_testing_defaults(environ)
+        response = application(environ, lambda status, headers: None)
+        b''.join(response)
+        response.close()
+        done += 1
+    return done / seconds
+
+
+async def _client(application, url, deadline):
+    scope = {
+        'type': 'http',
+        'method': 'GET',
+        'path': url,
+        'query_string': b'',
+        'headers': [(b'host', b'testserver')],
+    }
+    done = 0
+
+    async def receive():
+        return {'type': 'http.request', 'body': b''}
+
+    async def send(message):
+        pass
+
+    while time.perf_counter() < deadline:
+        await application(scope, receive, send)
+        done += 1
+    return done
+
+
+async def _asgi(application, url, seconds, concurrency):
+    deadline = time.perf_counter() + seconds
+    done = await asyncio.gather(*(
+        _client(application, url, deadline) for _ in range(concurrency)
+    ))
+    return sum(done) / seconds
+
+
+def run(url, concurrency=16, threads=8, seconds=10):
+    wsgi = get_wsgi_application()
+    asgi = ASGIHandler(wsgi, max_workers=threads)
+    try:
+        asgi_rps = asyncio.run(_asgi(asgi, url, seconds, concurrency))
+    finally:
+        asgi.executor.shutdown()
+    return {
+        'url': url,
+        'concurrency': concurrency,
+        'threads': threads,
+        'seconds': seconds,
+        'wsgi_rps': _wsgi(wsgi, url, seconds),
+        'asgi_rps': asgi_rps,
+    }
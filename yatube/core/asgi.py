@@ -0,0 +1,142 @@
+"""ASGI-вход для Django 2.2.
+
+В Django 2.2 нет ни ASGIHandler, ни асинхронных view, поэтому ASGI-сервер
+(uvicorn, hypercorn, daphne) получает адаптер: соединения и чтение тела
+обслуживает цикл событий, а сам WSGI-обработчик Django выполняется в
+ограниченном пуле из ASGI_THREADS потоков. Один процесс так ведёт
+несколько запросов сразу, пока другие ждут SQLite или файлы, а размер
+пула не даёт нагрузке открыть больше соединений с базой, чем она
+выдержит. Соединения с базой у каждого потока свои и живут
+CONN_MAX_AGE, как у обычного WSGI-воркера.
+
+get_asgi_application появился только в Django 3.0, а asgiref не входит в
+зависимости, так что на 2.2 адаптер нужен для любого ASGI-сервера.
+Быстрее на страницах, упирающихся в процессор, он не работает - это
+показывает и python -m benchmarks servers. Выигрыш в другом: медленный
+клиент досылает тело запроса в цикл событий, не занимая поток Django и
+соединение с базой. После перехода на Django 3.x модуль заменяется на
+django.core.asgi.get_asgi_application.
+"""
+import asyncio
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.wsgi import get_wsgi_application
+
+
+class ASGIHandler:
+
+    def __init__(self, wsgi_application=None, max_workers=None):
+        self.wsgi_application = wsgi_application or get_wsgi_application()
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers or settings.ASGI_THREADS,
+            thread_name_prefix='asgi',
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self.lifespan(receive, send)
+        if scope['type'] != 'http':
+            raise ValueError(f"Тип соединения {scope['type']} не поддержан")
+        body = await self.read_body(receive)
+        if body is None:
+            return
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(
+                self.executor, self.run_wsgi, scope, body, send, loop
+            )
+        finally:
+            body.close()
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.executor.shutdown(wait=True)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def read_body(self, receive):
+        """Тело запроса; большое уходит во временный файл, как у Django.
+        None - клиент отключился, не дослав тело."""
+        body = tempfile.SpooledTemporaryFile(
+            max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE
+        )
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                body.close()
+                return None
+            body.write(message.get('body', b''))
+            if not message.get('more_body'):
+                body.seek(0)
+                return body
+
+    def environ(self, scope, body):
+        server = scope.get('server') or ('localhost', 80)
+        environ = {
+            'REQUEST_METHOD': scope['method'],
+            'SCRIPT_NAME': scope.get('root_path', ''),
+            # WSGI хранит путь как байты в latin-1.
+            'PATH_INFO': scope['path'].encode().decode('latin-1'),
+            'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+            'SERVER_NAME': server[0],
+            'SERVER_PORT': str(server[1]),
+            'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': scope.get('scheme', 'http'),
+            'wsgi.input': body,
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': True,
+            'wsgi.run_once': False,
+        }
+        if scope.get('client'):
+            environ['REMOTE_ADDR'] = scope['client'][0]
+        for name, value in scope.get('headers', []):
+            name = name.decode('latin-1').upper().replace('-', '_')
+            if name not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+                name = f'HTTP_{name}'
+            value = value.decode('latin-1')
+            if name in environ:
+                # HTTP/2 присылает каждую cookie отдельным заголовком,
+                # и склеиваются они через "; ", а не через запятую.
+                separator = '; ' if name == 'HTTP_COOKIE' else ','
+                value = f'{environ[name]}{separator}{value}'
+            environ[name] = value
+        return environ
+
+    def run_wsgi(self, scope, body, send, loop):
+        """Выполняется в потоке пула; сообщения отправляет через цикл."""
+        def call(message):
+            asyncio.run_coroutine_threadsafe(send(message), loop).result()
+
+        start = {}
+
+        def start_response(status, headers, exc_info=None):
+            start.update(
+                type='http.response.start',
+                status=int(status.split(' ', 1)[0]),
+                headers=[
+                    (name.lower().encode('latin-1'), value.encode('latin-1'))
+                    for name, value in headers
+                ],
+            )
+
+        result = self.wsgi_application(self.environ(scope, body),
+                                       start_response)
+        try:
+            call(start)
+            for chunk in result:
+                if chunk:
+                    call({'type': 'http.response.body', 'body': chunk,
+                          'more_body': True})
+            call({'type': 'http.response.body', 'body': b''})
+        finally:
+            if hasattr(result, 'close'):
+                result.close()
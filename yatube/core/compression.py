@@ -0,0 +1,123 @@
+"""Минификация HTML и сжатие ответов на лету.
+
+Минификация убирает HTML-комментарии и схлопывает пробельные символы,
+не трогая содержимое <pre>, <textarea>, <script> и <style>: там пробелы
+значимы. Сжатие выбирает br или gzip по Accept-Encoding; brotli - пакет
+необязательный, без него остаётся gzip.
+"""
+import re
+import zlib
+
+from django.conf import settings
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+PROTECTED = re.compile(
+    r'(<(pre|textarea|script|style)\b.*?</\2\s*>)', re.IGNORECASE | re.DOTALL
+)
+# Условные комментарии IE - это разметка, а не комментарии.
+COMMENT = re.compile(r'<!--(?!\[if).*?-->', re.DOTALL)
+LINE_BREAKS = re.compile(r'\s*\n\s*')
+SPACES = re.compile(r'[ \t]{2,}')
+
+COMPRESSIBLE_TYPES = (
+    'text/',
+    'application/json',
+    'application/javascript',
+    'application/xml',
+    'image/svg+xml',
+)
+
+
+def minify_html(html):
+    parts = PROTECTED.split(html)
+    # split() с двумя группами даёт: текст, блок целиком, имя тега, текст...
+    minified = []
+    for index in range(0, len(parts), 3):
+        text = COMMENT.sub('', parts[index])
+        text = SPACES.sub(' ', LINE_BREAKS.sub('\n', text))
+        minified.append(text)
+        if index + 1 < len(parts):
+            minified.append(parts[index + 1])
+    return ''.join(minified).strip()
+
+
+class GzipEncoder:
+    def __init__(self):
+        self.compressor = zlib.compressobj(
+            settings.COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS
+        )
+
+    def compress(self, data):
+        return self.compressor.compress(data)
+
+    def finish(self):
+        return self.compressor.flush()
+
+
+class BrotliEncoder:
+    def __init__(self):
+        self.compressor = brotli.Compressor(
+            quality=settings.COMPRESSION_BROTLI_QUALITY
+        )
+
+    def compress(self, data):
+        return self.compressor.process(data)
+
+    def finish(self):
+        return self.compressor.finish()
+
+
+# В порядке предпочтения: br заметно плотнее gzip на HTML.
+ENCODERS = {'gzip': GzipEncoder}
+if brotli is not None:
+    ENCODERS = {'br': BrotliEncoder, **ENCODERS}
+
+
+def accepted_encodings(header):
+    """Кодировки из Accept-Encoding, кроме явно запрещённых q=0."""
+    accepted = set()
+    for item in header.split(','):
+        encoding, _, params = item.partition(';')
+        name, _, value = params.partition('=')
+        if name.strip() == 'q':
+            try:
+                if float(value) == 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(encoding.strip().lower())
+    return accepted
+
+
+def choose_encoding(header):
+    accepted = accepted_encodings(header)
+    for encoding in ENCODERS:
+        if encoding in accepted:
+            return encoding
+    return None
+
+
+def compress(data, encoding):
+    encoder = ENCODERS[encoding]()
+    return encoder.compress(data) + encoder.finish()
+
+
+def compress_stream(chunks, encoding):
+    """Сжимать поток по мере поступления кусков. Кодер сам копит вход,
+    пока не наберёт блок, поэтому мелкие куски не портят степень сжатия."""
+    encoder = ENCODERS[encoding]()
+    for chunk in chunks:
+        data = encoder.compress(chunk)
+        if data:
+            yield data
+    yield encoder.finish()
+
+
+def is_compressible(content_type):
+    return content_type.split(';')[0].strip().lower().startswith(
+        COMPRESSIBLE_TYPES
+    )
@@ -0,0 +1,49 @@
+import os
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+
+from core.storage import ShardedFileSystemStorage, unshard
+
+
+class Command(BaseCommand):
+    help = ('Переносит медиафайлы, сохранённые до включения '
+            'ShardedFileSystemStorage, в подпапки по хешу имени')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только посчитать файлы, ничего не перемещая',
+        )
+
+    def handle(self, *args, **options):
+        if not isinstance(default_storage, ShardedFileSystemStorage):
+            raise CommandError(
+                'DEFAULT_FILE_STORAGE должно быть ShardedFileSystemStorage')
+        root = default_storage.location
+        moved = skipped = 0
+        for folder, _, files in os.walk(root):
+            for filename in files:
+                source = os.path.join(folder, filename)
+                relative = os.path.relpath(source, root).replace(os.sep, '/')
+                if unshard(relative) is not None:
+                    continue
+                target = default_storage.path(relative)
+                if os.path.exists(target):
+                    # Файл с этим именем уже разложен, старую копию не
+                    # трогаем - пусть с ней разбирается администратор.
+                    skipped += 1
+                    continue
+                moved += 1
+                if not options['dry_run']:
+                    os.makedirs(os.path.dirname(target), exist_ok=True)
+                    os.replace(source, target)
+        if not options['dry_run']:
+            self.remove_empty_folders(root)
+        label = 'Нужно перенести' if options['dry_run'] else 'Перенесено'
+        self.stdout.write(f'{label} файлов: {moved}, пропущено: {skipped}')
+
+    def remove_empty_folders(self, root):
+        for folder, _, _ in os.walk(root, topdown=False):
+            if folder != root and not os.listdir(folder):
+                os.rmdir(folder)
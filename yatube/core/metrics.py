@@ -0,0 +1,228 @@
+"""Метрики производительности запросов.
+
+core.middleware.PerformanceMiddleware заводит на каждый запрос объект
+RequestMetrics и делает его текущим; SQL, рендер шаблонов и кеш
+фрагментов дописывают в него свои замеры. Готовые метрики уходят в
+приёмники из settings.PERFORMANCE_SINKS.
+
+Гистограммы Prometheus живут в памяти процесса: при нескольких
+воркерах каждый отдаёт на /metrics только свои запросы.
+"""
+import contextvars
+import logging
+import threading
+import time
+
+from django.conf import settings
+
+logger = logging.getLogger('yatube.performance')
+
+_current = contextvars.ContextVar('request_metrics', default=None)
+
+
+class RequestMetrics:
+    def __init__(self, sampled=True):
+        self.sampled = sampled
+        self.view_name = None
+        self.status = None
+        self.duration = 0.0
+        self.slow = False
+        self.sql_count = 0
+        self.sql_duration = 0.0
+        self.template_duration = 0.0
+        self.template_depth = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.response_size = None
+
+    def execute_wrapper(self, execute, sql, params, many, context):
+        """Обёртка для connection.execute_wrapper()."""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_count += 1
+            self.sql_duration += time.perf_counter() - start
+
+    def finish(self, request, response, duration):
+        match = request.resolver_match
+        self.view_name = match.view_name if match else '<unresolved>'
+        self.status = response.status_code
+        self.duration = duration
+        self.slow = duration * 1000 >= settings.PERFORMANCE_SLOW_REQUEST_MS
+        if not response.streaming:
+            self.response_size = len(response.content)
+
+
+def current():
+    return _current.get()
+
+
+def activate(metrics):
+    return _current.set(metrics)
+
+
+def deactivate(token):
+    _current.reset(token)
+
+
+def record_cache(hit):
+    metrics = _current.get()
+    if metrics is None:
+        return
+    if hit:
+        metrics.cache_hits += 1
+    else:
+        metrics.cache_misses += 1
+
+
+class LogSink:
+    """Строка в лог yatube.performance: медленные запросы - WARNING."""
+
+    def emit(self, request, response, metrics):
+        if not (metrics.sampled or metrics.slow):
+            return
+        logger.log(
+            logging.WARNING if metrics.slow else logging.INFO,
+            '%s %s %s %s %.1fms sql=%d/%.1fms templates=%.1fms '
+            'cache=%d/%d bytes=%s',
+            request.method, request.path, metrics.view_name,
+            metrics.status, metrics.duration * 1000, metrics.sql_count,
+            metrics.sql_duration * 1000, metrics.template_duration * 1000,
+            metrics.cache_hits, metrics.cache_hits + metrics.cache_misses,
+            metrics.response_size,
+        )
+
+
+class ServerTimingSink:
+    """Заголовок Server-Timing, виден во вкладке Network браузера.
+
+    Время шаблонов включает SQL, выполненный при их рендере: запросы
+    ленивые и часто срабатывают прямо в шаблоне.
+    """
+
+    def emit(self, request, response, metrics):
+        timings = [f'total;dur={metrics.duration * 1000:.1f}']
+        if metrics.sampled:
+            timings += [
+                f'db;desc="{metrics.sql_count} queries";'
+                f'dur={metrics.sql_duration * 1000:.1f}',
+                f'templates;dur={metrics.template_duration * 1000:.1f}',
+                f'cache;desc="{metrics.cache_hits} hits, '
+                f'{metrics.cache_misses} misses"',
+            ]
+        response['Server-Timing'] = ', '.join(timings)
+
+
+def _escape(value):
+    return (
+        str(value).replace('\\', '\\\\').replace('\n', '\\n')
+        .replace('"', '\\"')
+    )
+
+
+def _format_number(value):
+    return f'{value:g}' if value != float('inf') else '+Inf'
+
+
+class Histogram:
+    def __init__(self, name, documentation, buckets):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(buckets) + (float('inf'),)
+        self.series = {}
+        self.lock = threading.Lock()
+
+    def observe(self, view, value):
+        with self.lock:
+            counts, total = self.series.get(
+                view, ([0] * len(self.buckets), 0.0)
+            )
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+            self.series[view] = (counts, total + value)
+
+    def render(self):
+        lines = [
+            f'# HELP {self.name} {self.documentation}',
+            f'# TYPE {self.name} histogram',
+        ]
+        with self.lock:
+            series = sorted(
+                (view, list(counts), total)
+                for view, (counts, total) in self.series.items()
+            )
+        for view, counts, total in series:
+            label = f'view="{_escape(view)}"'
+            for bound, count in zip(self.buckets, counts):
+                lines.append(
+                    f'{self.name}_bucket{{{label},'
+                    f'le="{_format_number(bound)}"}} {count}'
+                )
+            lines.append(f'{self.name}_sum{{{label}}} {total:g}')
+            lines.append(f'{self.name}_count{{{label}}} {counts[-1]}')
+        return lines
+
+
+class Registry:
+    SECONDS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+    def __init__(self):
+        self.duration = Histogram(
+            'yatube_request_duration_seconds',
+            'Время обработки запроса.', self.SECONDS,
+        )
+        self.response_size = Histogram(
+            'yatube_response_size_bytes', 'Размер ответа.',
+            (1024, 4096, 16384, 65536, 262144, 1048576),
+        )
+        self.sql_queries = Histogram(
+            'yatube_request_sql_queries', 'SQL-запросов на запрос.',
+            (0, 1, 2, 5, 10, 20, 50, 100),
+        )
+        self.sql_duration = Histogram(
+            'yatube_request_sql_duration_seconds',
+            'Суммарное время SQL за запрос.', self.SECONDS,
+        )
+        self.template_duration = Histogram(
+            'yatube_request_template_duration_seconds',
+            'Время рендера шаблонов за запрос.', self.SECONDS,
+        )
+        self.cache_hit_ratio = Histogram(
+            'yatube_request_cache_hit_ratio',
+            'Доля попаданий в кеш фрагментов за запрос.',
+            (0, 0.25, 0.5, 0.75, 1),
+        )
+
+    def observe(self, metrics):
+        view = metrics.view_name
+        self.duration.observe(view, metrics.duration)
+        if metrics.response_size is not None:
+            self.response_size.observe(view, metrics.response_size)
+        if not metrics.sampled:
+            return
+        self.sql_queries.observe(view, metrics.sql_count)
+        self.sql_duration.observe(view, metrics.sql_duration)
+        self.template_duration.observe(view, metrics.template_duration)
+        lookups = metrics.cache_hits + metrics.cache_misses
+        if lookups:
+            self.cache_hit_ratio.observe(view, metrics.cache_hits / lookups)
+
+    def render(self):
+        lines = []
+        for histogram in (self.duration, self.response_size,
+                          self.sql_queries, self.sql_duration,
+                          self.template_duration, self.cache_hit_ratio):
+            lines += histogram.render()
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+
+class PrometheusSink:
+    """Гистограммы по имени URL для страницы /metrics."""
+
+    def emit(self, request, response, metrics):
+        registry.observe(metrics)
@@ -0,0 +1,113 @@
+import random
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.utils.cache import patch_vary_headers
+from django.utils.module_loading import import_string
+
+from . import compression, metrics
+
+
+class PerformanceMiddleware:
+    """Замеряет каждый запрос и передаёт метрики приёмникам.
+
+    Общее время и размер ответа снимаются всегда. SQL, шаблоны и кеш
+    меряются только у доли PERFORMANCE_SAMPLE_RATE запросов, поэтому
+    middleware стоит первой: так она видит всю цепочку обработки.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = settings.PERFORMANCE_SAMPLE_RATE
+        self.sinks = [
+            import_string(path)() for path in settings.PERFORMANCE_SINKS
+        ]
+
+    def __call__(self, request):
+        request_metrics = metrics.RequestMetrics(
+            sampled=random.random() < self.sample_rate
+        )
+        start = time.perf_counter()
+        if request_metrics.sampled:
+            token = metrics.activate(request_metrics)
+            try:
+                with ExitStack() as stack:
+                    for connection in connections.all():
+                        stack.enter_context(connection.execute_wrapper(
+                            request_metrics.execute_wrapper
+                        ))
+                    response = self.get_response(request)
+            finally:
+                metrics.deactivate(token)
+        else:
+            response = self.get_response(request)
+        request_metrics.finish(
+            request, response, time.perf_counter() - start
+        )
+        for sink in self.sinks:
+            sink.emit(request, response, request_metrics)
+        return response
+
+
+class CompressionMiddleware:
+    """Минифицирует HTML и сжимает ответ кодировкой из Accept-Encoding.
+
+    Обычные ответы сжимаются целиком, потоковые - по кускам, не собирая
+    тело в памяти. Уже сжатые ответы (заранее сжатая статика) и тела
+    короче COMPRESSION_MIN_LENGTH не трогаются. Стоит сразу после
+    PerformanceMiddleware, чтобы сжимать окончательное тело.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        # Сжатый кусок файла не склеится с остальными кусками.
+        if response.has_header('Content-Encoding') or (
+            response.status_code == 206
+        ):
+            return response
+        content_type = response.get('Content-Type', '')
+        if not response.streaming and settings.HTML_MINIFY and (
+            content_type.startswith('text/html')
+        ):
+            self.minify(response)
+        if not compression.is_compressible(content_type):
+            return response
+        if not response.streaming and (
+            len(response.content) < settings.COMPRESSION_MIN_LENGTH
+        ):
+            return response
+        patch_vary_headers(response, ['Accept-Encoding'])
+        encoding = compression.choose_encoding(
+            request.META.get('HTTP_ACCEPT_ENCODING', '')
+        )
+        if encoding is None:
+            return response
+        if response.streaming:
+            response.streaming_content = compression.compress_stream(
+                response.streaming_content, encoding
+            )
+            del response['Content-Length']
+        else:
+            response.content = compression.compress(
+                response.content, encoding
+            )
+            response['Content-Length'] = str(len(response.content))
+        # Сжатое тело отличается побайтно, поэтому ETag становится слабым.
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = encoding
+        return response
+
+    def minify(self, response):
+        html = response.content.decode(response.charset)
+        response.content = compression.minify_html(html).encode(
+            response.charset
+        )
+        if response.has_header('Content-Length'):
+            response['Content-Length'] = str(len(response.content))
@@ -0,0 +1,18 @@
+"""Бэкенд SQLite с настройками для веб-нагрузки.
+
+Подключается как ENGINE 'core.sqlite' и отличается от стандартного
+тремя вещами:
+
+* при каждом подключении выполняет PRAGMA из OPTIONS['pragmas'] поверх
+  DEFAULT_PRAGMAS: WAL-журнал, в котором читатели не ждут писателя,
+  synchronous=NORMAL, mmap и кеш страниц побольше;
+* транзакции открываются как BEGIN IMMEDIATE (OPTIONS['transaction_mode']):
+  блокировка на запись берётся сразу, и две транзакции не упираются друг
+  в друга при повышении блокировки, на котором SQLite отвечает
+  SQLITE_BUSY, не дожидаясь timeout;
+* запрос вне транзакции, получивший SQLITE_BUSY, повторяется
+  OPTIONS['busy_retries'] раз с экспоненциальной задержкой от
+  OPTIONS['busy_backoff'] секунд.
+
+Соединения между запросами держит стандартный CONN_MAX_AGE.
+"""
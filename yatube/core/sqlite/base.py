@@ -0,0 +1,90 @@
+import random
+import time
+
+from django.db.backends.sqlite3 import base
+from django.db.backends.sqlite3.base import Database
+
+DEFAULT_PRAGMAS = {
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'mmap_size': 256 * 1024 * 1024,
+    # Отрицательное значение - размер в КиБ, а не в страницах.
+    'cache_size': -64 * 1024,
+}
+DEFAULT_OPTIONS = {
+    'pragmas': {},
+    'transaction_mode': 'IMMEDIATE',
+    'busy_retries': 5,
+    'busy_backoff': 0.05,
+}
+TRANSACTION_MODES = ('DEFERRED', 'IMMEDIATE', 'EXCLUSIVE')
+
+
+def is_busy(error):
+    return 'database is locked' in str(error)
+
+
+class RetryingCursorWrapper(base.SQLiteCursorWrapper):
+    retries = 0
+    backoff = 0
+
+    def execute(self, query, params=None):
+        return self._retry(super().execute, query, params)
+
+    def executemany(self, query, param_list):
+        return self._retry(super().executemany, query, param_list)
+
+    def _retry(self, method, *args):
+        attempt = 0
+        while True:
+            try:
+                return method(*args)
+            except Database.OperationalError as error:
+                # Внутри транзакции повтор одного запроса не поможет:
+                # снимок уже устарел, откатывать должен вызывающий код.
+                if (attempt >= self.retries or not is_busy(error)
+                        or self.connection.in_transaction):
+                    raise
+            time.sleep(self.backoff * 2 ** attempt * (1 + random.random()))
+            attempt += 1
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        options = self.settings_dict['OPTIONS']
+        self.backend_options = {
+            name: options.get(name, default)
+            for name, default in DEFAULT_OPTIONS.items()
+        }
+        mode = self.backend_options['transaction_mode'].upper()
+        if mode not in TRANSACTION_MODES:
+            raise ValueError(
+                f'transaction_mode должен быть одним из {TRANSACTION_MODES}'
+            )
+        self.backend_options['transaction_mode'] = mode
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        for name in DEFAULT_OPTIONS:
+            params.pop(name, None)
+        return params
+
+    def get_new_connection(self, conn_params):
+        connection = super().get_new_connection(conn_params)
+        pragmas = {**DEFAULT_PRAGMAS, **self.backend_options['pragmas']}
+        for name, value in pragmas.items():
+            connection.execute(f'PRAGMA {name} = {value}')
+        return connection
+
+    def create_cursor(self, name=None):
+        cursor = self.connection.cursor(factory=RetryingCursorWrapper)
+        cursor.retries = self.backend_options['busy_retries']
+        cursor.backoff = self.backend_options['busy_backoff']
+        return cursor
+
+    def _start_transaction_under_autocommit(self):
+        self.cursor().execute(
+            f"BEGIN {self.backend_options['transaction_mode']}"
+        )
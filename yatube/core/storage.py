@@ -0,0 +1,130 @@
+"""Хранилища статики и медиафайлов.
+
+CompressedManifestStaticFilesStorage: collectstatic сохраняет
+bootstrap.min.css как bootstrap.min.<md5>.css, а рядом кладёт .gz и, если
+установлен пакет brotli, .br. Хеш меняется вместе с содержимым, поэтому
+такие файлы можно кешировать навсегда; сжатые копии отдаёт
+core.views.static_serve без сжатия на лету.
+
+ShardedFileSystemStorage: медиафайл с именем uploads/photo.jpg лежит в
+MEDIA_ROOT/<ab>/<cd>/uploads/photo.jpg, где ab и cd - начало md5 имени.
+Имена в базе и адреса не меняются, а файлы расходятся по 65536 папкам,
+и ни одна из них не разрастается до миллионов записей.
+"""
+import gzip
+import hashlib
+import os
+import posixpath
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.utils._os import safe_join
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Картинки и шрифты уже сжаты, их повторное сжатие ничего не даёт.
+COMPRESSIBLE_EXTENSIONS = (
+    '.css', '.js', '.map', '.svg', '.html', '.txt', '.json', '.xml',
+    '.ico',
+)
+
+
+# Кодировки в порядке предпочтения при отдаче и расширения их копий.
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def compressors():
+    if brotli is not None:
+        yield '.br', brotli.compress
+    yield '.gz', lambda data: gzip.compress(data, 9, mtime=0)
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+
+    def stored_name(self, name):
+        # Пока collectstatic не запускался (разработка, тесты), манифеста
+        # нет, и ссылки ведут на исходные файлы, как при DEBUG.
+        if not self.hashed_files:
+            return name
+        return super().stored_name(name)
+
+    def is_immutable(self, name):
+        """Имя с хешем содержимого: такой файл никогда не меняется."""
+        if len(getattr(self, '_immutable', ())) != len(self.hashed_files):
+            self._immutable = set(self.hashed_files.values())
+        return name in self._immutable
+
+    def post_process(self, paths, dry_run=False, **options):
+        processed_names = set()
+        for name, hashed_name, processed in super().post_process(
+            paths, dry_run, **options
+        ):
+            if hashed_name and not isinstance(processed, Exception):
+                processed_names.update((name, hashed_name))
+            yield name, hashed_name, processed
+        if dry_run:
+            return
+        for name in sorted(processed_names):
+            self.compress(name)
+
+    def compress(self, name):
+        if not name.lower().endswith(COMPRESSIBLE_EXTENSIONS):
+            return
+        with self.open(name) as original:
+            data = original.read()
+        for suffix, compress in compressors():
+            compressed = compress(data)
+            # Сжатая копия, которая не меньше оригинала, не нужна.
+            if len(compressed) >= len(data):
+                continue
+            if self.exists(name + suffix):
+                self.delete(name + suffix)
+            self._save(name + suffix, ContentFile(compressed))
+
+
+def shard(name):
+    """Путь файла name относительно корня хранилища."""
+    name = name.replace('\\', '/')
+    digest = hashlib.md5(name.encode()).hexdigest()
+    return posixpath.join(digest[:2], digest[2:4], name)
+
+
+def unshard(path):
+    """Имя файла по пути относительно корня или None, если путь не
+    соответствует раскладке по хешу."""
+    parts = path.replace(os.sep, '/').split('/', 2)
+    if len(parts) == 3 and shard(parts[2]) == '/'.join(parts):
+        return parts[2]
+    return None
+
+
+class ShardedFileSystemStorage(FileSystemStorage):
+
+    def path(self, name):
+        return safe_join(self.location, shard(name))
+
+    def listdir(self, path):
+        """Содержимое папки по всем шардам; обходит до 65536 папок,
+        поэтому годится для обслуживания, а не для запросов."""
+        directories, files = set(), set()
+        if not os.path.isdir(self.location):
+            return [], []
+        for first in os.scandir(self.location):
+            if not first.is_dir():
+                continue
+            for second in os.scandir(first.path):
+                folder = os.path.join(second.path, path)
+                if not second.is_dir() or not os.path.isdir(folder):
+                    continue
+                for entry in os.scandir(folder):
+                    if entry.is_dir():
+                        directories.add(entry.name)
+                    elif unshard(os.path.relpath(
+                        entry.path, self.location
+                    )) is not None:
+                        files.add(entry.name)
+        return sorted(directories), sorted(files)
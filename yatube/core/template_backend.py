@@ -0,0 +1,36 @@
+"""Шаблонизатор Django, который засекает время рендера для core.metrics."""
+import time
+
+from django.template import TemplateDoesNotExist
+from django.template.backends import django as backend
+
+from . import metrics
+
+
+class Template(backend.Template):
+    def render(self, context=None, request=None):
+        request_metrics = metrics.current()
+        if request_metrics is None:
+            return super().render(context, request)
+        # Вложенный render_to_string уже учтён во внешнем рендере.
+        request_metrics.template_depth += 1
+        start = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            request_metrics.template_depth -= 1
+            if not request_metrics.template_depth:
+                request_metrics.template_duration += (
+                    time.perf_counter() - start
+                )
+
+
+class DjangoTemplates(backend.DjangoTemplates):
+    def from_string(self, template_code):
+        return Template(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return Template(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            backend.reraise(exc, self)
@@ -0,0 +1,28 @@
+"""Запуск тестов с кешами в памяти процесса.
+
+Рабочие кеши лежат в BASE_DIR/cache: тесты, очищающие кеш, иначе
+сбрасывали бы фрагменты страниц и сессии разработчика, а записи одного
+прогона доживали бы до следующего.
+"""
+from django.conf import settings
+from django.test import override_settings
+from django.test.runner import DiscoverRunner
+
+
+class LocalCacheRunner(DiscoverRunner):
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        # Все кеши, включая кеш сессий: тесты очищают и его.
+        self.caches_override = override_settings(CACHES={
+            alias: {
+                'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                'LOCATION': f'test-{alias}',
+            }
+            for alias in settings.CACHES
+        })
+        self.caches_override.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.caches_override.disable()
+        super().teardown_test_environment(**kwargs)
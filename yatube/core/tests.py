@@ -1,4 +1,27 @@
-from django.test import TestCase, Client
+import asyncio
+import gzip
+import io
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.db import OperationalError, connection
+from django.test import (TestCase, TransactionTestCase, Client,
+                         override_settings)
+from django.urls import reverse
+
+from .asgi import ASGIHandler
+from .compression import minify_html
+from .sqlite.base import DatabaseWrapper
+from .storage import shard
 
 
 class ViewTestClass(TestCase):
@@ -16,3 +39,339 @@ class ViewTestClass(TestCase):
         response = ViewTestClass.client.get('/nonexist-page/')
         self.assertEqual(response.status_code, 404)
         self.assertTemplateUsed(response, 'core/404.html')
+
+
+class CompressionMiddlewareTest(TestCase):
+    def test_html_minified_and_gzipped(self):
+        """HTML приходит без комментариев и сжатым, если клиент
+        принимает gzip."""
+        plain = self.client.get(reverse('posts:index'))
+        self.assertNotContains(plain, '<!--')
+        self.assertNotIn(b'\n\n', plain.content)
+        response = self.client.get(
+            reverse('posts:index'), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+        self.assertLess(len(response.content), len(plain.content))
+
+    def test_streaming_response_compressed(self):
+        """Потоковый ответ API сжимается по кускам."""
+        response = self.client.get(
+            reverse('posts:api_index'), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        body = gzip.decompress(b''.join(response.streaming_content))
+        self.assertEqual(json.loads(body)['results'], [])
+
+    def test_small_body_not_compressed(self):
+        """Короткий ответ отдаётся как есть."""
+        response = self.client.get(
+            reverse('posts:api_post_detail', args=[1]),
+            HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_minify_keeps_preformatted_blocks(self):
+        """Содержимое <pre>, <textarea> и <script> не меняется."""
+        html = (
+            '<div>\n    <!-- комментарий -->\n    <p>a   b</p>\n</div>\n'
+            '<pre>  x\n\n  y</pre>\n<textarea>  1\n  2</textarea>'
+            '<script>// <!-- не комментарий -->\n  f();</script>'
+        )
+        self.assertEqual(
+            minify_html(html),
+            '<div>\n<p>a b</p>\n</div>\n<pre>  x\n\n  y</pre>\n'
+            '<textarea>  1\n  2</textarea>'
+            '<script>// <!-- не комментарий -->\n  f();</script>'
+        )
+
+
+class PerformanceMiddlewareTest(TestCase):
+    def test_server_timing_header(self):
+        """Ответ несёт Server-Timing с числом SQL-запросов."""
+        response = self.client.get(reverse('posts:index'))
+        timing = response['Server-Timing']
+        self.assertIn('total;dur=', timing)
+        self.assertRegex(timing, r'db;desc="[1-9]\d* queries"')
+        self.assertIn('templates;dur=', timing)
+
+    def test_metrics_endpoint(self):
+        """/metrics отдаёт гистограммы по имени URL."""
+        self.client.get(reverse('posts:index'))
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(
+            'yatube_request_duration_seconds_count{view="posts:index"}',
+            response.content.decode(),
+        )
+
+    def test_metrics_hidden_from_outside(self):
+        """/metrics недоступна с адресов вне INTERNAL_IPS."""
+        response = self.client.get(
+            reverse('metrics'), REMOTE_ADDR='10.0.0.1'
+        )
+        self.assertEqual(response.status_code, 404)
+
+    @override_settings(PERFORMANCE_SLOW_REQUEST_MS=0,
+                       PERFORMANCE_SAMPLE_RATE=0)
+    def test_slow_request_logged_without_sampling(self):
+        """Медленный запрос попадает в лог и без выборки."""
+        with self.assertLogs('yatube.performance', 'WARNING') as logs:
+            response = self.client.get(reverse('posts:index'))
+        self.assertIn('posts:index', logs.output[0])
+        self.assertNotIn('db;', response['Server-Timing'])
+
+
+STATIC_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(STATIC_ROOT=STATIC_ROOT)
+class StaticFilesTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        call_command('collectstatic', interactive=False, verbosity=0)
+        cls.css_url = staticfiles_storage.url('css/bootstrap.min.css')
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(STATIC_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def test_pages_link_hashed_names(self):
+        """Страницы ссылаются на файлы с хешем содержимого в имени."""
+        self.assertRegex(self.css_url, r'bootstrap\.min\.[0-9a-f]{12}\.css$')
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, self.css_url)
+        self.assertContains(
+            response, staticfiles_storage.url('img/fav/favicon.ico'))
+
+    def test_precompressed_copy_served(self):
+        """Клиент с gzip получает сжатую при collectstatic копию,
+        файл с хешем кешируется навсегда."""
+        response = self.client.get(
+            self.css_url, HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Content-Type'], 'text/css')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertIn('Accept-Encoding', response['Vary'])
+        content = gzip.decompress(b''.join(response.streaming_content))
+        with staticfiles_storage.open('css/bootstrap.min.css') as original:
+            self.assertEqual(content, original.read())
+
+    def test_plain_copy_without_accept_encoding(self):
+        """Без Accept-Encoding и с gzip;q=0 отдаётся несжатый файл,
+        файл без хеша браузер перепроверяет."""
+        for header in ('', 'gzip;q=0'):
+            with self.subTest(header=header):
+                response = self.client.get(
+                    self.css_url, HTTP_ACCEPT_ENCODING=header)
+                self.assertFalse(response.has_header('Content-Encoding'))
+        response = self.client.get(
+            settings.STATIC_URL + 'css/bootstrap.min.css')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('no-cache', response['Cache-Control'])
+        self.assertEqual(
+            self.client.get(settings.STATIC_URL + '../manage.py').status_code,
+            404)
+
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class MediaFilesTest(TestCase):
+    content = bytes(range(256)) * 4
+
+    def setUp(self):
+        self.name = default_storage.save('audio/song.mp3', ContentFile(
+            self.content))
+        self.url = default_storage.url(self.name)
+
+    def tearDown(self):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def test_files_sharded_by_name_hash(self):
+        """Файл лежит в подпапке по хешу, а имя и адрес не меняются."""
+        self.assertEqual(self.name, 'audio/song.mp3')
+        self.assertEqual(self.url, settings.MEDIA_URL + self.name)
+        self.assertRegex(shard(self.name), r'^[0-9a-f]{2}/[0-9a-f]{2}/')
+        self.assertTrue(os.path.isfile(
+            os.path.join(MEDIA_ROOT, shard(self.name))))
+        self.assertEqual(
+            default_storage.listdir('audio'), ([], ['song.mp3']))
+
+    def test_range_requests(self):
+        """Range отдаёт кусок файла, диапазон за концом файла - 416."""
+        response = self.client.get(self.url)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(
+            b''.join(response.streaming_content), self.content)
+        cases = (
+            ('bytes=10-19', 'bytes 10-19/1024', self.content[10:20]),
+            ('bytes=1000-', 'bytes 1000-1023/1024', self.content[1000:]),
+            ('bytes=-4', 'bytes 1020-1023/1024', self.content[-4:]),
+        )
+        for header, content_range, content in cases:
+            with self.subTest(header=header):
+                response = self.client.get(self.url, HTTP_RANGE=header)
+                self.assertEqual(response.status_code, 206)
+                self.assertEqual(response['Content-Range'], content_range)
+                self.assertEqual(
+                    b''.join(response.streaming_content), content)
+        response = self.client.get(self.url, HTTP_RANGE='bytes=2000-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], 'bytes */1024')
+
+    def test_conditional_requests(self):
+        """Совпавший ETag - 304, устаревший If-Range - весь файл."""
+        etag = self.client.get(self.url)['ETag']
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        response = self.client.get(
+            self.url, HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"old"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            self.client.get('/media/../manage.py').status_code, 404)
+
+    def test_staged_uploads_not_served(self):
+        """Исходники загрузок с метаданными по /media/ не отдаются."""
+        name = default_storage.save('uploads/photo.jpg', ContentFile(b'raw'))
+        for url in (default_storage.url(name), '/media/posts/../' + name):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 404)
+
+    @override_settings(MEDIA_SENDFILE_HEADER='X-Accel-Redirect')
+    def test_sendfile_offload(self):
+        """С X-Accel-Redirect тело отдаёт nginx из внутреннего адреса."""
+        response = self.client.get(self.url)
+        self.assertEqual(
+            response['X-Accel-Redirect'],
+            settings.MEDIA_SENDFILE_ROOT + shard(self.name))
+        self.assertEqual(response.content, b'')
+        self.assertEqual(response['Content-Type'], 'audio/mpeg')
+
+    def test_shard_media_moves_old_files(self):
+        """Команда раскладывает файлы, сохранённые без шардирования."""
+        old_path = os.path.join(MEDIA_ROOT, 'posts', 'old.jpg')
+        os.makedirs(os.path.dirname(old_path))
+        with open(old_path, 'wb') as file:
+            file.write(b'old')
+        output = io.StringIO()
+        call_command('shard_media', '--dry-run', stdout=output)
+        self.assertIn('Нужно перенести файлов: 1', output.getvalue())
+        self.assertTrue(os.path.isfile(old_path))
+        call_command('shard_media', stdout=output)
+        self.assertFalse(os.path.exists(os.path.dirname(old_path)))
+        with default_storage.open('posts/old.jpg') as file:
+            self.assertEqual(file.read(), b'old')
+        with default_storage.open(self.name) as file:
+            self.assertEqual(file.read(), self.content)
+
+
+class SqliteBackendTest(TestCase):
+    def setUp(self):
+        self.workdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.workdir, 'db.sqlite3')
+
+    def tearDown(self):
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+    def database(self, **options):
+        wrapper = DatabaseWrapper({
+            **connection.settings_dict,
+            'NAME': self.path,
+            'OPTIONS': {'timeout': 0, 'busy_backoff': 0.01, **options},
+        })
+        self.addCleanup(wrapper.close)
+        return wrapper
+
+    def pragma(self, wrapper, name):
+        with wrapper.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    def test_pragmas_applied_on_connect(self):
+        """Каждое соединение получает WAL и остальные PRAGMA."""
+        wrapper = self.database(pragmas={'cache_size': -1024})
+        self.assertEqual(self.pragma(wrapper, 'journal_mode'), 'wal')
+        self.assertEqual(self.pragma(wrapper, 'synchronous'), 1)
+        self.assertEqual(self.pragma(wrapper, 'cache_size'), -1024)
+
+    def test_busy_database_retried(self):
+        """Запрос к занятой базе повторяется, пока блокировка не снята,
+        а без повторов сразу падает."""
+        wrapper = self.database(busy_retries=8)
+        with wrapper.cursor() as cursor:
+            cursor.execute('CREATE TABLE item (id integer)')
+        blocker = sqlite3.connect(
+            self.path, isolation_level=None, check_same_thread=False)
+        self.addCleanup(blocker.close)
+        blocker.execute('BEGIN IMMEDIATE')
+        with self.assertRaises(OperationalError):
+            with self.database(busy_retries=0).cursor() as cursor:
+                cursor.execute('INSERT INTO item VALUES (1)')
+        threading.Timer(0.1, blocker.execute, ['COMMIT']).start()
+        with wrapper.cursor() as cursor:
+            cursor.execute('INSERT INTO item VALUES (1)')
+        self.assertEqual(
+            blocker.execute('SELECT count(*) FROM item').fetchone()[0], 1)
+
+
+class AsgiHandlerTest(TransactionTestCase):
+    def setUp(self):
+        self.application = ASGIHandler(max_workers=2)
+        self.addCleanup(self.application.executor.shutdown)
+
+    def request(self, path, query_string=b'', headers=()):
+        scope = {
+            'type': 'http',
+            'method': 'GET',
+            'path': path,
+            'query_string': query_string,
+            'headers': [(b'host', b'testserver'), *headers],
+            'client': ('127.0.0.1', 50000),
+            'server': ('testserver', 80),
+        }
+        messages = [{'type': 'http.request', 'body': b''}]
+        sent = []
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            sent.append(message)
+
+        asyncio.run(self.application(scope, receive, send))
+        body = b''.join(message.get('body', b'') for message in sent[1:])
+        return sent[0], body
+
+    def test_pages_served_through_thread_pool(self):
+        """Страницы отдаются через ASGI так же, как через WSGI."""
+        start, body = self.request(reverse('posts:index'))
+        self.assertEqual(start['status'], 200)
+        self.assertIn(b'<html', body)
+        start, _ = self.request('/nonexist-page/')
+        self.assertEqual(start['status'], 404)
+
+    def test_query_string_and_headers_passed(self):
+        """Строка запроса и заголовки доходят до Django."""
+        start, body = self.request(
+            reverse('posts:search'), query_string='q=кот'.encode(),
+            headers=[(b'accept-encoding', b'gzip')],
+        )
+        self.assertEqual(start['status'], 200)
+        self.assertIn((b'content-encoding', b'gzip'), start['headers'])
+        self.assertIn('кот'.encode(), gzip.decompress(body))
+
+    def test_repeated_cookie_headers_joined(self):
+        """Отдельные заголовки cookie (HTTP/2) склеиваются через "; "."""
+        environ = self.application.environ({
+            'method': 'GET',
+            'path': '/',
+            'headers': [(b'cookie', b'a=1'), (b'cookie', b'b=2'),
+                        (b'accept', b'text/html'), (b'accept', b'*/*')],
+        }, None)
+        self.assertEqual(environ['HTTP_COOKIE'], 'a=1; b=2')
+        self.assertEqual(environ['HTTP_ACCEPT'], 'text/html,*/*')
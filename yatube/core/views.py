@@ -1,4 +1,30 @@
+import mimetypes
+import os
+import posixpath
+import re
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.storage import default_storage
+from django.http import (FileResponse, Http404, HttpResponse,
+                         HttpResponseNotModified, StreamingHttpResponse)
 from django.shortcuts import render
+from django.utils._os import safe_join
+from django.utils.cache import (get_conditional_response, patch_cache_control,
+                                patch_vary_headers)
+from django.utils.http import http_date, parse_http_date_safe
+from django.views.static import was_modified_since
+
+from .compression import accepted_encodings
+from .metrics import registry
+from .storage import ENCODINGS
+
+# Год - предел, который браузеры и прокси принимают для max-age.
+IMMUTABLE_MAX_AGE = 60 * 60 * 24 * 365
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+CHUNK_SIZE = 64 * 1024
 
 
 def page_not_found(request, exception):
@@ -15,3 +41,182 @@ def permission_denied(request, exception):
 
 def csrf_failure(request, reason=''):
     return render(request, 'core/403csrf.html')
+
+
+def metrics(request):
+    """Гистограммы запросов в текстовом формате Prometheus."""
+    if request.META.get('REMOTE_ADDR') not in settings.INTERNAL_IPS:
+        raise Http404
+    return HttpResponse(
+        registry.render(), content_type='text/plain; version=0.0.4'
+    )
+
+
+def static_serve(request, path):
+    """Статика из STATIC_ROOT без CDN и отдельного веб-сервера.
+
+    Если клиент принимает br или gzip, отдаётся заранее сжатая при
+    collectstatic копия. Файлы с хешем содержимого в имени кешируются
+    на год как immutable, остальные браузер перепроверяет по
+    Last-Modified.
+    """
+    path = posixpath.normpath(path).lstrip('/')
+    try:
+        fullpath = safe_join(settings.STATIC_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404
+    if not os.path.isfile(fullpath):
+        raise Http404
+    served, encoding, has_variants = fullpath, None, False
+    accepted = accepted_encodings(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+    for candidate, suffix in ENCODINGS:
+        if not os.path.isfile(fullpath + suffix):
+            continue
+        has_variants = True
+        if encoding is None and candidate in accepted:
+            served, encoding = fullpath + suffix, candidate
+    immutable = getattr(staticfiles_storage, 'is_immutable', None)
+    immutable = immutable is not None and immutable(path)
+    stat = os.stat(fullpath)
+    if not was_modified_since(
+        request.META.get('HTTP_IF_MODIFIED_SINCE'), stat.st_mtime
+    ):
+        return HttpResponseNotModified()
+    content_type, _ = mimetypes.guess_type(fullpath)
+    response = FileResponse(
+        open(served, 'rb'),
+        content_type=content_type or 'application/octet-stream',
+    )
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    if encoding:
+        response['Content-Encoding'] = encoding
+    if has_variants:
+        patch_vary_headers(response, ['Accept-Encoding'])
+    if immutable:
+        patch_cache_control(
+            response, public=True, max_age=IMMUTABLE_MAX_AGE, immutable=True)
+    else:
+        patch_cache_control(response, public=True, no_cache=True)
+    return response
+
+
+def parse_range(header, size):
+    """(начало, конец) из заголовка Range для файла размером size.
+
+    Возвращает None, если диапазон не указан или записан в непонятном
+    виде (тогда отдаётся весь файл), и ValueError, если он не пересекается
+    с файлом. Несколько диапазонов сразу не поддерживаются: для картинок
+    их не запрашивают, а весь файл - допустимый ответ на такой запрос.
+    """
+    match = RANGE_RE.match(header.replace(' ', ''))
+    if match is None:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        suffix = int(last)
+        if suffix == 0:
+            raise ValueError(header)
+        return max(size - suffix, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError(header)
+    return start, end
+
+
+def _file_segment(fullpath, start, length):
+    with open(fullpath, 'rb') as file:
+        file.seek(start)
+        while length > 0:
+            chunk = file.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def _if_range_matches(request, etag, mtime):
+    value = request.META.get('HTTP_IF_RANGE')
+    if value is None:
+        return True
+    if value.startswith(('"', 'W/')):
+        return value == etag
+    return parse_http_date_safe(value) == mtime
+
+
+def _media_response(request, fullpath, size, etag, mtime):
+    content_type, encoding = mimetypes.guess_type(fullpath)
+    content_type = content_type or 'application/octet-stream'
+    sendfile = settings.MEDIA_SENDFILE_HEADER
+    if sendfile:
+        # Range и заголовки условных запросов веб-сервер обработает сам.
+        response = HttpResponse(content_type=content_type)
+        relative = os.path.relpath(fullpath, default_storage.location)
+        if sendfile == 'X-Accel-Redirect':
+            response[sendfile] = posixpath.join(
+                settings.MEDIA_SENDFILE_ROOT,
+                relative.replace(os.sep, '/'),
+            )
+        else:
+            response[sendfile] = fullpath
+        return response
+    try:
+        byte_range = None
+        if request.method == 'GET' and _if_range_matches(
+            request, etag, mtime
+        ):
+            byte_range = parse_range(request.META.get('HTTP_RANGE', ''), size)
+    except ValueError:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+    if byte_range is None:
+        response = FileResponse(
+            open(fullpath, 'rb'), content_type=content_type)
+    else:
+        start, end = byte_range
+        response = StreamingHttpResponse(
+            _file_segment(fullpath, start, end - start + 1),
+            status=206,
+            content_type=content_type,
+        )
+        response['Content-Length'] = str(end - start + 1)
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    if encoding:
+        response['Content-Encoding'] = encoding
+    return response
+
+
+def media_serve(request, path):
+    """Загруженные файлы из DEFAULT_FILE_STORAGE.
+
+    Поддерживает If-None-Match/If-Modified-Since и один диапазон Range,
+    так что видео и большие картинки можно докачивать и перематывать.
+    Если задан MEDIA_SENDFILE_HEADER, тело отдаёт веб-сервер, а Django
+    только проверяет путь и ставит заголовки. Файлы из
+    MEDIA_PRIVATE_DIRS не отдаются.
+    """
+    path = posixpath.normpath(path).lstrip('/')
+    if path.startswith(tuple(settings.MEDIA_PRIVATE_DIRS)):
+        raise Http404
+    try:
+        fullpath = default_storage.path(path)
+    except SuspiciousFileOperation:
+        raise Http404
+    if not os.path.isfile(fullpath):
+        raise Http404
+    stat = os.stat(fullpath)
+    mtime, size = int(stat.st_mtime), stat.st_size
+    etag = f'"{mtime:x}-{size:x}"'
+    response = get_conditional_response(
+        request, etag=etag, last_modified=mtime)
+    if response is None:
+        response = _media_response(request, fullpath, size, etag, mtime)
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(mtime)
+    response['Accept-Ranges'] = 'bytes'
+    patch_cache_control(
+        response, public=True, max_age=settings.MEDIA_MAX_AGE)
+    return response
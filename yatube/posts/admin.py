@@ -1,16 +1,85 @@
 from django.contrib import admin
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.contrib.admin.views.main import ORDER_VAR, ChangeList
 
 from .models import Follow, Comment, Group, Post
+from .paginator import EstimatedCountPaginator
+from .search import get_backend
+from .settings import SEARCH_ADMIN_LIMIT
+
+CURSOR_VAR = 'cursor'
+
+
+class CursorChangeList(ChangeList):
+    """Список, который на больших таблицах листается по id.
+
+    Если записей больше EstimatedCountPaginator.limit и пользователь не
+    выбрал сортировку по столбцу, страница выбирается условием
+    pk < cursor вместо OFFSET, и её время не зависит от глубины.
+    """
+
+    def get_filters_params(self, params=None):
+        lookup_params = super().get_filters_params(params)
+        lookup_params.pop(CURSOR_VAR, None)
+        return lookup_params
+
+    def get_results(self, request):
+        super().get_results(request)
+        self.cursor_mode = (
+            self.multi_page
+            and ORDER_VAR not in self.params
+            and (CURSOR_VAR in self.params or self.paginator.estimated)
+        )
+        if not self.cursor_mode:
+            return
+        queryset = self.queryset.order_by('-pk')
+        cursor = self.params.get(CURSOR_VAR)
+        if cursor is not None:
+            try:
+                queryset = queryset.filter(pk__lt=int(cursor))
+            except ValueError:
+                raise IncorrectLookupParameters
+        ids = list(
+            queryset.values_list('pk', flat=True)[:self.list_per_page + 1]
+        )
+        self.result_list = queryset.filter(pk__in=ids[:self.list_per_page])
+        self.first_url = (
+            self.get_query_string(remove=[CURSOR_VAR])
+            if cursor is not None else None
+        )
+        self.next_url = (
+            self.get_query_string({CURSOR_VAR: ids[self.list_per_page - 1]})
+            if len(ids) > self.list_per_page else None
+        )
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """Админка таблиц, которые растут без ограничений: без точного
+    COUNT(*) и с курсорными страницами (шаблон
+    admin/posts/change_list.html)."""
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_changelist(self, request, **kwargs):
+        return CursorChangeList
 
 
 # Register your models here.
-class PostAdmin(admin.ModelAdmin):
+class PostAdmin(LargeTableAdmin):
     list_display = ('pk', 'text', 'pub_date', 'author', 'group')
+    list_select_related = ('author', 'group')
     search_fields = ('text',)
     list_filter = ('pub_date', 'group')
     list_editable = ('group',)
+    autocomplete_fields = ('author',)
     empty_value_display = '-пусто-'
 
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term:
+            return queryset, False
+        found = get_backend().search(search_term, SEARCH_ADMIN_LIMIT)
+        return queryset.filter(pk__in=found), False
+
 
 class GroupAdmin(admin.ModelAdmin):
     list_display = ('pk', 'title', 'description')
@@ -18,18 +87,25 @@ class GroupAdmin(admin.ModelAdmin):
     empty_value_display = '-пусто-'
 
 
-class CommentAdmin(admin.ModelAdmin):
+class CommentAdmin(LargeTableAdmin):
     list_display = ('pk', 'text', 'created', 'post', 'author')
+    # Post.__str__ выводит автора и группу поста.
+    list_select_related = ('post__author', 'post__group', 'author')
     search_fields = ('text',)
-    list_filter = ('created', 'post')
-    list_editable = ('post',)
+    # Фильтр по посту выводил бы ссылку на каждый пост базы; комментарии
+    # одного поста открываются адресом ?post=<id>.
+    list_filter = ('created',)
+    autocomplete_fields = ('post', 'author')
     empty_value_display = '-пусто-'
 
 
-class FollowAdmin(admin.ModelAdmin):
+class FollowAdmin(LargeTableAdmin):
     list_display = ('pk', 'user', 'author')
-    list_filter = ('user',)
-    list_editable = ('author',)
+    list_select_related = ('user', 'author')
+    # Вместо фильтра со всеми пользователями - поиск по имени
+    # и адрес ?user=<id>.
+    search_fields = ('user__username', 'author__username')
+    autocomplete_fields = ('user', 'author')
     empty_value_display = '-пусто-'
 
 
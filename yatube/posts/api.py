@@ -0,0 +1,199 @@
+"""JSON API только для чтения поверх тех же запросов, что и HTML-страницы.
+
+Ответ - объект {"results": [...], "next_cursor": ..., ...}. Страница
+выбирается курсором (?cursor=, ?limit=), набор полей - параметром
+?fields=id,text. Тело отдаётся StreamingHttpResponse: записи
+сериализуются по одной по мере отправки, а не собираются в одну
+строку. ETag и 304 - как у HTML-страниц (posts.conditional).
+"""
+from functools import wraps
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+
+from . import conditional
+from .models import Group, Post, User
+from .paginator import CursorPaginator, InvalidCursor
+from .settings import API_MAX_PAGE_SIZE, COMMENTS_PER_PAGE, ITEMS_PER_PAGE
+from .timeline import TimelinePaginator
+from .views import comment_paginator
+
+POST_FIELDS = {
+    'id': lambda post: post.id,
+    'text': lambda post: post.text,
+    'pub_date': lambda post: post.pub_date,
+    'author': lambda post: post.author.username,
+    'group': lambda post: post.group.slug if post.group else None,
+    'comments_count': lambda post: post.comments_count,
+    'images': lambda post: [
+        {
+            'url': thumbnail.url,
+            'width': thumbnail.width,
+            'height': thumbnail.height,
+            'format': thumbnail.format,
+        }
+        for thumbnail in post.sized_thumbnails()
+    ],
+    'url': lambda post: reverse('posts:post_detail', args=[post.id]),
+}
+COMMENT_FIELDS = {
+    'id': lambda comment: comment.id,
+    'author': lambda comment: comment.author.username,
+    'text': lambda comment: comment.text,
+    'created': lambda comment: comment.created,
+}
+
+encoder = DjangoJSONEncoder(ensure_ascii=False)
+
+
+class ApiError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+def api_view(view):
+    """Ошибки запроса отдаются JSON, а не HTML-страницей."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        try:
+            return view(request, *args, **kwargs)
+        except ApiError as error:
+            status = error.status
+            message = error.message
+        except Http404:
+            status = 404
+            message = 'Не найдено'
+        return JsonResponse(
+            {'error': message},
+            status=status,
+            json_dumps_params={'ensure_ascii': False},
+        )
+    return wrapper
+
+
+def _fields(requested, available):
+    if not requested:
+        return available
+    names = requested.split(',')
+    unknown = set(names) - set(available)
+    if unknown:
+        raise ApiError(f'Неизвестные поля: {", ".join(sorted(unknown))}')
+    return {name: available[name] for name in names}
+
+
+def _limit(request, default=ITEMS_PER_PAGE):
+    try:
+        limit = int(request.GET.get('limit', default))
+    except ValueError:
+        limit = 0
+    if not 1 <= limit <= API_MAX_PAGE_SIZE:
+        raise ApiError(f'limit должен быть от 1 до {API_MAX_PAGE_SIZE}')
+    return limit
+
+
+def _page(request, paginator):
+    try:
+        return paginator.page(request.GET.get('cursor') or None)
+    except InvalidCursor:
+        raise ApiError('Некорректный курсор')
+
+
+def _serialize(item, fields):
+    return {name: get(item) for name, get in fields.items()}
+
+
+def _stream(results, fields, **extra):
+    yield '{"results": ['
+    for index, item in enumerate(results):
+        if index:
+            yield ', '
+        yield encoder.encode(_serialize(item, fields))
+    yield ']'
+    for key, value in extra.items():
+        yield f', {encoder.encode(key)}: {encoder.encode(value)}'
+    yield '}'
+
+
+def _response(page, fields, **extra):
+    return StreamingHttpResponse(
+        _stream(
+            page,
+            fields,
+            next_cursor=page.next_cursor,
+            previous_cursor=page.previous_cursor,
+            **extra,
+        ),
+        content_type='application/json',
+    )
+
+
+def _feed(request, paginator):
+    fields = _fields(request.GET.get('fields'), POST_FIELDS)
+    return _response(_page(request, paginator), fields)
+
+
+@conditional.conditional_page(conditional.index)
+@api_view
+def index(request):
+    return _feed(request, CursorPaginator(
+        Post.objects.for_feed(), _limit(request)
+    ))
+
+
+@conditional.conditional_page(conditional.group_posts)
+@api_view
+def group_posts(request, slug):
+    group = get_object_or_404(Group, slug=slug)
+    return _feed(request, CursorPaginator(
+        group.posts.for_feed(), _limit(request)
+    ))
+
+
+@conditional.conditional_page(conditional.profile)
+@api_view
+def profile(request, username):
+    author = get_object_or_404(User, username=username)
+    return _feed(request, CursorPaginator(
+        author.posts.for_feed(), _limit(request)
+    ))
+
+
+@conditional.conditional_page(conditional.follow_index)
+@api_view
+def follow_index(request):
+    if not request.user.is_authenticated:
+        raise ApiError('Нужна авторизация', status=401)
+    return _feed(request, TimelinePaginator(request.user, _limit(request)))
+
+
+def _comments(request, post_id, **extra):
+    paginator = comment_paginator(post_id)
+    paginator.per_page = _limit(request, COMMENTS_PER_PAGE)
+    fields = _fields(request.GET.get('fields'), COMMENT_FIELDS)
+    return _response(_page(request, paginator), fields, **extra)
+
+
+@conditional.conditional_page(conditional.post_detail)
+@api_view
+def post_detail(request, post_id):
+    """Пост и первая страница его комментариев; fields выбирает поля
+    комментариев, post_fields - поля поста."""
+    post = get_object_or_404(
+        Post.objects.select_related(
+            'author', 'group'
+        ).prefetch_related('thumbnails'),
+        id=post_id
+    )
+    post_fields = _fields(request.GET.get('post_fields'), POST_FIELDS)
+    return _comments(request, post_id, post=_serialize(post, post_fields))
+
+
+@conditional.conditional_page(conditional.post_detail)
+@api_view
+def post_comments(request, post_id):
+    get_object_or_404(Post.objects.only('id'), id=post_id)
+    return _comments(request, post_id)
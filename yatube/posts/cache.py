@@ -0,0 +1,72 @@
+"""Версионный кеш фрагментов страниц.
+
+Ключ каждого фрагмента включает номер поколения, который увеличивается
+при любом изменении постов, комментариев, групп и подписок. Старые
+фрагменты после этого просто перестают читаться и вытесняются по
+таймауту, поэтому новые записи видны сразу, без явной очистки кеша.
+"""
+import threading
+import time
+from collections import Counter
+
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+
+from core import metrics
+
+from .settings import PAGE_CACHE_TIMEOUT
+
+GENERATION_KEY = 'posts:generation'
+
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def _new_generation(previous=0):
+    # Значение из часов в микросекундах, а не incr: на файловом кеше
+    # incr - это отдельные get и set, и два одновременных сброса дали бы
+    # одно и то же поколение. Часы же не повторяют выданных раньше
+    # номеров и после очистки кеша.
+    return max(previous + 1, time.time_ns() // 1000)
+
+
+def generation():
+    value = cache.get(GENERATION_KEY)
+    if value is None:
+        cache.add(GENERATION_KEY, _new_generation(), None)
+        value = cache.get(GENERATION_KEY)
+    return value
+
+
+def bump_generation():
+    """Сменить поколение; изменения в транзакции сбрасывают кеш через
+    transaction.on_commit, чтобы читатель не закешировал под новым
+    поколением ещё не зафиксированные данные."""
+    cache.set(
+        GENERATION_KEY, _new_generation(cache.get(GENERATION_KEY, 0)), None
+    )
+
+
+def _count(name):
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def stats():
+    """Счётчики попаданий и промахов кеша фрагментов в этом процессе."""
+    with _stats_lock:
+        return {'hits': _stats['hits'], 'misses': _stats['misses']}
+
+
+def fragment(name, vary_on, render):
+    key = make_template_fragment_key(f'{name}:{generation()}', vary_on)
+    value = cache.get(key)
+    if value is not None:
+        _count('hits')
+        metrics.record_cache(hit=True)
+        return value
+    _count('misses')
+    metrics.record_cache(hit=False)
+    value = render()
+    cache.set(key, value, PAGE_CACHE_TIMEOUT)
+    return value
@@ -0,0 +1,101 @@
+"""Денормализованные счётчики постов, комментариев и подписок.
+
+Сигналы меняют счётчики атомарными F()-инкрементами, reconcile()
+пересчитывает их по фактическим данным и чинит расхождения.
+"""
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import AuthorStats, Comment, Follow, Post, User
+
+AUTHOR_COUNTERS = {
+    'posts_count': (Post, 'author'),
+    'followers_count': (Follow, 'author'),
+    'following_count': (Follow, 'user'),
+}
+
+
+def _actual(model, field, outer='pk'):
+    """Подзапрос с фактическим числом строк model для внешнего объекта."""
+    return Coalesce(
+        Subquery(
+            model.objects.filter(
+                **{field: OuterRef(outer)}
+            ).order_by().values(field).annotate(
+                total=Count('pk')
+            ).values('total'),
+            output_field=IntegerField(),
+        ),
+        0,
+    )
+
+
+def increment(user_id, field, delta=1):
+    updated = AuthorStats.objects.filter(user_id=user_id).update(
+        **{field: F(field) + delta}
+    )
+    if not updated and delta > 0:
+        reconcile_author(user_id)
+
+
+def increment_comments(post_id, delta=1):
+    Post.objects.filter(pk=post_id).update(
+        comments_count=F('comments_count') + delta
+    )
+
+
+def reconcile_author(user_id):
+    """Создать или пересчитать счётчики одного пользователя."""
+    if not User.objects.filter(pk=user_id).exists():
+        return
+    AuthorStats.objects.bulk_create(
+        [AuthorStats(user_id=user_id)], ignore_conflicts=True
+    )
+    AuthorStats.objects.filter(user_id=user_id).update(**{
+        name: _actual(model, field, 'user_id')
+        for name, (model, field) in AUTHOR_COUNTERS.items()
+    })
+
+
+def recount(user_ids, names):
+    """Пересчитать счётчики names пользователей по фактическим данным.
+
+    В отличие от increment() результат не зависит от того, сколько раз
+    и в каком порядке выполнились параллельные запросы.
+    """
+    AuthorStats.objects.bulk_create(
+        [AuthorStats(user_id=user_id) for user_id in user_ids],
+        ignore_conflicts=True,
+    )
+    AuthorStats.objects.filter(user_id__in=user_ids).update(**{
+        name: _actual(*AUTHOR_COUNTERS[name], 'user_id') for name in names
+    })
+
+
+def reconcile():
+    """Пересчитать все счётчики; возвращает число исправленных строк
+    по каждому счётчику."""
+    AuthorStats.objects.bulk_create(
+        [
+            AuthorStats(user_id=user_id)
+            for user_id in User.objects.filter(
+                stats__isnull=True
+            ).values_list('pk', flat=True)
+        ],
+        ignore_conflicts=True,
+    )
+    repaired = {}
+    for name, (model, field) in AUTHOR_COUNTERS.items():
+        actual = _actual(model, field, 'user_id')
+        repaired[name] = AuthorStats.objects.annotate(
+            actual=actual
+        ).exclude(**{name: F('actual')}).count()
+        if repaired[name]:
+            AuthorStats.objects.update(**{name: actual})
+    actual = _actual(Comment, 'post')
+    repaired['comments_count'] = Post.objects.annotate(
+        actual=actual
+    ).exclude(comments_count=F('actual')).count()
+    if repaired['comments_count']:
+        Post.objects.update(comments_count=actual)
+    return repaired
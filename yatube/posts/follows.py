@@ -0,0 +1,71 @@
+"""Подписки без гонок.
+
+Подписка - INSERT, игнорирующий конфликт по unique_subscriber, отписка -
+удаление по списку авторов одним DELETE. Оба можно повторять сколько
+угодно: двойной клик не падает на IntegrityError и не сбивает счётчики.
+bulk_create и _raw_delete не вызывают сигналов модели Follow, поэтому
+счётчики в конце пересчитываются подзапросом, а лента подписок
+достраивается и чистится идемпотентно - один раз на весь список, а не
+на каждую строку.
+"""
+from django.db import transaction
+
+from . import cache, counters, timeline
+from .models import Follow, User
+
+FOLLOW_COUNTERS = ['followers_count', 'following_count']
+
+
+def find_authors(user, usernames):
+    """id авторов по username; на самого себя подписаться нельзя."""
+    return dict(
+        User.objects.filter(
+            username__in=usernames
+        ).exclude(pk=user.pk).values_list('username', 'pk')
+    )
+
+
+def _changed(user, author_ids):
+    counters.recount([user.pk, *author_ids], FOLLOW_COUNTERS)
+    timeline.sync_fanout(author_ids)
+    transaction.on_commit(cache.bump_generation)
+
+
+@transaction.atomic
+def follow(user, usernames):
+    """Подписать user на авторов; возвращает найденных {username: id}."""
+    authors = find_authors(user, usernames)
+    if not authors:
+        return authors
+    Follow.objects.bulk_create(
+        [Follow(user=user, author_id=author_id)
+         for author_id in authors.values()],
+        ignore_conflicts=True,
+    )
+    _changed(user, authors.values())
+    timeline.backfill_authors(user.pk, authors.values())
+    return authors
+
+
+@transaction.atomic
+def unfollow(user, usernames):
+    """Отписать user от авторов; возвращает найденных {username: id}."""
+    authors = find_authors(user, usernames)
+    if not authors:
+        return authors
+    ids = list(authors.values())
+    # delete() выбрал бы строки и вызвал post_delete на каждую.
+    rows = Follow.objects.filter(user=user, author_id__in=ids)
+    rows._raw_delete(rows.db)
+    _changed(user, ids)
+    timeline.prune_authors(user.pk, ids)
+    return authors
+
+
+def following(user, usernames):
+    """Кто из перечисленных авторов сейчас в подписках user."""
+    return set(
+        Follow.objects.filter(
+            user=user, author__username__in=usernames
+        ).values_list('author__username', flat=True)
+    )
@@ -1,12 +1,44 @@
 from django import forms
+from django.core.files.uploadedfile import UploadedFile
+from django.template.defaultfilters import filesizeformat
 
 from .models import Post, Comment
+from .settings import IMAGE_MAX_DIMENSION, IMAGE_MAX_UPLOAD_SIZE
+
+
+class UploadImageField(forms.ImageField):
+    def to_python(self, data):
+        # Содержимое слишком большой загрузки не сохранено
+        # (posts.uploads.LimitedUploadHandler), открывать его Pillow
+        # незачем: ошибку покажет clean_image.
+        if isinstance(data, UploadedFile) and (
+            data.size > IMAGE_MAX_UPLOAD_SIZE
+        ):
+            return data
+        return super().to_python(data)
 
 
 class PostForm(forms.ModelForm):
     class Meta:
         model = Post
         fields = ('text', 'group', 'image',)
+        field_classes = {'image': UploadImageField}
+
+    def clean_image(self):
+        image = self.cleaned_data.get('image')
+        if not isinstance(image, UploadedFile):
+            return image
+        if image.size > IMAGE_MAX_UPLOAD_SIZE:
+            raise forms.ValidationError(
+                'Файл больше {}'.format(filesizeformat(IMAGE_MAX_UPLOAD_SIZE))
+            )
+        # Новая загрузка уже открыта Pillow при проверке поля: размеры
+        # известны из заголовка, сам растр не декодировался.
+        if max(image.image.size) > IMAGE_MAX_DIMENSION:
+            raise forms.ValidationError(
+                f'Сторона картинки больше {IMAGE_MAX_DIMENSION} пикселей'
+            )
+        return image
 
 
 class CommentForm(forms.ModelForm):
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from posts import transfer
+from posts.settings import TRANSFER_BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = ('Выгружает пользователей, группы, посты, комментарии и '
+            'подписки в каталог файлами NDJSON или CSV')
+
+    def add_arguments(self, parser):
+        parser.add_argument('directory', help='Каталог выгрузки')
+        parser.add_argument(
+            '--format', choices=sorted(transfer.FORMATS), default='ndjson',
+            help='Формат файлов',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=TRANSFER_BATCH_SIZE,
+            help='Сколько строк читать из базы за раз',
+        )
+        parser.add_argument(
+            '--with-media', action='store_true',
+            help='Скопировать картинки постов в папку media выгрузки',
+        )
+
+    def handle(self, *args, **options):
+        transfer.export_data(
+            options['directory'],
+            options['format'],
+            options['batch_size'],
+            options['with_media'],
+            self.stdout,
+        )
+        self.stdout.write(self.style.SUCCESS('Выгрузка завершена'))
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from posts import transfer
+from posts.settings import TRANSFER_BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = ('Загружает выгрузку export_yatube: пользователи и группы '
+            'сопоставляются по username и slug, посты получают новые id')
+
+    def add_arguments(self, parser):
+        parser.add_argument('directory', help='Каталог выгрузки')
+        parser.add_argument(
+            '--format', choices=sorted(transfer.FORMATS), default='ndjson',
+            help='Формат файлов',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=TRANSFER_BATCH_SIZE,
+            help='Сколько строк записывать одним bulk_create',
+        )
+        parser.add_argument(
+            '--skip-rebuild', action='store_true',
+            help='Не пересобирать счётчики, ленты и поисковый индекс',
+        )
+
+    def handle(self, *args, **options):
+        transfer.import_data(
+            options['directory'],
+            options['format'],
+            options['batch_size'],
+            not options['skip_rebuild'],
+            self.stdout,
+        )
+        self.stdout.write(self.style.SUCCESS('Загрузка завершена'))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts import timeline
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает материализованные ленты подписок с нуля'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            total = timeline.rebuild()
+        self.stdout.write(
+            self.style.SUCCESS(f'Записей в лентах: {total}')
+        )
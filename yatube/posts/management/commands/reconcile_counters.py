@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts import counters, timeline
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает счётчики постов, комментариев и подписок'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            repaired = counters.reconcile()
+            # Исправленное число подписчиков могло пересечь порог раскладки.
+            timeline.sync_fanout()
+        for name, total in repaired.items():
+            self.stdout.write(f'{name}: исправлено строк {total}')
+        self.stdout.write(self.style.SUCCESS('Счётчики согласованы'))
@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts import thumbnails
+
+
+class Command(BaseCommand):
+    help = 'Генерирует миниатюры картинок постов из очереди задач'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=4,
+            help='Число потоков обработки',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=100,
+            help='Сколько задач забирать из очереди за раз',
+        )
+        parser.add_argument(
+            '--poll-interval', type=float, default=2.0,
+            help='Пауза в секундах, когда очередь пуста',
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Обработать текущую очередь и завершиться',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            processed = thumbnails.run_pending(
+                workers=options['workers'],
+                limit=options['batch_size'],
+            )
+            if processed:
+                self.stdout.write(f'Обработано задач: {processed}')
+                continue
+            if options['once']:
+                return
+            time.sleep(options['poll_interval'])
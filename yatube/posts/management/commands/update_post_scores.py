@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from posts import popular
+from posts.settings import POPULAR_BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает изменившиеся рейтинги вкладки "Популярное"; '
+            'запускается периодически, например из cron')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=POPULAR_BATCH_SIZE,
+            help='Сколько постов пересчитывать за одну транзакцию',
+        )
+
+    def handle(self, *args, **options):
+        result = popular.update_scores(options['batch_size'])
+        self.stdout.write(
+            'Рейтингов создано: {created}, обновлено: {updated}, '
+            'удалено: {removed}'.format(**result)
+        )
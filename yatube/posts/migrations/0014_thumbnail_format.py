@@ -0,0 +1,18 @@
+# Generated by Django 2.2.19 on 2026-10-18 18:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0013_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='thumbnail',
+            name='format',
+            field=models.CharField(default='JPEG', max_length=10, verbose_name='Формат'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 2.2.19 on 2026-10-18 18:44
+
+from django.db import migrations, models
+
+# FANOUT_FOLLOWERS_LIMIT на момент миграции: до неё посты таких авторов
+# уже не раскладывались по лентам.
+FANOUT_FOLLOWERS_LIMIT = 1000
+
+
+def mark_read_time_authors(apps, schema_editor):
+    AuthorStats = apps.get_model('posts', 'AuthorStats')
+    AuthorStats.objects.filter(
+        followers_count__gte=FANOUT_FOLLOWERS_LIMIT
+    ).update(fanned_out=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0015_image_staging'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='authorstats',
+            name='fanned_out',
+            field=models.BooleanField(default=True, verbose_name='Посты раскладываются по лентам'),
+        ),
+        migrations.RunPython(
+            mark_read_time_authors, migrations.RunPython.noop),
+    ]
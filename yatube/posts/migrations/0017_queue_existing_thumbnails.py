@@ -0,0 +1,37 @@
+from itertools import islice
+
+from django.db import migrations
+
+BATCH_SIZE = 1000
+
+
+def queue_existing_images(apps, schema_editor):
+    """Поставить в очередь миниатюр картинки постов, загруженные до
+    появления очереди: без задачи у них навсегда оставалась заглушка."""
+    Post = apps.get_model('posts', 'Post')
+    ThumbnailTask = apps.get_model('posts', 'ThumbnailTask')
+    post_ids = Post.objects.exclude(image='').exclude(
+        image__isnull=True
+    ).filter(
+        thumbnail_task__isnull=True
+    ).values_list('pk', flat=True).iterator()
+    while True:
+        batch = list(islice(post_ids, BATCH_SIZE))
+        if not batch:
+            return
+        ThumbnailTask.objects.bulk_create(
+            [ThumbnailTask(post_id=post_id) for post_id in batch],
+            ignore_conflicts=True,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0016_author_fanout_flag'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            queue_existing_images, migrations.RunPython.noop),
+    ]
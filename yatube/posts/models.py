@@ -20,6 +20,15 @@ class Group(models.Model):
         return self.title
 
 
+class PostQuerySet(models.QuerySet):
+    def for_feed(self):
+        """Всё, что выводит posts/includes/post_item.html, без запросов
+        на каждый пост."""
+        return self.select_related(
+            'author', 'group'
+        ).prefetch_related('thumbnails')
+
+
 class Post(models.Model):
     text = models.TextField(
         verbose_name='Содержание записи',
@@ -47,19 +56,45 @@ class Post(models.Model):
     )
     image = models.ImageField(
         verbose_name='Картинка',
-        upload_to='posts/',
+        # Сюда попадает загрузка как есть; воркер миниатюр перекладывает
+        # её в posts/ под именем по содержимому (posts.uploads).
+        upload_to='uploads/',
         blank=True,
         null=True,
     )
+    comments_count = models.PositiveIntegerField(
+        verbose_name='Число комментариев',
+        default=0,
+        editable=False,
+    )
+
+    objects = PostQuerySet.as_manager()
 
     class Meta:
         ordering = ('-pub_date',)
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
+        # Ленты группы и автора читаются одним диапазоном индекса сразу в
+        # порядке курсорной пагинации, без сортировки.
+        indexes = [
+            models.Index(fields=['group', '-pub_date', '-id'],
+                         name='post_group_pub_date_idx'),
+            models.Index(fields=['author', '-pub_date', '-id'],
+                         name='post_author_pub_date_idx'),
+        ]
 
     def __str__(self):
         return f'{self.author.username}, {self.group} - {self.text[:15]}'
 
+    def sized_thumbnails(self):
+        """Миниатюры от широкой к узкой. Сортируются в Python, чтобы
+        prefetch_related для страницы ленты обходился без ORDER BY."""
+        return sorted(
+            self.thumbnails.all(),
+            key=lambda thumbnail: thumbnail.width,
+            reverse=True,
+        )
+
 
 class Comment(models.Model):
     post = models.ForeignKey(
@@ -86,6 +121,10 @@ class Comment(models.Model):
 
     class Meta:
         ordering = ['created']
+        indexes = [
+            models.Index(fields=['post', 'created', 'id'],
+                         name='comment_post_created_idx'),
+        ]
 
 
 class Follow(models.Model):
@@ -107,3 +146,185 @@ class Follow(models.Model):
             models.UniqueConstraint(fields=['user', 'author'],
                                     name='unique_subscriber')
         ]
+
+
+class AuthorStats(models.Model):
+    """Счётчики пользователя, поддерживаемые сигналами вместо COUNT(*)."""
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Пользователь',
+    )
+    posts_count = models.PositiveIntegerField(
+        verbose_name='Число постов',
+        default=0,
+    )
+    followers_count = models.PositiveIntegerField(
+        verbose_name='Число подписчиков',
+        default=0,
+    )
+    following_count = models.PositiveIntegerField(
+        verbose_name='Число подписок',
+        default=0,
+    )
+    # Посты автора лежат в TimelineEntry подписчиков. Меняется вместе
+    # с раскладкой в timeline.sync_fanout, когда число подписчиков
+    # пересекает FANOUT_FOLLOWERS_LIMIT.
+    fanned_out = models.BooleanField(
+        verbose_name='Посты раскладываются по лентам',
+        default=True,
+    )
+
+    class Meta:
+        verbose_name = 'Счётчики пользователя'
+        verbose_name_plural = 'Счётчики пользователей'
+
+
+class TimelineEntry(models.Model):
+    """Материализованная лента подписок: строка на каждую пару
+    (подписчик, пост автора, на которого он подписан)."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+        verbose_name='Подписчик',
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+        verbose_name='Пост',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Автор',
+    )
+    pub_date = models.DateTimeField(
+        verbose_name='Дата публикации',
+    )
+
+    class Meta:
+        ordering = ('-pub_date', '-post')
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'post'],
+                                    name='unique_timeline_entry')
+        ]
+        indexes = [
+            models.Index(fields=['user', '-pub_date', '-post'],
+                         name='timeline_user_pub_date_idx'),
+            models.Index(fields=['user', 'author'],
+                         name='timeline_user_author_idx'),
+        ]
+
+
+class ThumbnailTask(models.Model):
+    """Очередь генерации миниатюр для картинки поста."""
+    PENDING = 'pending'
+    PROCESSING = 'processing'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = (
+        (PENDING, 'В очереди'),
+        (PROCESSING, 'Обрабатывается'),
+        (DONE, 'Готово'),
+        (FAILED, 'Ошибка'),
+    )
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='thumbnail_task',
+        verbose_name='Пост',
+    )
+    status = models.CharField(
+        verbose_name='Статус',
+        max_length=16,
+        choices=STATUS_CHOICES,
+        default=PENDING,
+        db_index=True,
+    )
+    attempts = models.PositiveSmallIntegerField(
+        verbose_name='Попыток',
+        default=0,
+    )
+    error = models.TextField(
+        verbose_name='Последняя ошибка',
+        blank=True,
+    )
+    updated = models.DateTimeField(
+        verbose_name='Изменено',
+        auto_now=True,
+    )
+
+    class Meta:
+        verbose_name = 'Задача миниатюр'
+        verbose_name_plural = 'Задачи миниатюр'
+
+
+class Thumbnail(models.Model):
+    """Заранее сгенерированный вариант картинки поста."""
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='thumbnails',
+        verbose_name='Пост',
+    )
+    url = models.CharField(
+        verbose_name='Адрес',
+        max_length=255,
+    )
+    width = models.PositiveIntegerField(
+        verbose_name='Ширина',
+    )
+    height = models.PositiveIntegerField(
+        verbose_name='Высота',
+    )
+    format = models.CharField(
+        verbose_name='Формат',
+        max_length=10,
+        default='JPEG',
+    )
+
+    class Meta:
+        verbose_name = 'Миниатюра'
+        verbose_name_plural = 'Миниатюры'
+
+
+class PostScore(models.Model):
+    """Рейтинг поста для вкладки "Популярное", пересчитывается командой
+    update_post_scores."""
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='score',
+        verbose_name='Пост',
+    )
+    group = models.ForeignKey(
+        Group,
+        blank=True,
+        null=True,
+        on_delete=models.SET_NULL,
+        related_name='+',
+        verbose_name='Группа',
+    )
+    engagement = models.PositiveIntegerField(
+        verbose_name='Вовлечённость',
+        default=0,
+    )
+    score = models.FloatField(
+        verbose_name='Рейтинг',
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-score', '-post'],
+                         name='score_idx'),
+            models.Index(fields=['group', '-score', '-post'],
+                         name='score_group_idx'),
+        ]
+        verbose_name = 'Рейтинг поста'
+        verbose_name_plural = 'Рейтинги постов'
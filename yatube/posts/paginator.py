@@ -0,0 +1,225 @@
+import base64
+import binascii
+import json
+from collections.abc import Sequence
+
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db.models import Max, Q
+from django.utils.functional import cached_property
+
+from .settings import ADMIN_COUNT_LIMIT, ITEMS_PER_PAGE
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class CursorPage(Sequence):
+    """Страница ленты, не знающая ни общего числа записей, ни своего номера.
+
+    Соседние страницы адресуются непрозрачными курсорами next_cursor и
+    previous_cursor.
+    """
+
+    def __init__(self, object_list, paginator, next_cursor=None,
+                 previous_cursor=None, token=None):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self.token = token
+
+    def __repr__(self):
+        return f'<CursorPage {self.token or "first"}>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class CursorPaginator:
+    """Keyset-пагинация по паре полей (ключ сортировки, id).
+
+    Вместо COUNT(*) и OFFSET каждая страница выбирается условием
+    "строго после (или до) последней показанной записи", поэтому время
+    выборки не зависит от глубины страницы.
+    """
+
+    def __init__(self, object_list, per_page=ITEMS_PER_PAGE,
+                 ordering=('-pub_date', '-id')):
+        self.object_list = object_list
+        self.per_page = per_page
+        self.ordering = ordering
+        self.fields = [name.lstrip('-') for name in ordering]
+        self.descending = ordering[0].startswith('-')
+
+    def encode_cursor(self, item, backwards=False):
+        values = [
+            self.object_list.model._meta.get_field(name).value_to_string(item)
+            for name in self.fields
+        ]
+        raw = json.dumps([int(backwards)] + values).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+    def decode_cursor(self, token):
+        try:
+            raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+            backwards, *values = json.loads(raw.decode())
+            if len(values) != len(self.fields):
+                raise InvalidCursor(token)
+            position = [
+                self.object_list.model._meta.get_field(name).to_python(value)
+                for name, value in zip(self.fields, values)
+            ]
+        except (binascii.Error, UnicodeDecodeError, TypeError, ValueError,
+                ValidationError) as error:
+            raise InvalidCursor(token) from error
+        return position, bool(backwards)
+
+    def seek(self, position, backwards):
+        """Условие "записи строго за position в порядке выдачи".
+
+        Записывается как `a <= x AND NOT (a = x AND b >= y)`, а не через OR,
+        чтобы СУБД могла пройти по составному индексу диапазоном.
+        """
+        (first, second), (first_value, second_value) = self.fields, position
+        if self.descending != backwards:
+            return (
+                Q(**{f'{first}__lte': first_value})
+                & ~Q(**{first: first_value, f'{second}__gte': second_value})
+            )
+        return (
+            Q(**{f'{first}__gte': first_value})
+            & ~Q(**{first: first_value, f'{second}__lte': second_value})
+        )
+
+    def rows(self, position=None, backwards=False, limit=None, offset=0):
+        queryset = self.object_list
+        if position is not None:
+            queryset = queryset.filter(self.seek(position, backwards))
+        ordering = self.ordering
+        if backwards:
+            ordering = [
+                name[1:] if name.startswith('-') else f'-{name}'
+                for name in ordering
+            ]
+        return list(queryset.order_by(*ordering)[offset:offset + limit])
+
+    def page(self, cursor=None):
+        if cursor is None:
+            position, backwards = None, False
+        else:
+            position, backwards = self.decode_cursor(cursor)
+        rows = self.rows(position, backwards, self.per_page + 1)
+        if not rows and backwards:
+            # До курсора записей нет - это начало ленты. Пустая выдача
+            # после курсора остаётся пустой последней страницей: клиент,
+            # идущий по next_cursor, не должен вернуться к началу.
+            return self.page()
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if backwards:
+            rows.reverse()
+            next_item = rows[-1] if rows else None
+            previous_item = rows[0] if has_more else None
+        else:
+            next_item = rows[-1] if has_more else None
+            previous_item = rows[0] if rows and position is not None else None
+        return self._page(rows, next_item, previous_item, cursor)
+
+    def page_at(self, number):
+        """Совместимость со старыми ссылками вида ?page=N.
+
+        Единственное место, где остаётся OFFSET; дальше навигация идёт
+        по курсорам.
+        """
+        offset = (number - 1) * self.per_page
+        rows = self.rows(limit=self.per_page + 1, offset=offset)
+        if not rows:
+            return self.page()
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        return self._page(
+            rows,
+            rows[-1] if has_more else None,
+            rows[0] if number > 1 else None,
+            f'page={number}',
+        )
+
+    def get_page(self, cursor=None, number=None):
+        """Как Paginator.get_page: некорректный курсор или номер страницы
+        дают первую страницу, а не ошибку."""
+        if cursor:
+            try:
+                return self.page(cursor)
+            except InvalidCursor:
+                return self.page()
+        if number:
+            try:
+                number = int(number)
+            except (TypeError, ValueError):
+                number = 1
+            if number > 1:
+                return self.page_at(number)
+        return self.page()
+
+    def _page(self, rows, next_item, previous_item, token):
+        return CursorPage(
+            rows,
+            self,
+            next_cursor=(
+                self.encode_cursor(next_item)
+                if next_item is not None else None
+            ),
+            previous_cursor=(
+                self.encode_cursor(previous_item, backwards=True)
+                if previous_item is not None else None
+            ),
+            token=token,
+        )
+
+
+def paginate(request, object_list, per_page=ITEMS_PER_PAGE, **kwargs):
+    return CursorPaginator(object_list, per_page, **kwargs).get_page(
+        cursor=request.GET.get('cursor'),
+        number=request.GET.get('page'),
+    )
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator без COUNT(*) по всей таблице.
+
+    Для списка без фильтров число записей оценивается наибольшим id -
+    это один шаг по первичному ключу, а удалённые записи лишь немного
+    завышают оценку. Отфильтрованный список считается точно, но не
+    дальше limit записей. Если записей больше limit, estimated
+    становится True.
+    """
+    limit = ADMIN_COUNT_LIMIT
+    estimated = False
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            top = queryset.model._default_manager.aggregate(
+                top=Max('pk')
+            )['top'] or 0
+            if top > self.limit:
+                self.estimated = True
+                return top
+        count = queryset.order_by()[:self.limit + 1].count()
+        self.estimated = count > self.limit
+        return count
@@ -0,0 +1,111 @@
+"""Рейтинг постов для вкладки "Популярное".
+
+Рейтинг устроен как "hot" у Reddit: log10 вовлечённости плюс время
+публикации, делённое на POPULAR_DECAY_SECONDS. Свежесть входит в формулу
+слагаемым, поэтому сам по себе со временем рейтинг не меняется: каждые
+POPULAR_DECAY_SECONDS новизны весят как десятикратный рост вовлечённости.
+Пересчитывать нужно только посты, у которых изменились комментарии или
+число подписчиков автора, и update_scores() трогает только их.
+
+Группа поста продублирована в PostScore, чтобы и общая вкладка, и
+вкладка группы читались одним диапазоном составного индекса.
+"""
+import math
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F, Q
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from . import cache
+from .models import Post, PostScore
+from .paginator import CursorPaginator
+from .settings import (ITEMS_PER_PAGE, POPULAR_BATCH_SIZE,
+                       POPULAR_COMMENT_WEIGHT, POPULAR_DECAY_SECONDS,
+                       POPULAR_FOLLOWER_WEIGHT, POPULAR_WINDOW_DAYS)
+
+
+def score(engagement, pub_date):
+    return (
+        math.log10(max(engagement, 1))
+        + pub_date.timestamp() / POPULAR_DECAY_SECONDS
+    )
+
+
+def _stale(cutoff, after=0):
+    """Посты окна с id больше after без рейтинга или с устаревшей
+    вовлечённостью, по возрастанию id."""
+    return Post.objects.filter(pub_date__gte=cutoff, id__gt=after).annotate(
+        current=(
+            F('comments_count') * POPULAR_COMMENT_WEIGHT
+            + Coalesce(F('author__stats__followers_count'), 0)
+            * POPULAR_FOLLOWER_WEIGHT
+        ),
+        stored=F('score__engagement'),
+    ).filter(
+        Q(stored__isnull=True) | ~Q(stored=F('current'))
+    ).order_by('id').values_list('id', 'group_id', 'pub_date', 'current',
+                                 'stored')
+
+
+def update_scores(batch_size=POPULAR_BATCH_SIZE):
+    """Пересчитать изменившиеся рейтинги пачками; возвращает число
+    созданных, обновлённых и удалённых строк."""
+    cutoff = timezone.now() - timedelta(days=POPULAR_WINDOW_DAYS)
+    result = {'created': 0, 'updated': 0}
+    result['removed'], _ = PostScore.objects.filter(
+        post__pub_date__lt=cutoff
+    ).delete()
+    last_id = 0
+    while True:
+        # Каждый проход продолжает с id, на котором остановился
+        # предыдущий, поэтому окно просматривается один раз за весь
+        # пересчёт, а не заново для каждой пачки.
+        with transaction.atomic():
+            rows = list(_stale(cutoff, last_id)[:batch_size])
+            if not rows:
+                break
+            last_id = rows[-1][0]
+            new, changed = [], []
+            for post_id, group_id, pub_date, current, stored in rows:
+                item = PostScore(
+                    post_id=post_id,
+                    group_id=group_id,
+                    engagement=current,
+                    score=score(current, pub_date),
+                )
+                (new if stored is None else changed).append(item)
+            PostScore.objects.bulk_create(new)
+            PostScore.objects.bulk_update(
+                changed, ['group', 'engagement', 'score']
+            )
+        result['created'] += len(new)
+        result['updated'] += len(changed)
+    if any(result.values()):
+        cache.bump_generation()
+    return result
+
+
+def sync_group(post):
+    """Перенос поста в другую группу сразу виден во вкладках групп."""
+    PostScore.objects.filter(post=post).exclude(
+        group_id=post.group_id
+    ).update(group_id=post.group_id)
+
+
+class PopularPaginator(CursorPaginator):
+    """Курсорная пагинация по (score, post_id); страница содержит посты."""
+
+    def __init__(self, group=None, per_page=ITEMS_PER_PAGE):
+        scores = PostScore.objects.select_related(
+            'post__author', 'post__group'
+        ).prefetch_related('post__thumbnails')
+        if group is not None:
+            scores = scores.filter(group=group)
+        super().__init__(scores, per_page, ordering=('-score', '-post_id'))
+
+    def _page(self, rows, next_item, previous_item, token):
+        page = super()._page(rows, next_item, previous_item, token)
+        page.object_list = [item.post for item in rows]
+        return page
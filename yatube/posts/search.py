@@ -0,0 +1,183 @@
+"""Полнотекстовый поиск по постам и комментариям.
+
+Тексты индексируются уже приведёнными к основам (posts.stemmer), поэтому
+поиск не зависит от словоформы. На SQLite индекс хранится в виртуальной
+таблице FTS5 и ранжируется через bm25(); для остальных СУБД есть
+упрощённый бэкенд, а свой можно подключить через SEARCH_BACKEND.
+"""
+from django.db import connection
+from django.db.models import Q
+from django.utils.module_loading import import_string
+
+from .models import Comment, Post
+from .settings import SEARCH_BACKEND, SEARCH_BATCH_SIZE
+from .stemmer import stems
+
+FTS_TABLE = 'posts_search'
+POST = 'post'
+COMMENT = 'comment'
+# Совпадение в тексте поста весит больше совпадения в комментарии.
+POST_WEIGHT = 2.0
+
+
+class BaseSearchBackend:
+    def index_post(self, post):
+        raise NotImplementedError
+
+    def index_comment(self, comment):
+        raise NotImplementedError
+
+    def remove_post(self, post_id):
+        raise NotImplementedError
+
+    def remove_comment(self, comment_id):
+        raise NotImplementedError
+
+    def search(self, query, limit, offset=0):
+        """id постов в порядке убывания релевантности."""
+        raise NotImplementedError
+
+    def rebuild(self):
+        pass
+
+
+class SqliteFTS5Backend(BaseSearchBackend):
+    """Индекс в FTS5. rowid документа вычисляется из id поста или
+    комментария, чтобы обновление и удаление шли по первичному ключу."""
+
+    @staticmethod
+    def rowid(kind, object_id):
+        return object_id * 2 + (kind == COMMENT)
+
+    def _replace(self, rows):
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'INSERT OR REPLACE INTO {FTS_TABLE} '
+                f'(rowid, body, post_id, kind) VALUES (%s, %s, %s, %s)',
+                [
+                    (self.rowid(kind, object_id), ' '.join(stems(text)),
+                     post_id, kind)
+                    for kind, object_id, post_id, text in rows
+                ],
+            )
+
+    def _delete(self, kind, object_id):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid = %s',
+                [self.rowid(kind, object_id)],
+            )
+
+    def index_post(self, post):
+        self._replace([(POST, post.id, post.id, post.text)])
+
+    def index_comment(self, comment):
+        self._replace(
+            [(COMMENT, comment.id, comment.post_id, comment.text)]
+        )
+
+    def remove_post(self, post_id):
+        self._delete(POST, post_id)
+
+    def remove_comment(self, comment_id):
+        self._delete(COMMENT, comment_id)
+
+    @staticmethod
+    def match_terms(query):
+        return [
+            '"{}"*'.format(term.replace('"', '""'))
+            for term in dict.fromkeys(stems(query))
+        ]
+
+    def search(self, query, limit, offset=0):
+        terms = self.match_terms(query)
+        if not terms:
+            return []
+        # Пост и каждый его комментарий - отдельные строки индекса, а
+        # искать нужно посты: каждое слово запроса должно найтись в
+        # тексте поста или любого его комментария. Поэтому строки
+        # выбираются по любому из слов, а пост остаётся, только если
+        # все слова есть среди его строк.
+        required = ' '.join(
+            f'AND post_id IN (SELECT post_id FROM {FTS_TABLE} '
+            f'WHERE {FTS_TABLE} MATCH %s)'
+            for _ in terms
+        )
+        with connection.cursor() as cursor:
+            # Скрытый столбец rank FTS5 - это bm25(); чем меньше, тем
+            # документ релевантнее.
+            cursor.execute(
+                f'SELECT post_id, SUM(rank * CASE kind '
+                f"WHEN '{POST}' THEN {POST_WEIGHT} ELSE 1 END) AS score "
+                f'FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s {required} '
+                f'GROUP BY post_id ORDER BY score, post_id DESC '
+                f'LIMIT %s OFFSET %s',
+                [' OR '.join(terms), *terms, limit, offset],
+            )
+            return [post_id for post_id, _ in cursor.fetchall()]
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+        sources = [
+            Post.objects.values_list('id', 'id', 'text'),
+            Comment.objects.values_list('id', 'post_id', 'text'),
+        ]
+        for kind, rows in zip((POST, COMMENT), sources):
+            batch = []
+            for row in rows.iterator(chunk_size=SEARCH_BATCH_SIZE):
+                batch.append((kind, *row))
+                if len(batch) >= SEARCH_BATCH_SIZE:
+                    self._replace(batch)
+                    batch = []
+            self._replace(batch)
+
+
+class SimpleSearchBackend(BaseSearchBackend):
+    """Поиск без отдельного индекса для СУБД без FTS5: все основы
+    запроса должны встречаться в тексте поста или его комментариев."""
+
+    def index_post(self, post):
+        pass
+
+    def index_comment(self, comment):
+        pass
+
+    def remove_post(self, post_id):
+        pass
+
+    def remove_comment(self, comment_id):
+        pass
+
+    def search(self, query, limit, offset=0):
+        terms = stems(query)
+        if not terms:
+            return []
+        posts = Post.objects.all()
+        for term in terms:
+            posts = posts.filter(
+                Q(text__icontains=term)
+                | Q(pk__in=Comment.objects.filter(
+                    text__icontains=term
+                ).values('post_id'))
+            )
+        return list(
+            posts.order_by('-pub_date', '-id').values_list(
+                'pk', flat=True
+            )[offset:offset + limit]
+        )
+
+
+def get_backend():
+    if SEARCH_BACKEND:
+        return import_string(SEARCH_BACKEND)()
+    if connection.vendor == 'sqlite':
+        return SqliteFTS5Backend()
+    return SimpleSearchBackend()
+
+
+def search_posts(query, limit, offset=0):
+    """Найденные посты в порядке релевантности."""
+    ids = get_backend().search(query, limit, offset)
+    posts = Post.objects.for_feed().in_bulk(ids)
+    return [posts[post_id] for post_id in ids if post_id in posts]
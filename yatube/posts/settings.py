@@ -1 +1,61 @@
-ITEMS_PER_PAGE = 10
\ No newline at end of file
+ITEMS_PER_PAGE = 10
+# Наибольший размер страницы JSON API (параметр limit).
+API_MAX_PAGE_SIZE = 100
+# Комментарии под постом подгружаются порциями по столько штук.
+COMMENTS_PER_PAGE = 50
+
+# Сколько авторов можно подписать или отписать одним запросом.
+FOLLOW_BULK_LIMIT = 500
+
+# Авторы с таким числом подписчиков не раскладываются по лентам
+# при публикации: их посты подмешиваются в ленту при чтении.
+FANOUT_FOLLOWERS_LIMIT = 1000
+FANOUT_BATCH_SIZE = 1000
+
+# Фрагменты страниц инвалидируются сменой поколения, таймаут лишь
+# ограничивает время жизни устаревших записей в хранилище.
+PAGE_CACHE_TIMEOUT = 60 * 15
+
+# Загружаемые картинки: предел размера файла и длины стороны исходника.
+IMAGE_MAX_UPLOAD_SIZE = 10 * 1024 * 1024
+IMAGE_MAX_DIMENSION = 10000
+# Воркер уменьшает исходник до этой стороны и пережимает без EXIF.
+IMAGE_MAX_SIDE = 1920
+IMAGE_QUALITY = 85
+
+# Миниатюры картинки поста: основная и уменьшенные для srcset.
+THUMBNAIL_GEOMETRIES = ('960x339', '640x226', '320x113')
+# Форматы вариантов в порядке предпочтения браузером; последний -
+# запасной для <img>. Форматы, которые не умеют сохранять Pillow или
+# sorl-thumbnail, пропускаются.
+THUMBNAIL_FORMATS = ('AVIF', 'WEBP', 'JPEG')
+# Атрибут sizes: ширина картинки в карточке при разной ширине экрана.
+THUMBNAIL_SIZES = '(min-width: 992px) 960px, 100vw'
+THUMBNAIL_MAX_ATTEMPTS = 3
+# Задача, зависшая в обработке дольше этого времени, забирается заново.
+THUMBNAIL_TASK_TIMEOUT = 60 * 10
+
+# Путь к классу бэкенда поиска; None - FTS5 на SQLite, иначе
+# posts.search.SimpleSearchBackend.
+SEARCH_BACKEND = None
+SEARCH_BATCH_SIZE = 1000
+# Сколько самых релевантных постов показывает поиск в админке.
+SEARCH_ADMIN_LIMIT = 1000
+
+# Размер пачки bulk_create и чтения из базы в export_yatube/import_yatube.
+TRANSFER_BATCH_SIZE = 10000
+
+# Вкладка "Популярное": вовлечённость поста - взвешенная сумма
+# комментариев и подписчиков автора, рейтинг - её log10 плюс время
+# публикации в единицах POPULAR_DECAY_SECONDS. Посты старше окна
+# в рейтинг не попадают.
+POPULAR_COMMENT_WEIGHT = 10
+POPULAR_FOLLOWER_WEIGHT = 1
+POPULAR_DECAY_SECONDS = 45000
+POPULAR_WINDOW_DAYS = 30
+POPULAR_BATCH_SIZE = 1000
+
+# Списки админки: до этого числа записей счётчик точный, дальше - оценка
+# по наибольшему id (или "больше N" для отфильтрованных списков), а
+# страницы листаются курсором вместо OFFSET.
+ADMIN_COUNT_LIMIT = 10000
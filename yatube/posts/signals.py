@@ -0,0 +1,131 @@
+from django.db import transaction
+from django.db.models import DEFERRED
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from . import cache, counters, popular, search, thumbnails, timeline
+from .models import AuthorStats, Comment, Follow, Group, Post, User
+
+
+@receiver(post_save, sender=User)
+def create_author_stats(sender, instance, created, **kwargs):
+    if created:
+        AuthorStats.objects.get_or_create(user=instance)
+
+
+@receiver(post_save, sender=Post)
+def count_new_post(sender, instance, created, **kwargs):
+    if created:
+        counters.increment(instance.author_id, 'posts_count')
+
+
+@receiver(post_delete, sender=Post)
+def count_deleted_post(sender, instance, **kwargs):
+    counters.increment(instance.author_id, 'posts_count', -1)
+
+
+@receiver(post_save, sender=Comment)
+def count_new_comment(sender, instance, created, **kwargs):
+    if created:
+        counters.increment_comments(instance.post_id)
+
+
+@receiver(post_delete, sender=Comment)
+def count_deleted_comment(sender, instance, **kwargs):
+    counters.increment_comments(instance.post_id, -1)
+
+
+@receiver(post_save, sender=Follow)
+def count_new_follow(sender, instance, created, **kwargs):
+    if created:
+        counters.increment(instance.author_id, 'followers_count')
+        counters.increment(instance.user_id, 'following_count')
+        timeline.sync_fanout([instance.author_id])
+
+
+@receiver(post_delete, sender=Follow)
+def count_deleted_follow(sender, instance, **kwargs):
+    counters.increment(instance.author_id, 'followers_count', -1)
+    counters.increment(instance.user_id, 'following_count', -1)
+    timeline.sync_fanout([instance.author_id])
+
+
+@receiver(post_save, sender=Post)
+def fan_out_post(sender, instance, created, **kwargs):
+    if created:
+        timeline.fan_out(instance)
+
+
+@receiver(post_save, sender=Follow)
+def backfill_timeline(sender, instance, created, **kwargs):
+    if created:
+        timeline.backfill(instance.user, instance.author)
+
+
+@receiver(post_delete, sender=Follow)
+def prune_timeline(sender, instance, **kwargs):
+    timeline.prune(instance.user_id, instance.author_id)
+
+
+@receiver([post_save, post_delete], sender=Post)
+@receiver([post_save, post_delete], sender=Comment)
+@receiver([post_save, post_delete], sender=Group)
+@receiver([post_save, post_delete], sender=Follow)
+def invalidate_page_cache(sender, **kwargs):
+    transaction.on_commit(cache.bump_generation)
+
+
+@receiver(post_save, sender=User)
+def invalidate_page_cache_on_user_change(sender, update_fields=None,
+                                         **kwargs):
+    # Обновление last_login при каждом входе не меняет страницы.
+    if update_fields != frozenset(['last_login']):
+        transaction.on_commit(cache.bump_generation)
+
+
+@receiver(post_save, sender=Post)
+def move_post_score(sender, instance, created, **kwargs):
+    if not created:
+        popular.sync_group(instance)
+
+
+def _image_name(post):
+    # Значение берётся из __dict__: обращение к отложенному полю
+    # стоило бы запроса.
+    image = post.__dict__.get('image', DEFERRED)
+    return getattr(image, 'name', image) or ''
+
+
+@receiver(post_init, sender=Post)
+def remember_image(sender, instance, **kwargs):
+    instance._saved_image = _image_name(instance)
+
+
+@receiver(post_save, sender=Post)
+def queue_thumbnails(sender, instance, created, **kwargs):
+    image = _image_name(instance)
+    saved = '' if created else instance._saved_image
+    if image is DEFERRED or image == saved:
+        return
+    instance._saved_image = image
+    thumbnails.enqueue(instance)
+
+
+@receiver(post_save, sender=Post)
+def index_post(sender, instance, **kwargs):
+    search.get_backend().index_post(instance)
+
+
+@receiver(post_delete, sender=Post)
+def unindex_post(sender, instance, **kwargs):
+    search.get_backend().remove_post(instance.id)
+
+
+@receiver(post_save, sender=Comment)
+def index_comment(sender, instance, **kwargs):
+    search.get_backend().index_comment(instance)
+
+
+@receiver(post_delete, sender=Comment)
+def unindex_comment(sender, instance, **kwargs):
+    search.get_backend().remove_comment(instance.id)
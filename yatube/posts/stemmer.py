@@ -0,0 +1,84 @@
+"""Стеммер Портера (Snowball) для русского языка.
+
+Используется поисковым индексом: и тексты, и запросы приводятся к
+основам, поэтому запрос "котами" находит пост со словом "коты".
+"""
+import re
+
+VOWELS = 'аеиоуыэюя'
+PERFECTIVE_GERUND = re.compile(
+    r'((ив|ивши|ившись|ыв|ывши|ывшись)|(?<=[ая])(в|вши|вшись))$'
+)
+REFLEXIVE = re.compile(r'(с[яь])$')
+ADJECTIVE = re.compile(
+    r'(ее|ие|ые|ое|ими|ыми|ей|ий|ый|ой|ем|им|ым|ом|его|ого|ему|ому|'
+    r'их|ых|ую|юю|ая|яя|ою|ею)$'
+)
+PARTICIPLE = re.compile(r'((ивш|ывш|ующ)|(?<=[ая])(ем|нн|вш|ющ|щ))$')
+VERB = re.compile(
+    r'((ила|ыла|ена|ейте|уйте|ите|или|ыли|ей|уй|ил|ыл|им|ым|ен|ило|ыло|'
+    r'ено|ят|ует|уют|ит|ыт|ены|ить|ыть|ишь|ую|ю)|'
+    r'(?<=[ая])(ла|на|ете|йте|ли|й|л|ем|н|ло|но|ет|ют|ны|ть|ешь|нно))$'
+)
+NOUN = re.compile(
+    r'(а|ев|ов|ие|ье|е|иями|ями|ами|еи|ии|и|ией|ей|ой|ий|й|иям|ям|ием|'
+    r'ем|ам|ом|о|у|ах|иях|ях|ы|ь|ию|ью|ю|ия|ья|я)$'
+)
+DERIVATIONAL = re.compile(r'(ост|ость)$')
+SUPERLATIVE = re.compile(r'(ейше|ейш)$')
+WORD = re.compile(r'\w+')
+
+
+def _region(word, start=0):
+    """Позиция после первой согласной, идущей за гласной."""
+    for index in range(start + 1, len(word)):
+        if word[index] not in VOWELS and word[index - 1] in VOWELS:
+            return index + 1
+    return len(word)
+
+
+def stem(word):
+    word = word.lower().replace('ё', 'е')
+    match = re.search(f'[{VOWELS}]', word)
+    if not match:
+        return word
+    prefix, rv = word[:match.end()], word[match.end():]
+    r2 = _region(word, _region(word)) - len(prefix)
+
+    without_gerund = PERFECTIVE_GERUND.sub('', rv, 1)
+    if without_gerund != rv:
+        rv = without_gerund
+    else:
+        rv = REFLEXIVE.sub('', rv, 1)
+        without_adjective = ADJECTIVE.sub('', rv, 1)
+        if without_adjective != rv:
+            rv = PARTICIPLE.sub('', without_adjective, 1)
+        else:
+            without_verb = VERB.sub('', rv, 1)
+            if without_verb != rv:
+                rv = without_verb
+            else:
+                rv = NOUN.sub('', rv, 1)
+
+    if rv.endswith('и'):
+        rv = rv[:-1]
+
+    derivational = DERIVATIONAL.search(rv)
+    if derivational and derivational.start() >= r2:
+        rv = rv[:derivational.start()]
+
+    if rv.endswith('нн'):
+        rv = rv[:-1]
+    else:
+        without_superlative = SUPERLATIVE.sub('', rv, 1)
+        if without_superlative != rv:
+            rv = without_superlative
+            if rv.endswith('нн'):
+                rv = rv[:-1]
+        elif rv.endswith('ь'):
+            rv = rv[:-1]
+    return prefix + rv
+
+
+def stems(text):
+    return [stem(word) for word in WORD.findall(text)]
@@ -0,0 +1,39 @@
+from django import template
+
+from posts.cache import fragment
+
+register = template.Library()
+
+
+class PageCacheNode(template.Node):
+    def __init__(self, nodelist, fragment_name, vary_on):
+        self.nodelist = nodelist
+        self.fragment_name = fragment_name
+        self.vary_on = vary_on
+
+    def render(self, context):
+        return fragment(
+            self.fragment_name,
+            [var.resolve(context) for var in self.vary_on],
+            lambda: self.nodelist.render(context),
+        )
+
+
+@register.tag
+def pagecache(parser, token):
+    """
+    Кеширует фрагмент шаблона с учётом поколения данных постов:
+    {% pagecache fragment_name [var1 var2 ...] %} ... {% endpagecache %}
+    """
+    bits = token.split_contents()
+    if len(bits) < 2:
+        raise template.TemplateSyntaxError(
+            f"'{bits[0]}' tag requires at least 1 argument."
+        )
+    nodelist = parser.parse(('endpagecache',))
+    parser.delete_first_token()
+    return PageCacheNode(
+        nodelist,
+        bits[1],
+        [parser.compile_filter(bit) for bit in bits[2:]],
+    )
@@ -0,0 +1,51 @@
+from django import template
+
+from ..settings import THUMBNAIL_FORMATS, THUMBNAIL_SIZES
+
+register = template.Library()
+
+MIME_TYPES = {
+    'AVIF': 'image/avif',
+    'WEBP': 'image/webp',
+    'JPEG': 'image/jpeg',
+    'PNG': 'image/png',
+}
+
+
+def srcset(thumbnails):
+    return ', '.join(
+        f'{thumbnail.url} {thumbnail.width}w' for thumbnail in thumbnails
+    )
+
+
+@register.inclusion_tag('posts/includes/post_image.html')
+def post_image(post, eager=False):
+    """Картинка поста из заранее сгенерированных миниатюр или заглушка,
+    пока миниатюры ещё в очереди.
+
+    Современные форматы уходят в <source> элемента <picture>, последний
+    из THUMBNAIL_FORMATS - в сам <img>. Картинки ниже первого экрана
+    загружаются лениво; eager=True для картинки, которая видна сразу.
+    """
+    by_format = {}
+    for thumbnail in post.sized_thumbnails() if post.image else []:
+        by_format.setdefault(thumbnail.format, []).append(thumbnail)
+    formats = [
+        image_format for image_format in THUMBNAIL_FORMATS
+        if image_format in by_format
+    ]
+    fallback = by_format[formats.pop()] if formats else []
+    return {
+        'post': post,
+        'main': fallback[0] if fallback else None,
+        'srcset': srcset(fallback),
+        'sources': [
+            {
+                'type': MIME_TYPES[image_format],
+                'srcset': srcset(by_format[image_format]),
+            }
+            for image_format in formats
+        ],
+        'sizes': THUMBNAIL_SIZES,
+        'eager': eager,
+    }
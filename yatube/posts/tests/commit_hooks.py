@@ -0,0 +1,13 @@
+from django.db import connection
+
+
+def run_commit_hooks():
+    """Выполнить отложенные transaction.on_commit.
+
+    TestCase не фиксирует транзакцию, поэтому сброс кеша после коммита
+    без этого в тестах не наступает (captureOnCommitCallbacks появился
+    только в Django 3.2).
+    """
+    callbacks, connection.run_on_commit = connection.run_on_commit, []
+    for _, callback in callbacks:
+        callback()
@@ -0,0 +1,41 @@
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryBudgetMixin:
+    """Проверка того, что страница укладывается в заданное число
+    SQL-запросов независимо от количества выводимых объектов."""
+
+    def get_with_queries(self, client, url, data=None):
+        # Бюджет считается по холодному кешу, включая чтение сессии и
+        # пользователя, иначе число запросов зависело бы от порядка тестов.
+        cache.clear()
+        caches[settings.SESSION_CACHE_ALIAS].clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url, data)
+        return response, queries
+
+    def assertQueryBudget(self, client, url, budget, data=None):
+        response, queries = self.get_with_queries(client, url, data)
+        self.assertLessEqual(
+            len(queries),
+            budget,
+            f'{url}: {len(queries)} запросов при бюджете {budget}:\n'
+            + '\n'.join(query['sql'] for query in queries.captured_queries)
+        )
+        return response
+
+    def assertConstantQueries(self, client, url, grow, data=None):
+        """Число запросов не меняется после вызова grow(),
+        добавляющего объекты на страницу."""
+        _, before = self.get_with_queries(client, url, data)
+        grow()
+        _, after = self.get_with_queries(client, url, data)
+        self.assertEqual(
+            len(before),
+            len(after),
+            f'{url}: {len(before)} -> {len(after)} запросов:\n'
+            + '\n'.join(query['sql'] for query in after.captured_queries)
+        )
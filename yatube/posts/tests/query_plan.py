@@ -0,0 +1,54 @@
+import re
+import unittest
+
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+# "SCAN posts_post" - проход по таблице, "SCAN posts_post USING INDEX" -
+# проход по индексу: он допустим только вместе с LIMIT, когда индекс
+# читается сразу в нужном порядке и обрывается на странице.
+SCAN = re.compile(r'^SCAN \S+( USING (COVERING )?INDEX)?')
+TEMP_SORT = re.compile(r'USE TEMP B-TREE')
+LIMIT = re.compile(r'\bLIMIT \d+')
+
+
+class QueryPlanMixin:
+    """Проверка планов запросов страницы через EXPLAIN QUERY PLAN.
+
+    Каждый SELECT, выполненный при открытии страницы, повторяется с
+    EXPLAIN QUERY PLAN; полный проход таблицы или индекса и сортировка во
+    временном B-дереве валят тест.
+    """
+
+    def explain(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            return [row[-1] for row in cursor.fetchall()]
+
+    def plan_problems(self, sql):
+        problems = []
+        for step in self.explain(sql):
+            scan = SCAN.match(step)
+            if scan and not (scan.group(1) and LIMIT.search(sql)):
+                problems.append(step)
+            elif TEMP_SORT.search(step):
+                problems.append(step)
+        return problems
+
+    def assertEfficientPlans(self, client, url, data=None):
+        if connection.vendor != 'sqlite':
+            raise unittest.SkipTest('EXPLAIN QUERY PLAN есть только в SQLite')
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url, data)
+        report = []
+        for query in queries.captured_queries:
+            if not query['sql'].startswith('SELECT'):
+                continue
+            problems = self.plan_problems(query['sql'])
+            if problems:
+                report.append(f'{query["sql"]}\n  ' + '\n  '.join(problems))
+        self.assertFalse(
+            report, f'{url}: неэффективные планы:\n' + '\n'.join(report))
+        return response
@@ -0,0 +1,81 @@
+from unittest import mock
+
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..admin import CommentAdmin, PostAdmin
+from ..models import Comment, Post, User
+from ..paginator import EstimatedCountPaginator
+from .query_budget import QueryBudgetMixin
+
+POSTS_URL = reverse('admin:posts_post_changelist')
+COMMENTS_URL = reverse('admin:posts_comment_changelist')
+
+
+class AdminChangeListTests(QueryBudgetMixin, TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.admin = User.objects.create_superuser(
+            'test_admin', 'admin@example.com', 'password')
+        cls.author = User.objects.create(username='test_author')
+        cls.admin_client = Client()
+        cls.admin_client.force_login(cls.admin)
+
+    def create_posts(self, count):
+        return [
+            Post.objects.create(text=f'Пост {index}', author=self.author)
+            for index in range(count)
+        ]
+
+    def test_comment_list_queries_do_not_grow(self):
+        """Список комментариев не запрашивает пост и автора построчно
+        и не выводит фильтр со всеми постами"""
+        post, = self.create_posts(1)
+
+        def add_comments():
+            for another in self.create_posts(3):
+                Comment.objects.create(
+                    post=another, author=self.author, text='Комментарий')
+
+        Comment.objects.create(
+            post=post, author=self.author, text='Комментарий')
+        self.assertConstantQueries(
+            self.admin_client, COMMENTS_URL, add_comments)
+        response = self.admin_client.get(COMMENTS_URL)
+        self.assertNotContains(response, f'?post__id__exact={post.pk}')
+        response = self.admin_client.get(COMMENTS_URL, {'post': post.pk})
+        self.assertEqual(response.context['cl'].result_count, 1)
+        response = self.admin_client.get(
+            reverse('admin:posts_follow_changelist'), {'q': 'test'})
+        self.assertEqual(response.status_code, 200)
+
+    @mock.patch.object(EstimatedCountPaginator, 'limit', 3)
+    @mock.patch.object(PostAdmin, 'list_per_page', 2)
+    def test_large_list_uses_cursor_pages(self):
+        """Когда записей больше предела, число оценивается, а страницы
+        листаются курсором"""
+        posts = self.create_posts(5)
+        response = self.admin_client.get(POSTS_URL)
+        changelist = response.context['cl']
+        self.assertTrue(changelist.cursor_mode)
+        self.assertEqual(changelist.result_count, posts[-1].pk)
+        self.assertEqual(list(changelist.result_list), posts[:2:-1])
+        response = self.admin_client.get(POSTS_URL + changelist.next_url)
+        self.assertEqual(
+            list(response.context['cl'].result_list), posts[2:0:-1])
+        response = self.admin_client.get(POSTS_URL, {'o': '1'})
+        self.assertFalse(response.context['cl'].cursor_mode)
+
+    @mock.patch.object(EstimatedCountPaginator, 'limit', 3)
+    def test_filtered_count_is_capped(self):
+        """Отфильтрованный список считается не дальше предела"""
+        self.create_posts(5)
+        paginator = CommentAdmin.paginator(
+            Post.objects.filter(author=self.author), 2)
+        self.assertEqual(paginator.count, 4)
+        self.assertTrue(paginator.estimated)
+        paginator = CommentAdmin.paginator(
+            Post.objects.filter(author=self.admin), 2)
+        self.assertEqual(paginator.count, 0)
+        self.assertFalse(paginator.estimated)
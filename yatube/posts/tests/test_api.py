@@ -0,0 +1,122 @@
+import json
+
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post, User
+
+SLUG = 'test-group'
+AUTHOR_USERNAME = 'test_author'
+READER_USERNAME = 'test_reader'
+INDEX_URL = reverse('posts:api_index')
+GROUP_URL = reverse('posts:api_group_list', args=[SLUG])
+PROFILE_URL = reverse('posts:api_profile', args=[AUTHOR_USERNAME])
+FOLLOW_URL = reverse('posts:api_follow_index')
+
+
+def read(response):
+    return json.loads(b''.join(response.streaming_content))
+
+
+class ApiTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username=AUTHOR_USERNAME)
+        cls.reader = User.objects.create(username=READER_USERNAME)
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug=SLUG,
+            description='Описание',
+        )
+        cls.posts = [
+            Post.objects.create(
+                text=f'Тестовый пост {index}',
+                author=cls.author,
+                group=cls.group,
+            )
+            for index in range(3)
+        ]
+        cls.comment = Comment.objects.create(
+            post=cls.posts[0],
+            author=cls.reader,
+            text='Тестовый комментарий',
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        cls.POST_URL = reverse(
+            'posts:api_post_detail', args=[cls.posts[0].id])
+
+    def setUp(self):
+        self.guest_client = Client()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def test_feeds_stream_posts(self):
+        """Ленты отдаются потоком JSON с постами в порядке публикации"""
+        expected = [post.id for post in reversed(self.posts)]
+        for url, client in [
+            (INDEX_URL, self.guest_client),
+            (GROUP_URL, self.guest_client),
+            (PROFILE_URL, self.guest_client),
+            (FOLLOW_URL, self.reader_client),
+        ]:
+            with self.subTest(url=url):
+                response = client.get(url)
+                self.assertTrue(response.streaming)
+                self.assertEqual(response['Content-Type'], 'application/json')
+                data = read(response)
+                self.assertEqual(
+                    [post['id'] for post in data['results']], expected)
+                self.assertEqual(
+                    data['results'][0]['author'], AUTHOR_USERNAME)
+
+    def test_cursor_pagination(self):
+        """limit и next_cursor позволяют пройти ленту целиком"""
+        data = read(self.guest_client.get(INDEX_URL, {'limit': 2}))
+        self.assertEqual(len(data['results']), 2)
+        rest = read(self.guest_client.get(
+            INDEX_URL, {'limit': 2, 'cursor': data['next_cursor']}))
+        self.assertEqual(
+            [post['id'] for post in rest['results']], [self.posts[0].id])
+        self.assertIsNone(rest['next_cursor'])
+
+    def test_fields_selection(self):
+        """fields оставляет в ответе только запрошенные поля"""
+        data = read(self.guest_client.get(INDEX_URL, {'fields': 'id,text'}))
+        self.assertEqual(set(data['results'][0]), {'id', 'text'})
+
+    def test_bad_requests(self):
+        """Неизвестное поле, курсор или limit дают ошибку 400 в JSON"""
+        for params in ({'fields': 'id,password'}, {'cursor': 'broken'},
+                       {'limit': 1000}):
+            with self.subTest(params=params):
+                response = self.guest_client.get(INDEX_URL, params)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('error', response.json())
+
+    def test_post_detail_with_comments(self):
+        """Страница поста содержит пост и первую страницу комментариев"""
+        data = read(self.guest_client.get(
+            self.POST_URL, {'post_fields': 'id,comments_count'}))
+        self.assertEqual(
+            data['post'], {'id': self.posts[0].id, 'comments_count': 1})
+        self.assertEqual(data['results'][0]['text'], self.comment.text)
+
+    def test_errors(self):
+        """Нет страницы - 404, лента подписок без входа - 401"""
+        for url, status in [
+            (reverse('posts:api_post_detail', args=[0]), 404),
+            (reverse('posts:api_group_list', args=['missing']), 404),
+            (FOLLOW_URL, 401),
+        ]:
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertEqual(response.status_code, status)
+                self.assertIn('error', response.json())
+
+    def test_etag(self):
+        """Неизменная лента отвечает 304"""
+        etag = self.guest_client.get(INDEX_URL)['ETag']
+        response = self.guest_client.get(
+            INDEX_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
@@ -0,0 +1,117 @@
+from django.contrib.auth.models import AnonymousUser
+from django.http import HttpResponseNotFound
+from django.test import Client, RequestFactory, TestCase
+from django.urls import reverse
+from django.utils.http import http_date
+
+from .. import conditional
+from ..models import Comment, Follow, Post, User
+from .commit_hooks import run_commit_hooks
+
+AUTHOR_USERNAME = 'test_author'
+READER_USERNAME = 'test_reader'
+INDEX_URL = reverse('posts:index')
+PROFILE_URL = reverse('posts:profile', args=[AUTHOR_USERNAME])
+FOLLOW_URL = reverse('posts:profile_follow', args=[AUTHOR_USERNAME])
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username=AUTHOR_USERNAME)
+        cls.reader = User.objects.create(username=READER_USERNAME)
+        cls.post = Post.objects.create(
+            text='Тестовый пост',
+            author=cls.author,
+        )
+        cls.POST_URL = reverse('posts:post_detail', args=[cls.post.id])
+
+    def setUp(self):
+        self.guest_client = Client()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def test_unchanged_page_is_not_modified(self):
+        """Повторный запрос с тем же ETag получает 304 без тела"""
+        response = self.guest_client.get(INDEX_URL)
+        self.assertIn('private', response['Cache-Control'])
+        repeated = self.guest_client.get(
+            INDEX_URL, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(repeated.status_code, 304)
+        self.assertEqual(repeated.content, b'')
+
+    def test_compressed_page_keeps_etag_in_304(self):
+        """ETag сжатого ответа подходит для 304 и совпадает с ETag
+        самого 304 и несжатого ответа"""
+        response = self.guest_client.get(
+            INDEX_URL, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        etag = response['ETag']
+        self.assertTrue(etag.startswith('W/"'))
+        repeated = self.guest_client.get(
+            INDEX_URL, HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(repeated.status_code, 304)
+        self.assertEqual(repeated['ETag'], etag)
+        self.assertEqual(self.guest_client.get(INDEX_URL)['ETag'], etag)
+
+    def test_no_last_modified(self):
+        """Last-Modified не отдаётся, If-Modified-Since не даёт 304,
+        а ответы кроме 200 не получают ETag"""
+        response = self.guest_client.get(INDEX_URL)
+        self.assertFalse(response.has_header('Last-Modified'))
+        repeated = self.guest_client.get(
+            INDEX_URL, HTTP_IF_MODIFIED_SINCE=http_date())
+        self.assertEqual(repeated.status_code, 200)
+        request = RequestFactory().get(INDEX_URL)
+        request.user = AnonymousUser()
+        view = conditional.conditional_page(lambda request: [])(
+            lambda request: HttpResponseNotFound())
+        self.assertFalse(view(request).has_header('ETag'))
+
+    def test_changes_invalidate_etag(self):
+        """Новый пост, правка и комментарий меняют ETag страниц"""
+        changes = [
+            (INDEX_URL, lambda: Post.objects.create(
+                text='Ещё пост', author=self.author)),
+            (self.POST_URL, lambda: Comment.objects.create(
+                post=self.post, author=self.reader, text='Комментарий')),
+            (self.POST_URL, lambda: Post.objects.filter(
+                pk=self.post.pk).first().save()),
+        ]
+        for url, change in changes:
+            with self.subTest(url=url):
+                etag = self.guest_client.get(url)['ETag']
+                change()
+                run_commit_hooks()
+                response = self.guest_client.get(
+                    url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+
+    def test_etag_is_personal(self):
+        """ETag одного пользователя не подходит другому и гостю"""
+        etag = self.reader_client.get(PROFILE_URL)['ETag']
+        author_client = Client()
+        author_client.force_login(self.author)
+        for client in (self.guest_client, author_client):
+            with self.subTest(client=client):
+                response = client.get(PROFILE_URL, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+
+    def test_follow_changes_profile_etag(self):
+        """Подписка меняет ETag профиля для подписавшегося"""
+        etag = self.reader_client.get(PROFILE_URL)['ETag']
+        self.reader_client.get(FOLLOW_URL)
+        self.assertTrue(Follow.objects.filter(
+            user=self.reader, author=self.author).exists())
+        response = self.reader_client.get(
+            PROFILE_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_missing_pages_are_not_found(self):
+        """Несуществующие страницы по-прежнему отдают 404"""
+        for url in (reverse('posts:post_detail', args=[0]),
+                    reverse('posts:profile', args=['nobody'])):
+            with self.subTest(url=url):
+                self.assertEqual(
+                    self.guest_client.get(url).status_code, 404)
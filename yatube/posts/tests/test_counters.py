@@ -0,0 +1,72 @@
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from ..models import AuthorStats, Comment, Follow, Post, User
+
+
+class CountersTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='test_author')
+        cls.reader = User.objects.create(username='test_reader')
+
+    def stats(self, user):
+        return AuthorStats.objects.get(user=user)
+
+    def test_post_counter(self):
+        """Счётчик постов автора меняется при создании и удалении поста"""
+        post = Post.objects.create(text='Пост', author=self.author)
+        self.assertEqual(self.stats(self.author).posts_count, 1)
+        post.delete()
+        self.assertEqual(self.stats(self.author).posts_count, 0)
+
+    def test_comment_counter(self):
+        """Счётчик комментариев поста меняется при создании и удалении
+        комментария"""
+        post = Post.objects.create(text='Пост', author=self.author)
+        comment = Comment.objects.create(
+            post=post, author=self.reader, text='Комментарий')
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 1)
+        comment.delete()
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 0)
+
+    def test_follow_counters(self):
+        """Подписка меняет счётчики подписчиков автора и подписок читателя"""
+        follow = Follow.objects.create(user=self.reader, author=self.author)
+        self.assertEqual(self.stats(self.author).followers_count, 1)
+        self.assertEqual(self.stats(self.reader).following_count, 1)
+        follow.delete()
+        self.assertEqual(self.stats(self.author).followers_count, 0)
+        self.assertEqual(self.stats(self.reader).following_count, 0)
+
+    def test_deleting_user_keeps_counters_consistent(self):
+        """Удаление пользователя уменьшает счётчики тех, на кого он
+        был подписан"""
+        reader = User.objects.create(username='test_leaving_reader')
+        Follow.objects.create(user=reader, author=self.author)
+        Post.objects.create(text='Пост', author=reader)
+        reader.delete()
+        self.assertEqual(self.stats(self.author).followers_count, 0)
+        self.assertFalse(AuthorStats.objects.filter(user_id=None).exists())
+
+    def test_reconcile_counters_repairs_drift(self):
+        """Команда reconcile_counters исправляет разошедшиеся счётчики"""
+        post = Post.objects.create(text='Пост', author=self.author)
+        Comment.objects.create(
+            post=post, author=self.reader, text='Комментарий')
+        Follow.objects.create(user=self.reader, author=self.author)
+        AuthorStats.objects.update(
+            posts_count=10, followers_count=10, following_count=10)
+        AuthorStats.objects.filter(user=self.reader).delete()
+        Post.objects.update(comments_count=10)
+        call_command('reconcile_counters', stdout=mock.Mock())
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 1)
+        self.assertEqual(self.stats(self.author).posts_count, 1)
+        self.assertEqual(self.stats(self.author).followers_count, 1)
+        self.assertEqual(self.stats(self.reader).following_count, 1)
@@ -0,0 +1,126 @@
+import json
+
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .. import follows
+from ..models import AuthorStats, Follow, Post, TimelineEntry, User
+from ..settings import FOLLOW_BULK_LIMIT
+
+BULK_URL = reverse('posts:follow_bulk')
+
+
+class FollowServiceTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create(username='test_reader')
+        cls.authors = [
+            User.objects.create(username=f'test_author_{index}')
+            for index in range(3)
+        ]
+        cls.usernames = [author.username for author in cls.authors]
+        cls.post = Post.objects.create(
+            text='Пост автора', author=cls.authors[0])
+
+    def setUp(self):
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def stats(self, user):
+        return AuthorStats.objects.get(user=user)
+
+    def test_repeated_follow_is_idempotent(self):
+        """Повторная подписка не дублирует строку, ленту и счётчики"""
+        url = reverse('posts:profile_follow', args=[self.usernames[0]])
+        for _ in range(2):
+            self.assertRedirects(
+                self.reader_client.get(url),
+                reverse('posts:profile', args=[self.usernames[0]]))
+        self.assertEqual(Follow.objects.count(), 1)
+        self.assertEqual(self.stats(self.authors[0]).followers_count, 1)
+        self.assertEqual(self.stats(self.reader).following_count, 1)
+        self.assertEqual(
+            list(TimelineEntry.objects.values_list('post', flat=True)),
+            [self.post.id])
+
+    def test_repeated_unfollow_is_idempotent(self):
+        """Повторная отписка не ошибка и не уводит счётчики в минус"""
+        follows.follow(self.reader, [self.usernames[0]])
+        url = reverse('posts:profile_unfollow', args=[self.usernames[0]])
+        for _ in range(2):
+            self.assertEqual(self.reader_client.get(url).status_code, 302)
+        self.assertFalse(Follow.objects.exists())
+        self.assertFalse(TimelineEntry.objects.exists())
+        self.assertEqual(self.stats(self.authors[0]).followers_count, 0)
+        self.assertEqual(self.stats(self.reader).following_count, 0)
+
+    def test_follow_unknown_author_not_found(self):
+        """Подписка на несуществующего автора - 404,
+        на самого себя - молча игнорируется"""
+        response = self.reader_client.get(
+            reverse('posts:profile_follow', args=['nobody']))
+        self.assertEqual(response.status_code, 404)
+        self.reader_client.get(
+            reverse('posts:profile_follow', args=[self.reader.username]))
+        self.assertFalse(Follow.objects.exists())
+
+    def test_bulk_follow_and_unfollow(self):
+        """Массовый запрос подписывает и отписывает за раз и
+        возвращает новое состояние"""
+        follows.follow(self.reader, [self.usernames[2]])
+        response = self.reader_client.post(
+            BULK_URL,
+            json.dumps({
+                'follow': self.usernames[:2] + ['nobody'],
+                'unfollow': [self.usernames[2]],
+            }),
+            content_type='application/json',
+        )
+        self.assertEqual(response.json(), {
+            'following': self.usernames[:2],
+            'not_found': ['nobody'],
+        })
+        self.assertEqual(self.stats(self.reader).following_count, 2)
+        form_response = self.reader_client.post(
+            BULK_URL, {'unfollow': self.usernames})
+        self.assertEqual(form_response.json()['following'], [])
+
+    def test_bulk_queries_do_not_grow_with_authors(self):
+        """Подписка и отписка делают одинаковое число запросов
+        для одного автора и для многих"""
+        many = [
+            User.objects.create(username=f'test_many_{index}').username
+            for index in range(51)
+        ]
+        for action in (follows.follow, follows.unfollow):
+            counts = []
+            for authors in (many[:1], many[1:]):
+                with CaptureQueriesContext(connection) as queries:
+                    action(self.reader, authors)
+                counts.append(len(queries))
+            with self.subTest(action=action.__name__):
+                self.assertEqual(counts[0], counts[1])
+        self.assertFalse(Follow.objects.exists())
+        self.assertEqual(
+            self.stats(User.objects.get(username=many[1])).followers_count,
+            0)
+        self.assertEqual(self.stats(self.reader).following_count, 0)
+
+    def test_bulk_rejects_bad_requests(self):
+        """Слишком длинный список и битый JSON отклоняются,
+        GET не принимается"""
+        too_many = [f'user_{index}' for index in range(FOLLOW_BULK_LIMIT + 1)]
+        bodies = (
+            json.dumps({'follow': too_many}), '[', '[1]',
+            json.dumps({'follow': 'test_author_0'}),
+            json.dumps({'unfollow': [1]}),
+        )
+        for body in bodies:
+            with self.subTest(body=body[:10]):
+                response = self.reader_client.post(
+                    BULK_URL, body, content_type='application/json')
+                self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.reader_client.get(BULK_URL).status_code, 405)
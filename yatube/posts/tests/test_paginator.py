@@ -75,3 +75,66 @@ class PaginatorViewsTests(TestCase):
             response.context['page_post_list']),
             TOTAL_NUMBER_OF_POSTS - ITEMS_PER_PAGE - 1
         )
+
+    def test_next_cursor_leads_to_second_index_page(self):
+        """Курсор следующей страницы ведёт на оставшиеся посты,
+        а курсор предыдущей возвращает к первой"""
+        first_page = PaginatorViewsTests.guest_client.get(
+            INDEX_PAGE_1_URL).context['page_post_list']
+        second_page = PaginatorViewsTests.guest_client.get(
+            INDEX_PAGE_1_URL,
+            {'cursor': first_page.next_cursor}
+        ).context['page_post_list']
+        self.assertEqual(
+            len(second_page),
+            TOTAL_NUMBER_OF_POSTS - ITEMS_PER_PAGE
+        )
+        self.assertFalse(second_page.has_next())
+        back_page = PaginatorViewsTests.guest_client.get(
+            INDEX_PAGE_1_URL,
+            {'cursor': second_page.previous_cursor}
+        ).context['page_post_list']
+        self.assertEqual(list(back_page), list(first_page))
+
+    def test_cursor_walk_with_equal_pub_dates(self):
+        """Посты с одинаковой датой публикации не теряются и не
+        повторяются при переходе по курсорам"""
+        Post.objects.update(pub_date=PaginatorViewsTests.post.pub_date)
+        seen = []
+        cursor = None
+        while True:
+            params = {'cursor': cursor} if cursor else {}
+            page = PaginatorViewsTests.guest_client.get(
+                INDEX_PAGE_1_URL, params).context['page_post_list']
+            seen.extend(post.id for post in page)
+            if not page.has_next():
+                break
+            cursor = page.next_cursor
+        self.assertEqual(
+            sorted(seen),
+            sorted(Post.objects.values_list('id', flat=True))
+        )
+        self.assertEqual(len(seen), TOTAL_NUMBER_OF_POSTS)
+
+    def test_cursor_past_the_end_gives_empty_last_page(self):
+        """Курсор, за которым записей не осталось, отдаёт пустую
+        последнюю страницу, а не начало ленты"""
+        first_page = PaginatorViewsTests.guest_client.get(
+            INDEX_PAGE_1_URL).context['page_post_list']
+        Post.objects.filter(
+            id__lt=first_page[len(first_page) - 1].id).delete()
+        page = PaginatorViewsTests.guest_client.get(
+            INDEX_PAGE_1_URL, {'cursor': first_page.next_cursor}
+        ).context['page_post_list']
+        self.assertEqual(list(page), [])
+        self.assertFalse(page.has_next())
+
+    def test_invalid_cursor_returns_first_page(self):
+        """Испорченный курсор отдаёт первую страницу"""
+        response = PaginatorViewsTests.guest_client.get(
+            INDEX_PAGE_1_URL, {'cursor': 'broken'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            len(response.context['page_post_list']),
+            ITEMS_PER_PAGE
+        )
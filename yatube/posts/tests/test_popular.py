@@ -0,0 +1,118 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import popular
+from ..models import Comment, Follow, Group, Post, PostScore, User
+from ..settings import POPULAR_DECAY_SECONDS, POPULAR_WINDOW_DAYS
+from .query_budget import QueryBudgetMixin
+
+POPULAR_URL = reverse('posts:popular')
+
+
+class PopularTests(QueryBudgetMixin, TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='test_author')
+        cls.reader = User.objects.create(username='test_reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-group',
+            description='Описание',
+        )
+        cls.guest_client = Client()
+
+    def create_post(self, text, age=timedelta(0), group=None):
+        post = Post.objects.create(
+            text=text, author=self.author, group=group)
+        Post.objects.filter(pk=post.pk).update(
+            pub_date=timezone.now() - age)
+        return Post.objects.get(pk=post.pk)
+
+    def comment(self, post, count=1):
+        for _ in range(count):
+            Comment.objects.create(
+                post=post, author=self.reader, text='Комментарий')
+
+    def feed(self, url=POPULAR_URL):
+        return list(self.guest_client.get(url).context['page_post_list'])
+
+    def test_engagement_and_freshness_rank_posts(self):
+        """Обсуждаемый пост выше свежего, но десятикратный перевес
+        обсуждений гасится временем POPULAR_DECAY_SECONDS"""
+        quiet = self.create_post('Тихий пост')
+        discussed = self.create_post(
+            'Обсуждаемый пост', timedelta(hours=1))
+        stale = self.create_post(
+            'Старый пост', timedelta(seconds=POPULAR_DECAY_SECONDS * 2))
+        self.comment(discussed)
+        self.comment(stale, 2)
+        popular.update_scores()
+        self.assertEqual(self.feed(), [discussed, quiet, stale])
+
+    def test_update_is_incremental(self):
+        """Пересчитываются только посты с изменившейся вовлечённостью"""
+        posts = [self.create_post(f'Пост {index}') for index in range(3)]
+        self.assertEqual(
+            popular.update_scores(batch_size=2),
+            {'created': 3, 'updated': 0, 'removed': 0})
+        self.assertEqual(
+            popular.update_scores(),
+            {'created': 0, 'updated': 0, 'removed': 0})
+        self.comment(posts[0])
+        self.assertEqual(popular.update_scores()['updated'], 1)
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.assertEqual(popular.update_scores()['updated'], 3)
+
+    def test_batches_continue_after_last_id(self):
+        """Каждая пачка выбирается после последнего обработанного id,
+        а не поиском по всему окну заново"""
+        posts = [self.create_post(f'Пост {index}') for index in range(3)]
+        with mock.patch('posts.popular._stale',
+                        wraps=popular._stale) as stale:
+            popular.update_scores(batch_size=2)
+        self.assertEqual(
+            [call.args[1] for call in stale.call_args_list],
+            [0, posts[1].id, posts[2].id])
+        self.assertEqual(PostScore.objects.count(), 3)
+
+    def test_old_posts_leave_the_window(self):
+        """Посты старше окна удаляются из рейтинга"""
+        post = self.create_post('Пост')
+        popular.update_scores()
+        Post.objects.filter(pk=post.pk).update(
+            pub_date=timezone.now() - timedelta(days=POPULAR_WINDOW_DAYS + 1))
+        output = StringIO()
+        call_command('update_post_scores', stdout=output)
+        self.assertIn('удалено: 1', output.getvalue())
+        self.assertFalse(PostScore.objects.exists())
+
+    def test_group_tab(self):
+        """Вкладка группы показывает только её посты и сразу
+        учитывает перенос поста в другую группу"""
+        in_group = self.create_post('В группе', group=self.group)
+        outside = self.create_post('Без группы')
+        popular.update_scores()
+        url = reverse('posts:group_popular', args=[self.group.slug])
+        self.assertEqual(self.feed(url), [in_group])
+        outside.group = self.group
+        outside.save()
+        self.assertEqual(self.feed(url), [outside, in_group])
+
+    def test_popular_queries_do_not_grow_with_posts(self):
+        """Число запросов вкладки не зависит от числа постов"""
+        self.create_post('Пост')
+        popular.update_scores()
+
+        def add_posts():
+            for index in range(3):
+                self.create_post(f'Ещё пост {index}', group=self.group)
+            popular.update_scores()
+
+        self.assertConstantQueries(self.guest_client, POPULAR_URL, add_posts)
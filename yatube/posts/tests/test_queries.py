@@ -0,0 +1,101 @@
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post, User
+from ..settings import ITEMS_PER_PAGE
+from .query_budget import QueryBudgetMixin
+
+SLUG = 'group-for-test'
+AUTHOR_USERNAME = 'test_author'
+INDEX_URL = reverse('posts:index')
+FOLLOW_URL = reverse('posts:follow_index')
+GROUP_URL = reverse('posts:group_list', args=[SLUG])
+PROFILE_URL = reverse('posts:profile', args=[AUTHOR_USERNAME])
+# Бюджеты на страницу: сессия и пользователь для авторизованного клиента,
+# служебные выборки страницы, один запрос на сами посты и один
+# на их миниатюры.
+FEED_BUDGETS = [
+    [INDEX_URL, 'guest_client', 3],
+    [GROUP_URL, 'guest_client', 4],
+    [PROFILE_URL, 'guest_client', 4],
+    [INDEX_URL, 'reader_client', 5],
+    [FOLLOW_URL, 'reader_client', 5],
+    [PROFILE_URL, 'reader_client', 7],
+]
+
+
+class FeedQueryBudgetTests(QueryBudgetMixin, TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.group = Group.objects.create(
+            title='Тест-группа',
+            slug=SLUG,
+            description='Группа для тестирования'
+        )
+        cls.reader = User.objects.create(username='test_reader')
+        cls.guest_client = Client()
+        cls.reader_client = Client()
+        cls.reader_client.force_login(cls.reader)
+
+    def create_posts(self, count):
+        for index in range(count):
+            author = User.objects.create(
+                username=f'{AUTHOR_USERNAME}_{Post.objects.count()}'
+            )
+            Follow.objects.create(user=self.reader, author=author)
+            post = Post.objects.create(
+                text=f'Тестовый пост {index}',
+                author=author,
+                group=self.group,
+            )
+            Comment.objects.create(
+                post=post,
+                author=self.reader,
+                text='Тестовый комментарий',
+            )
+
+    def setUp(self):
+        self.author = User.objects.create(username=AUTHOR_USERNAME)
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.post = Post.objects.create(
+            text='Тестовый пост автора',
+            author=self.author,
+            group=self.group,
+        )
+
+    def test_feeds_fit_query_budget(self):
+        """Ленты укладываются в бюджет запросов на полной странице"""
+        self.create_posts(ITEMS_PER_PAGE * 2)
+        for url, client_name, budget in FEED_BUDGETS:
+            with self.subTest(url=url, client=client_name):
+                self.assertQueryBudget(
+                    getattr(FeedQueryBudgetTests, client_name), url, budget)
+
+    def test_feed_queries_do_not_grow_with_posts(self):
+        """Число запросов ленты не зависит от числа постов на странице"""
+        for url, client_name, _ in FEED_BUDGETS:
+            with self.subTest(url=url, client=client_name):
+                self.assertConstantQueries(
+                    getattr(FeedQueryBudgetTests, client_name),
+                    url,
+                    lambda: self.create_posts(3),
+                )
+
+    def test_post_detail_queries_do_not_grow_with_comments(self):
+        """Число запросов страницы поста не зависит от числа комментариев"""
+        url = reverse('posts:post_detail', args=[self.post.id])
+
+        def add_comments():
+            for index in range(5):
+                commentator = User.objects.create(
+                    username=f'commentator_{index}'
+                )
+                Comment.objects.create(
+                    post=self.post,
+                    author=commentator,
+                    text='Тестовый комментарий',
+                )
+
+        self.assertConstantQueries(
+            FeedQueryBudgetTests.reader_client, url, add_comments)
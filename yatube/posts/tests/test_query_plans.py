@@ -0,0 +1,86 @@
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from .. import follows, popular
+from ..models import Comment, Group, Post, User
+from ..settings import COMMENTS_PER_PAGE, ITEMS_PER_PAGE
+from .query_plan import QueryPlanMixin
+
+SLUG = 'group-for-test'
+AUTHOR_USERNAME = 'test_author'
+
+
+class QueryPlanTests(QueryPlanMixin, TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.group = Group.objects.create(
+            title='Тест-группа',
+            slug=SLUG,
+            description='Группа для тестирования',
+        )
+        cls.author = User.objects.create(username=AUTHOR_USERNAME)
+        cls.reader = User.objects.create(username='test_reader')
+        Post.objects.bulk_create(
+            Post(text=f'Тестовый пост {index}', author=cls.author,
+                 group=cls.group)
+            for index in range(ITEMS_PER_PAGE * 2 + 1)
+        )
+        cls.post = Post.objects.create(
+            text='Обсуждаемый пост', author=cls.author, group=cls.group)
+        Comment.objects.bulk_create(
+            Comment(post=cls.post, author=cls.reader, text='Комментарий')
+            for _ in range(COMMENTS_PER_PAGE + 1)
+        )
+        follows.follow(cls.reader, [AUTHOR_USERNAME])
+        popular.update_scores()
+        cls.guest_client = Client()
+        cls.reader_client = Client()
+        cls.reader_client.force_login(cls.reader)
+
+    def assertFeedPlans(self, client, url):
+        """Первая страница, следующая по курсору и страница по номеру."""
+        response = self.assertEfficientPlans(client, url)
+        page = response.context['page_post_list']
+        self.assertEfficientPlans(client, url, {'cursor': page.next_cursor})
+        self.assertEfficientPlans(client, url, {'page': 3})
+
+    def test_feeds_use_indexes(self):
+        """Ленты читаются по индексам без сортировки во временном B-дереве"""
+        feeds = [
+            [reverse('posts:index'), self.guest_client],
+            [reverse('posts:group_list', args=[SLUG]), self.guest_client],
+            [reverse('posts:profile', args=[AUTHOR_USERNAME]),
+             self.reader_client],
+            [reverse('posts:follow_index'), self.reader_client],
+            [reverse('posts:popular'), self.guest_client],
+            [reverse('posts:group_popular', args=[SLUG]), self.guest_client],
+        ]
+        for url, client in feeds:
+            with self.subTest(url=url):
+                self.assertFeedPlans(client, url)
+
+    def test_post_pages_use_indexes(self):
+        """Страница поста и подгрузка комментариев читаются по индексам"""
+        detail = self.assertEfficientPlans(
+            self.reader_client,
+            reverse('posts:post_detail', args=[self.post.id]))
+        comments_url = reverse('posts:post_comments', args=[self.post.id])
+        self.assertEfficientPlans(
+            self.guest_client, comments_url,
+            {'cursor': detail.context['comments'].next_cursor})
+
+    def test_api_uses_indexes(self):
+        """JSON API читает те же диапазоны индексов, что и страницы"""
+        urls = [
+            reverse('posts:api_index'),
+            reverse('posts:api_group_list', args=[SLUG]),
+            reverse('posts:api_profile', args=[AUTHOR_USERNAME]),
+            reverse('posts:api_follow_index'),
+            reverse('posts:api_post_detail', args=[self.post.id]),
+            reverse('posts:api_post_comments', args=[self.post.id]),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.assertEfficientPlans(self.reader_client, url)
+                b''.join(response.streaming_content)
@@ -19,6 +19,10 @@ class Tests(TestCase):
                 reverse('posts:follow_index'),
                 '/follow/'
             ],
+            [
+                reverse('posts:follow_bulk'),
+                '/follow/bulk/'
+            ],
             [
                 reverse('posts:group_list', args=[SLUG]),
                 f'/group/{SLUG}/'
@@ -27,6 +31,10 @@ class Tests(TestCase):
                 reverse('posts:post_create'),
                 '/create/'
             ],
+            [
+                reverse('posts:search'),
+                '/search/'
+            ],
             [
                 reverse('posts:profile', args=[USERNAME]),
                 f'/profile/{USERNAME}/'
@@ -47,6 +55,10 @@ class Tests(TestCase):
                 reverse('posts:add_comment', args=[ID]),
                 f'/posts/{ID}/comment/'
             ],
+            [
+                reverse('posts:post_comments', args=[ID]),
+                f'/posts/{ID}/comments/'
+            ],
             [
                 reverse('posts:post_edit', args=[ID]),
                 f'/posts/{ID}/edit/'
@@ -0,0 +1,105 @@
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Post, User
+from ..search import FTS_TABLE, search_posts
+from ..stemmer import stem
+
+SEARCH_URL = reverse('posts:search')
+
+
+class StemmerTests(TestCase):
+    def test_word_forms_share_stem(self):
+        """Словоформы одного слова приводятся к одной основе"""
+        word_forms = [
+            ['кот', 'коты', 'котами'],
+            ['яблоки', 'яблоками', 'яблок'],
+            ['программирование', 'программировании'],
+            ['красивые', 'красивейший'],
+        ]
+        for forms in word_forms:
+            with self.subTest(forms=forms):
+                self.assertEqual(len({stem(word) for word in forms}), 1)
+
+    def test_yo_is_normalized(self):
+        """Буква ё не мешает поиску"""
+        self.assertEqual(stem('Ёлка'), stem('елка'))
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='test_author')
+        cls.guest_client = Client()
+
+    def setUp(self):
+        self.post = Post.objects.create(
+            text='Коты гуляют по крышам',
+            author=self.user,
+        )
+        self.other_post = Post.objects.create(
+            text='Про погоду',
+            author=self.user,
+        )
+
+    def test_search_finds_other_word_forms(self):
+        """Поиск находит пост по другой словоформе"""
+        self.assertEqual(search_posts('котами', 10), [self.post])
+
+    def test_search_covers_comments_and_ranks_posts_higher(self):
+        """Совпадение в комментарии тоже находит пост, но ниже поста,
+        где совпал сам текст"""
+        Comment.objects.create(
+            post=self.other_post,
+            author=self.user,
+            text='А у нас кот спит',
+        )
+        self.assertEqual(
+            search_posts('кот', 10),
+            [self.post, self.other_post]
+        )
+
+    def test_words_split_between_post_and_comments(self):
+        """Слова запроса ищутся во всём посте вместе с комментариями"""
+        Comment.objects.create(
+            post=self.other_post,
+            author=self.user,
+            text='Завтра дождь',
+        )
+        self.assertEqual(search_posts('погода дождь', 10), [self.other_post])
+        self.assertEqual(search_posts('кот дождь', 10), [])
+
+    def test_index_follows_edits_and_deletes(self):
+        """Индекс обновляется при изменении и удалении поста"""
+        self.post.text = 'Собаки лают'
+        self.post.save()
+        self.assertEqual(search_posts('кот', 10), [])
+        self.assertEqual(search_posts('собака', 10), [self.post])
+        self.post.delete()
+        self.assertEqual(search_posts('собака', 10), [])
+
+    def test_rebuild_search_index_command(self):
+        """Команда rebuild_search_index восстанавливает индекс"""
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+        self.assertEqual(search_posts('кот', 10), [])
+        call_command('rebuild_search_index', stdout=mock.Mock())
+        self.assertEqual(search_posts('кот', 10), [self.post])
+
+    def test_search_page(self):
+        """Страница поиска выводит найденные посты"""
+        response = SearchTests.guest_client.get(SEARCH_URL, {'q': 'крыша'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.context['posts']), [self.post])
+        self.assertFalse(response.context['has_next'])
+
+    def test_query_syntax_is_escaped(self):
+        """Служебные символы запроса не ломают поиск"""
+        response = SearchTests.guest_client.get(
+            SEARCH_URL, {'q': '"кот" OR NEAR(* -'})
+        self.assertEqual(response.status_code, 200)
@@ -0,0 +1,164 @@
+import shutil
+import tempfile
+from importlib import import_module
+from unittest import mock
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Post, Thumbnail, ThumbnailTask, User
+from ..settings import THUMBNAIL_GEOMETRIES, THUMBNAIL_SIZES
+from ..thumbnails import available_formats
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+NEW_POST_URL = reverse('posts:post_create')
+PLACEHOLDER = 'img/placeholder.svg'
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ThumbnailPipelineTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='test_author')
+        cls.authorized_client = Client()
+        cls.authorized_client.force_login(cls.user)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def create_post(self, content=SMALL_GIF):
+        ThumbnailPipelineTests.authorized_client.post(
+            NEW_POST_URL,
+            data={
+                'text': 'Пост с картинкой',
+                'image': SimpleUploadedFile(
+                    name='small.gif',
+                    content=content,
+                    content_type='image/gif',
+                ),
+            },
+        )
+        return Post.objects.get()
+
+    def post_page(self, post):
+        cache.clear()
+        return ThumbnailPipelineTests.authorized_client.get(
+            reverse('posts:post_detail', args=[post.id]))
+
+    def test_new_post_image_is_queued_and_shows_placeholder(self):
+        """Картинка нового поста ставится в очередь, а страница до
+        обработки показывает заглушку"""
+        post = self.create_post()
+        self.assertEqual(post.thumbnail_task.status, ThumbnailTask.PENDING)
+        self.assertFalse(Thumbnail.objects.exists())
+        self.assertContains(self.post_page(post), PLACEHOLDER)
+
+    def test_worker_generates_all_variants(self):
+        """Воркер генерирует все размеры в каждом формате, и страница
+        выводит их в srcset элементов <picture>"""
+        post = self.create_post()
+        call_command('thumbnail_worker', once=True, workers=1,
+                     stdout=mock.Mock())
+        post.thumbnail_task.refresh_from_db()
+        self.assertEqual(post.thumbnail_task.status, ThumbnailTask.DONE)
+        thumbnails = post.sized_thumbnails()
+        formats = available_formats()
+        self.assertIn('WEBP', formats)
+        for image_format in formats:
+            with self.subTest(image_format=image_format):
+                self.assertEqual(
+                    [f'{item.width}x{item.height}' for item in thumbnails
+                     if item.format == image_format],
+                    list(THUMBNAIL_GEOMETRIES)
+                )
+        response = self.post_page(post)
+        self.assertNotContains(response, PLACEHOLDER)
+        self.assertContains(response, '<source type="image/webp"')
+        for thumbnail in thumbnails:
+            self.assertContains(
+                response, f'{thumbnail.url} {thumbnail.width}w')
+            if thumbnail.format == 'WEBP':
+                self.assertTrue(thumbnail.url.endswith('.webp'))
+
+    def test_feed_images_are_lazy_with_dimensions(self):
+        """В ленте картинка грузится лениво и с размерами, на странице
+        поста - сразу"""
+        post = self.create_post()
+        call_command('thumbnail_worker', once=True, workers=1,
+                     stdout=mock.Mock())
+        cache.clear()
+        feed = ThumbnailPipelineTests.authorized_client.get(
+            reverse('posts:index'))
+        width, height = THUMBNAIL_GEOMETRIES[0].split('x')
+        self.assertContains(feed, f'width="{width}" height="{height}"')
+        self.assertContains(feed, f'sizes="{THUMBNAIL_SIZES}"')
+        self.assertContains(feed, 'loading="lazy"')
+        self.assertNotContains(self.post_page(post), 'loading="lazy"')
+
+    def test_broken_image_is_retried_then_failed(self):
+        """Необрабатываемая картинка возвращается в очередь, пока не
+        исчерпаны попытки"""
+        post = self.create_post()
+        with mock.patch('posts.thumbnails.get_thumbnail',
+                        side_effect=OSError('broken')):
+            with mock.patch('posts.thumbnails.THUMBNAIL_MAX_ATTEMPTS', 2):
+                call_command('thumbnail_worker', once=True, workers=1,
+                             stdout=mock.Mock())
+        task = ThumbnailTask.objects.get(post=post)
+        self.assertEqual(task.status, ThumbnailTask.FAILED)
+        self.assertEqual(task.attempts, 2)
+        self.assertEqual(task.error, 'broken')
+
+    def test_orm_saved_image_is_queued(self):
+        """Картинка ставится в очередь и при сохранении поста в обход
+        форм; правка текста задачу не пересоздаёт"""
+        post = Post.objects.create(
+            text='Пост из админки', author=self.user, image='posts/a.jpg')
+        self.assertEqual(post.thumbnail_task.status, ThumbnailTask.PENDING)
+        ThumbnailTask.objects.filter(post=post).update(
+            status=ThumbnailTask.DONE)
+        post = Post.objects.get(pk=post.pk)
+        post.text = 'Новый текст'
+        post.save()
+        post.thumbnail_task.refresh_from_db()
+        self.assertEqual(post.thumbnail_task.status, ThumbnailTask.DONE)
+        post.image = 'posts/b.jpg'
+        post.save()
+        post.thumbnail_task.refresh_from_db()
+        self.assertEqual(post.thumbnail_task.status, ThumbnailTask.PENDING)
+        post.image = None
+        post.save()
+        self.assertFalse(ThumbnailTask.objects.exists())
+
+    def test_migration_queues_existing_images(self):
+        """Миграция ставит в очередь картинки постов, у которых ещё
+        нет задачи"""
+        queued = Post.objects.create(
+            text='В очереди', author=self.user, image='posts/a.jpg')
+        Post.objects.bulk_create([
+            Post(text='Старый пост', author=self.user, image='posts/b.jpg'),
+            Post(text='Без картинки', author=self.user),
+        ])
+        migration = import_module(
+            'posts.migrations.0017_queue_existing_thumbnails')
+        migration.queue_existing_images(apps, None)
+        self.assertEqual(
+            sorted(ThumbnailTask.objects.values_list(
+                'post__text', flat=True)),
+            [queued.text, 'Старый пост'])
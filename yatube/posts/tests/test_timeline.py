@@ -0,0 +1,93 @@
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Follow, Post, TimelineEntry, User
+from ..settings import ITEMS_PER_PAGE
+
+FOLLOW_URL = reverse('posts:follow_index')
+
+
+class TimelineTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create(username='test_reader')
+        cls.author = User.objects.create(username='test_author')
+        cls.star = User.objects.create(username='test_star')
+        cls.reader_client = Client()
+        cls.reader_client.force_login(cls.reader)
+
+    def feed(self, data=None):
+        return TimelineTests.reader_client.get(
+            FOLLOW_URL, data).context['page_post_list']
+
+    def test_new_post_is_fanned_out_to_followers(self):
+        """Новый пост автора раскладывается в ленты подписчиков"""
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.create(text='Новый пост', author=self.author)
+        self.assertTrue(
+            TimelineEntry.objects.filter(user=self.reader, post=post).exists()
+        )
+        self.assertEqual(list(self.feed()), [post])
+
+    def test_follow_backfills_and_unfollow_prunes_timeline(self):
+        """Подписка добавляет в ленту старые посты автора,
+        отписка их убирает"""
+        post = Post.objects.create(text='Старый пост', author=self.author)
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.assertEqual(list(self.feed()), [post])
+        Follow.objects.filter(user=self.reader, author=self.author).delete()
+        self.assertFalse(TimelineEntry.objects.exists())
+        self.assertEqual(list(self.feed()), [])
+
+    def test_popular_author_posts_are_merged_on_read(self):
+        """Посты популярного автора не раскладываются по лентам,
+        но попадают в ленту при чтении в правильном порядке"""
+        with mock.patch('posts.timeline.FANOUT_FOLLOWERS_LIMIT', 1):
+            Follow.objects.create(user=self.reader, author=self.author)
+            Follow.objects.create(user=self.reader, author=self.star)
+            posts = [
+                Post.objects.create(
+                    text=f'Пост {index}',
+                    author=self.star if index % 2 else self.author,
+                )
+                for index in range(ITEMS_PER_PAGE + 2)
+            ]
+            self.assertFalse(
+                TimelineEntry.objects.filter(author=self.star).exists()
+            )
+            first_page = self.feed()
+            second_page = self.feed({'cursor': first_page.next_cursor})
+        self.assertEqual(
+            list(first_page) + list(second_page),
+            posts[::-1]
+        )
+
+    def test_crossing_limit_keeps_posts_in_feed(self):
+        """Автор, пересёкший порог в любую сторону, не пропадает из лент:
+        его посты убираются из TimelineEntry или раскладываются заново"""
+        Follow.objects.create(user=self.reader, author=self.star)
+        post = Post.objects.create(text='Пост', author=self.star)
+        with mock.patch('posts.timeline.FANOUT_FOLLOWERS_LIMIT', 2):
+            Follow.objects.create(user=self.author, author=self.star)
+            self.assertFalse(TimelineEntry.objects.exists())
+            self.assertEqual(list(self.feed()), [post])
+            Follow.objects.filter(author=self.star, user=self.author).delete()
+            self.assertEqual(
+                list(TimelineEntry.objects.values_list('user', 'post')),
+                [(self.reader.id, post.id)])
+            self.assertEqual(list(self.feed()), [post])
+
+    def test_rebuild_timelines_command(self):
+        """Команда rebuild_timelines восстанавливает ленты с нуля"""
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.create(text='Пост', author=self.author)
+        TimelineEntry.objects.all().delete()
+        call_command('rebuild_timelines', stdout=mock.Mock())
+        self.assertEqual(
+            list(TimelineEntry.objects.values_list('user', 'post')),
+            [(self.reader.id, post.id)]
+        )
@@ -0,0 +1,145 @@
+import os
+import shutil
+import tempfile
+from datetime import datetime
+from io import StringIO
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from ..models import Comment, Follow, Group, Post, ThumbnailTask, User
+from ..transfer import bulk_create_dated
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class TransferTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='test_author')
+        cls.reader = User.objects.create(username='test_reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-group',
+            description='Описание',
+        )
+        cls.post = Post.objects.create(
+            text='Пост с картинкой',
+            author=cls.author,
+            group=cls.group,
+            image=SimpleUploadedFile(
+                name='small.gif', content=SMALL_GIF,
+                content_type='image/gif'),
+        )
+        cls.plain_post = Post.objects.create(
+            text='Пост без группы',
+            author=cls.reader,
+        )
+        Comment.objects.create(
+            post=cls.post,
+            author=cls.reader,
+            text='Комментарий, с запятой и "кавычками"',
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+
+    def transfer(self, data_format, *export_options):
+        call_command('export_yatube', self.directory, '--format',
+                     data_format, *export_options, stdout=StringIO())
+        output = StringIO()
+        call_command('import_yatube', self.directory, '--format',
+                     data_format, '--batch-size', '1', stdout=output)
+        return output.getvalue()
+
+    def test_round_trip(self):
+        """Загрузка выгрузки в ту же базу сопоставляет пользователей и
+        группы и создаёт копии постов с комментариями"""
+        for data_format in ('ndjson', 'csv'):
+            with self.subTest(format=data_format):
+                posts_before = Post.objects.count()
+                output = self.transfer(data_format)
+                self.assertIn('строк/с', output)
+                self.assertEqual(User.objects.count(), 2)
+                self.assertEqual(Group.objects.count(), 1)
+                self.assertEqual(Follow.objects.count(), 1)
+                self.assertEqual(Post.objects.count(), posts_before * 2)
+                copy = Post.objects.filter(
+                    text=self.post.text).latest('id')
+                self.assertNotEqual(copy.id, self.post.id)
+                self.assertEqual(copy.pub_date, self.post.pub_date)
+                self.assertEqual(copy.author, self.author)
+                self.assertEqual(copy.group, self.group)
+                self.assertEqual(copy.image.name, self.post.image.name)
+                comment = copy.comments.get()
+                self.assertEqual(
+                    comment.text, 'Комментарий, с запятой и "кавычками"')
+                self.assertEqual(
+                    comment.created,
+                    self.post.comments.get().created)
+                self.assertEqual(copy.comments_count, 1)
+                self.assertIsNone(Post.objects.filter(
+                    text=self.plain_post.text).latest('id').group)
+
+    def test_media_is_copied(self):
+        """С --with-media картинки переезжают вместе с постами и
+        ставятся в очередь миниатюр"""
+        self.transfer('ndjson', '--with-media')
+        self.assertTrue(os.path.isfile(os.path.join(
+            self.directory, 'media', self.post.image.name)))
+        copy = Post.objects.filter(text=self.post.text).latest('id')
+        self.assertNotEqual(copy.image.name, self.post.image.name)
+        self.assertEqual(copy.image.read(), SMALL_GIF)
+        self.assertTrue(ThumbnailTask.objects.filter(post=copy).exists())
+
+    def test_dates_kept_by_single_insert(self):
+        """Даты auto_now_add-поля пишутся тем же INSERT, без
+        повторного прохода по строкам"""
+        created = timezone.make_aware(datetime(2020, 1, 2, 3, 4, 5))
+        comments = [
+            Comment(post=self.plain_post, author=self.author,
+                    text=f'Старый комментарий {index}', created=created)
+            for index in range(3)
+        ]
+        with CaptureQueriesContext(connection) as queries:
+            bulk_create_dated(Comment, comments)
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(
+            list(self.plain_post.comments.values_list(
+                'created', flat=True)),
+            [created] * 3)
+        # Поле по-прежнему ставит текущее время обычным сохранениям.
+        self.assertGreater(Comment.objects.create(
+            post=self.plain_post, author=self.author, text='Новый').created,
+            created)
+
+    def test_unknown_author(self):
+        """Пост неизвестного автора останавливает загрузку с ошибкой"""
+        with open(os.path.join(self.directory, 'posts.ndjson'), 'w') as f:
+            f.write('{"id": 1, "text": "x", "pub_date": '
+                    '"2022-01-01T00:00:00Z", "author_id": 999, '
+                    '"group_id": null, "image": ""}\n')
+        with self.assertRaises(CommandError):
+            call_command('import_yatube', self.directory, stdout=StringIO())
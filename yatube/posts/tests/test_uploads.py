@@ -0,0 +1,119 @@
+import shutil
+import tempfile
+from contextlib import ExitStack
+from io import BytesIO
+from unittest import mock
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from ..models import Post, User
+from ..uploads import LimitedUploadHandler, is_content_addressed
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+NEW_POST_URL = reverse('posts:post_create')
+
+
+def photo(size=(64, 32)):
+    """JPEG с EXIF: повёрнут на 90° и подписан камерой."""
+    exif = Image.Exif()
+    exif[0x0112] = 6
+    exif[0x010F] = 'Камера'
+    output = BytesIO()
+    Image.new('RGB', size, 'red').save(output, 'JPEG', exif=exif)
+    return output.getvalue()
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class UploadPipelineTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='test_author')
+        cls.authorized_client = Client()
+        cls.authorized_client.force_login(cls.user)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def upload(self, content):
+        return UploadPipelineTests.authorized_client.post(
+            NEW_POST_URL,
+            data={
+                'text': 'Пост с фотографией',
+                'image': SimpleUploadedFile(
+                    name='photo.jpg',
+                    content=content,
+                    content_type='image/jpeg',
+                ),
+            },
+        )
+
+    def run_worker(self):
+        call_command('thumbnail_worker', once=True, workers=1,
+                     stdout=mock.Mock())
+
+    def test_oversized_upload_rejected(self):
+        """Слишком большой файл и слишком длинная сторона отклоняются
+        формой до сохранения"""
+        limits = (
+            ('Файл больше', {
+                'posts.forms.IMAGE_MAX_UPLOAD_SIZE': 100,
+                'posts.uploads.IMAGE_MAX_UPLOAD_SIZE': 100,
+            }),
+            ('Сторона картинки', {'posts.forms.IMAGE_MAX_DIMENSION': 32}),
+        )
+        for message, patches in limits:
+            with self.subTest(message=message), ExitStack() as stack:
+                for target, value in patches.items():
+                    stack.enter_context(mock.patch(target, value))
+                response = self.upload(photo())
+                self.assertEqual(response.status_code, 200)
+                self.assertIn(
+                    message, response.context['form'].errors['image'][0])
+        self.assertFalse(Post.objects.exists())
+
+    @mock.patch('posts.uploads.IMAGE_MAX_UPLOAD_SIZE', 100)
+    def test_oversized_upload_not_written_to_disk(self):
+        """Сверх предела загрузка на диск не пишется, но её настоящий
+        размер известен форме"""
+        handler = LimitedUploadHandler()
+        handler.new_file('image', 'photo.jpg', 'image/jpeg', None)
+        for start in range(0, 300, 60):
+            handler.receive_data_chunk(b'x' * 60, start)
+        upload = handler.file_complete(300)
+        self.assertEqual(upload.size, 300)
+        self.assertEqual(upload.read(), b'')
+        upload.close()
+
+    @mock.patch('posts.uploads.IMAGE_MAX_SIDE', 16)
+    def test_worker_downsamples_and_strips_exif(self):
+        """Воркер уменьшает картинку, применяет ориентацию, убирает EXIF
+        и удаляет исходную загрузку"""
+        self.upload(photo())
+        staged = Post.objects.get().image.name
+        self.assertTrue(staged.startswith('uploads/'))
+        self.run_worker()
+        post = Post.objects.get()
+        self.assertTrue(is_content_addressed(post.image.name))
+        self.assertFalse(default_storage.exists(staged))
+        with Image.open(post.image) as image:
+            self.assertEqual(image.size, (8, 16))
+            self.assertFalse(image.getexif())
+
+    def test_identical_uploads_share_one_file(self):
+        """Одинаковые загрузки разных постов указывают на один файл"""
+        content = photo((40, 20))
+        self.upload(content)
+        self.upload(content)
+        self.run_worker()
+        names = set(Post.objects.values_list('image', flat=True))
+        self.assertEqual(len(names), 1)
+        self.assertEqual(Post.objects.count(), 2)
@@ -7,7 +7,10 @@ from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 
+from .. import cache as page_cache
 from ..models import Comment, Follow, Group, Post, User
+from ..settings import COMMENTS_PER_PAGE
+from .commit_hooks import run_commit_hooks
 
 
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
@@ -142,6 +145,42 @@ class PostPagesTests(TestCase):
         self.assertEqual(len(comments), 1)
         self.assertEqual(comments[0], PostPagesTests.comment)
 
+    def test_post_page_comments_are_paginated(self):
+        """Страница поста показывает первую порцию комментариев,
+        остальные отдаёт кнопка "Показать ещё" в HTML или JSON"""
+        Comment.objects.bulk_create(
+            Comment(
+                post=PostPagesTests.post,
+                author=PostPagesTests.user,
+                text=f'Комментарий {index}',
+            )
+            for index in range(COMMENTS_PER_PAGE)
+        )
+        cache.clear()
+        comments = PostPagesTests.guest_client.get(
+            PostPagesTests.POST_URL).context['comments']
+        self.assertEqual(len(comments), COMMENTS_PER_PAGE)
+        self.assertEqual(comments[0], PostPagesTests.comment)
+        more_url = reverse(
+            'posts:post_comments', args=[PostPagesTests.post.id]
+        ) + f'?cursor={comments.next_cursor}'
+        response = PostPagesTests.guest_client.get(more_url)
+        self.assertEqual(len(response.context['comments']), 1)
+        self.assertContains(response, f'Комментарий {COMMENTS_PER_PAGE - 1}')
+        data = PostPagesTests.guest_client.get(
+            more_url + '&format=json').json()
+        self.assertEqual(data['next_cursor'], None)
+        self.assertEqual(
+            [comment['text'] for comment in data['comments']],
+            [f'Комментарий {COMMENTS_PER_PAGE - 1}'],
+        )
+
+    def test_more_comments_of_missing_post_not_found(self):
+        """Комментарии несуществующего поста отдают 404"""
+        response = PostPagesTests.guest_client.get(
+            reverse('posts:post_comments', args=[0]))
+        self.assertEqual(response.status_code, 404)
+
     def test_post_with_group_not_in_other_group_page(self):
         """Пост с неуказанной группой не попадает на страницу с группой"""
         response = PostPagesTests.author_client.get(GROUP_WITHOUT_POST_URL)
@@ -159,21 +198,50 @@ class PostPagesTests(TestCase):
             'page_post_list'])
 
     def test_index_page_test_save_page_context_correctly(self):
-        """Кеширование контекста главной страницы корректно сохраняет
-        контекст page"""
+        """Кеширование главной страницы отдаёт сохранённый фрагмент,
+        пока записи не менялись, и сбрасывается новым постом"""
         cache.clear()
         content = PostPagesTests.author_client.get(INDEX_URL).content
+        hits = page_cache.stats()['hits']
+        cached_content = PostPagesTests.author_client.get(INDEX_URL).content
+        self.assertEqual(content, cached_content)
+        self.assertEqual(page_cache.stats()['hits'], hits + 1)
         Post.objects.create(
             text='Тестовый пост 2',
             author=PostPagesTests.author_user,
             group=PostPagesTests.group_with_post,
         )
-        cached_content = PostPagesTests.author_client.get(INDEX_URL).content
-        self.assertEqual(content, cached_content)
-        cache.clear()
+        run_commit_hooks()
         updated_content = PostPagesTests.author_client.get(INDEX_URL).content
         self.assertNotEqual(content, updated_content)
 
+    def test_post_page_cache_is_invalidated_by_new_comment(self):
+        """Новый комментарий сразу виден на закешированной странице поста"""
+        cache.clear()
+        PostPagesTests.author_client.get(PostPagesTests.POST_URL)
+        Comment.objects.create(
+            post=PostPagesTests.post,
+            author=PostPagesTests.user,
+            text='Свежий комментарий',
+        )
+        run_commit_hooks()
+        response = PostPagesTests.author_client.get(PostPagesTests.POST_URL)
+        self.assertContains(response, 'Свежий комментарий')
+
+    def test_generation_changes_after_commit(self):
+        """Поколение меняется только после коммита и без срока жизни"""
+        generation = page_cache.generation()
+        Comment.objects.create(
+            post=PostPagesTests.post,
+            author=PostPagesTests.user,
+            text='Комментарий',
+        )
+        self.assertEqual(page_cache.generation(), generation)
+        run_commit_hooks()
+        self.assertGreater(page_cache.generation(), generation)
+        self.assertIsNone(
+            cache._expire_info.get(cache.make_key(page_cache.GENERATION_KEY)))
+
     def test_author_user_can_follow_to_other_user(self):
         """Авторизованный пользователь может подписываться
         на другого пользователя"""
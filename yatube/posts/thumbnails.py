@@ -0,0 +1,140 @@
+"""Генерация миниатюр картинок постов вне цикла запроса.
+
+Сохранение поста с новой картинкой (из формы, админки или ORM, сигнал
+queue_thumbnails) только ставит задачу в очередь ThumbnailTask, воркер
+(manage.py thumbnail_worker) забирает задачи, сначала пережимает свежую
+загрузку (posts.uploads), затем сохраняет готовые адреса
+вариантов в Thumbnail. Шаблоны читают только эти адреса.
+
+Каждая геометрия сохраняется во всех доступных форматах THUMBNAIL_FORMATS:
+браузер выбирает первый поддерживаемый из <picture>. Сами файлы и их
+размеры sorl-thumbnail запоминает в своём key-value хранилище, поэтому
+повторная обработка того же поста картинки заново не пережимает.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.db import close_old_connections, connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from PIL import Image
+from sorl.thumbnail import get_thumbnail
+from sorl.thumbnail.base import EXTENSIONS
+
+from . import cache, uploads
+from .models import Thumbnail, ThumbnailTask
+from .settings import (THUMBNAIL_FORMATS, THUMBNAIL_GEOMETRIES,
+                       THUMBNAIL_MAX_ATTEMPTS, THUMBNAIL_TASK_TIMEOUT)
+
+
+def available_formats():
+    """Форматы из THUMBNAIL_FORMATS, которые можно сохранить."""
+    Image.init()
+    return [
+        image_format for image_format in THUMBNAIL_FORMATS
+        if image_format in EXTENSIONS and image_format in Image.SAVE
+    ]
+
+
+def enqueue(post):
+    """Поставить пост в очередь; старые варианты больше не показываются."""
+    Thumbnail.objects.filter(post=post).delete()
+    if not post.image:
+        ThumbnailTask.objects.filter(post=post).delete()
+        return
+    ThumbnailTask.objects.update_or_create(
+        post=post,
+        defaults={
+            'status': ThumbnailTask.PENDING,
+            'attempts': 0,
+            'error': '',
+        },
+    )
+
+
+def generate(post):
+    variants = [
+        (image_format, get_thumbnail(
+            post.image, geometry, crop='center', upscale=True,
+            format=image_format,
+        ))
+        for image_format in available_formats()
+        for geometry in THUMBNAIL_GEOMETRIES
+    ]
+    with transaction.atomic():
+        Thumbnail.objects.filter(post=post).delete()
+        Thumbnail.objects.bulk_create(
+            Thumbnail(
+                post=post,
+                url=variant.url,
+                width=variant.width,
+                height=variant.height,
+                format=image_format,
+            )
+            for image_format, variant in variants
+        )
+
+
+def claim(limit):
+    """Забрать до limit задач; задача достаётся ровно одному воркеру."""
+    stale = timezone.now() - timedelta(seconds=THUMBNAIL_TASK_TIMEOUT)
+    available = Q(status=ThumbnailTask.PENDING) | Q(
+        status=ThumbnailTask.PROCESSING, updated__lt=stale
+    )
+    claimed = []
+    candidates = list(ThumbnailTask.objects.filter(
+        available
+    ).order_by('pk').values_list('pk', flat=True)[:limit])
+    for task_id in candidates:
+        taken = ThumbnailTask.objects.filter(
+            available, pk=task_id
+        ).update(
+            status=ThumbnailTask.PROCESSING,
+            attempts=F('attempts') + 1,
+            updated=timezone.now(),
+        )
+        if taken:
+            claimed.append(task_id)
+    return claimed
+
+
+def process(task_id):
+    task = ThumbnailTask.objects.select_related('post').get(pk=task_id)
+    try:
+        uploads.normalize(task.post)
+        generate(task.post)
+    except Exception as error:
+        task.error = str(error)
+        task.status = (
+            ThumbnailTask.FAILED
+            if task.attempts >= THUMBNAIL_MAX_ATTEMPTS
+            else ThumbnailTask.PENDING
+        )
+    else:
+        task.error = ''
+        task.status = ThumbnailTask.DONE
+    task.save(update_fields=['status', 'error', 'updated'])
+    return task.status == ThumbnailTask.DONE
+
+
+def _process_in_thread(task_id):
+    close_old_connections()
+    try:
+        return process(task_id)
+    finally:
+        connection.close()
+
+
+def run_pending(workers=1, limit=100):
+    """Обработать очередную порцию задач; возвращает число взятых."""
+    task_ids = claim(limit)
+    if not task_ids:
+        return 0
+    if workers > 1:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            done = sum(executor.map(_process_in_thread, task_ids))
+    else:
+        done = sum(map(process, task_ids))
+    if done:
+        cache.bump_generation()
+    return len(task_ids)
@@ -0,0 +1,206 @@
+"""Лента подписок с раскладкой постов при записи (fan-out-on-write).
+
+Посты обычных авторов при публикации копируются в TimelineEntry каждого
+подписчика, и лента читается одним индексным диапазоном. Посты авторов
+с числом подписчиков от FANOUT_FOLLOWERS_LIMIT не раскладываются, а
+подмешиваются в ленту при чтении (fan-out-on-read).
+
+Какой путь у автора, решает флаг AuthorStats.fanned_out, а не текущее
+число подписчиков: запись и чтение смотрят на одно и то же, а
+sync_fanout() переключает флаг вместе с раскладкой или удалением всех
+постов автора, когда число подписчиков пересекает порог.
+"""
+from itertools import islice
+
+from django.db import transaction
+
+from .models import AuthorStats, Follow, Post, TimelineEntry
+from .paginator import CursorPaginator
+from .settings import (FANOUT_BATCH_SIZE, FANOUT_FOLLOWERS_LIMIT,
+                       ITEMS_PER_PAGE)
+
+
+def is_popular(author):
+    return AuthorStats.objects.filter(user=author, fanned_out=False).exists()
+
+
+def popular_author_ids(user):
+    """Авторы из подписок пользователя, читаемые при запросе ленты."""
+    return list(
+        Follow.objects.filter(
+            user=user, author__stats__fanned_out=False,
+        ).values_list('author_id', flat=True)
+    )
+
+
+def _bulk_insert(entries):
+    entries = iter(entries)
+    while True:
+        batch = list(islice(entries, FANOUT_BATCH_SIZE))
+        if not batch:
+            return
+        TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def fan_out(post):
+    """Разложить новый пост по лентам подписчиков автора."""
+    if is_popular(post.author_id):
+        return
+    followers = Follow.objects.filter(
+        author_id=post.author_id
+    ).values_list('user_id', flat=True).iterator()
+    _bulk_insert(
+        TimelineEntry(
+            user_id=user_id,
+            post_id=post.id,
+            author_id=post.author_id,
+            pub_date=post.pub_date,
+        )
+        for user_id in followers
+    )
+
+
+def backfill(user, author):
+    """Добавить в ленту подписчика уже опубликованные посты автора."""
+    backfill_authors(user.id, [author.id])
+
+
+def backfill_authors(user_id, author_ids):
+    """То же для нескольких авторов сразу; повторный вызов ничего не
+    дублирует."""
+    popular = AuthorStats.objects.filter(
+        user_id__in=author_ids, fanned_out=False,
+    ).values_list('user_id', flat=True)
+    posts = Post.objects.filter(
+        author_id__in=set(author_ids) - set(popular)
+    ).values_list('id', 'author_id', 'pub_date').iterator()
+    _bulk_insert(
+        TimelineEntry(
+            user_id=user_id,
+            post_id=post_id,
+            author_id=author_id,
+            pub_date=pub_date,
+        )
+        for post_id, author_id, pub_date in posts
+    )
+
+
+def prune(user, author):
+    prune_authors(user, [author])
+
+
+def prune_authors(user, authors):
+    TimelineEntry.objects.filter(user=user, author__in=authors).delete()
+
+
+def _fan_out_author(author_id):
+    rows = Follow.objects.filter(author_id=author_id).values_list(
+        'user_id', 'author__posts__id', 'author__posts__pub_date',
+    ).iterator()
+    _bulk_insert(
+        TimelineEntry(
+            user_id=user_id,
+            post_id=post_id,
+            author_id=author_id,
+            pub_date=pub_date,
+        )
+        for user_id, post_id, pub_date in rows
+        if post_id is not None
+    )
+
+
+def sync_fanout(author_ids=None):
+    """Перевести авторов, пересёкших FANOUT_FOLLOWERS_LIMIT, на другой
+    путь: популярным удалить посты из лент подписчиков, остальным
+    разложить. None - проверить всех."""
+    stats = AuthorStats.objects.all()
+    if author_ids is not None:
+        stats = stats.filter(user_id__in=author_ids)
+    to_read = stats.filter(
+        fanned_out=True, followers_count__gte=FANOUT_FOLLOWERS_LIMIT
+    ).values_list('user_id', flat=True)
+    to_write = stats.filter(
+        fanned_out=False, followers_count__lt=FANOUT_FOLLOWERS_LIMIT
+    ).values_list('user_id', flat=True)
+    for author_id in list(to_read):
+        with transaction.atomic():
+            # Условие на флаг: параллельный вызов не переключит дважды.
+            if AuthorStats.objects.filter(
+                user_id=author_id, fanned_out=True
+            ).update(fanned_out=False):
+                TimelineEntry.objects.filter(author_id=author_id).delete()
+    for author_id in list(to_write):
+        with transaction.atomic():
+            if AuthorStats.objects.filter(
+                user_id=author_id, fanned_out=False
+            ).update(fanned_out=True):
+                _fan_out_author(author_id)
+
+
+def rebuild():
+    """Пересобрать все ленты с нуля; возвращает число записей."""
+    TimelineEntry.objects.all().delete()
+    AuthorStats.objects.update(fanned_out=True)
+    AuthorStats.objects.filter(
+        followers_count__gte=FANOUT_FOLLOWERS_LIMIT
+    ).update(fanned_out=False)
+    popular = AuthorStats.objects.filter(fanned_out=False).values('user')
+    rows = Follow.objects.exclude(
+        author__in=popular
+    ).values_list(
+        'user_id', 'author_id', 'author__posts__id',
+        'author__posts__pub_date',
+    ).iterator()
+    _bulk_insert(
+        TimelineEntry(
+            user_id=user_id,
+            post_id=post_id,
+            author_id=author_id,
+            pub_date=pub_date,
+        )
+        for user_id, author_id, post_id, pub_date in rows
+        if post_id is not None
+    )
+    return TimelineEntry.objects.count()
+
+
+class TimelinePaginator(CursorPaginator):
+    """Пагинатор ленты подписок, сливающий материализованную ленту с
+    постами популярных авторов по общему ключу (pub_date, id)."""
+
+    def __init__(self, user, per_page=ITEMS_PER_PAGE):
+        self.popular = popular_author_ids(user)
+        super().__init__(
+            Post.objects.filter(author_id__in=self.popular).for_feed(),
+            per_page,
+        )
+        self.entries = CursorPaginator(
+            TimelineEntry.objects.filter(
+                user=user
+            ).select_related(
+                'post__author', 'post__group'
+            ).prefetch_related('post__thumbnails'),
+            per_page,
+            ordering=('-pub_date', '-post_id'),
+        )
+
+    def rows(self, position=None, backwards=False, limit=None, offset=0):
+        merged = {
+            entry.post_id: entry.post
+            for entry in self.entries.rows(position, backwards, offset + limit)
+        }
+        if self.popular:
+            for post in super().rows(position, backwards, offset + limit):
+                merged.setdefault(post.id, post)
+        return sorted(
+            merged.values(),
+            key=lambda post: (post.pub_date, post.id),
+            reverse=self.descending != backwards,
+        )[offset:offset + limit]
+
+
+def paginate_timeline(request, per_page=ITEMS_PER_PAGE):
+    return TimelinePaginator(request.user, per_page).get_page(
+        cursor=request.GET.get('cursor'),
+        number=request.GET.get('page'),
+    )
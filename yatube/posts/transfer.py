@@ -0,0 +1,340 @@
+"""Выгрузка и загрузка данных Yatube (export_yatube / import_yatube).
+
+Каталог выгрузки содержит по файлу на таблицу (users, groups, posts,
+comments, follows) в формате NDJSON или CSV и, по желанию, папку media
+с картинками постов. Файлы читаются и пишутся построчно, поэтому память
+не зависит от объёма данных.
+
+При загрузке пользователи сопоставляются по username, группы - по slug.
+Посты получают id со сдвигом на текущий максимум, так что комментарии
+находят свой пост без таблицы соответствия. Строки пишутся bulk_create
+пачками, каждая пачка - в своей транзакции; сигналы при этом не
+срабатывают, поэтому счётчики, ленты и поисковый индекс пересобираются
+в конце штатными командами.
+"""
+import csv
+import json
+import os
+import shutil
+import time
+from datetime import datetime
+from itertools import islice
+
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.core.management.color import no_style
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, connections, router, transaction
+from django.db.models import Max
+
+from . import cache, uploads
+from .models import Comment, Follow, Group, Post, ThumbnailTask, User
+
+MEDIA_DIR = 'media'
+TABLES = [
+    ('users', User, ['id', 'username', 'first_name', 'last_name', 'email',
+                     'password', 'is_active', 'date_joined']),
+    ('groups', Group, ['id', 'title', 'slug', 'description']),
+    ('posts', Post, ['id', 'text', 'pub_date', 'author_id', 'group_id',
+                     'image']),
+    ('comments', Comment, ['post_id', 'author_id', 'text', 'created']),
+    ('follows', Follow, ['user_id', 'author_id']),
+]
+
+
+class Encoder(DjangoJSONEncoder):
+    # DjangoJSONEncoder обрезает время до миллисекунд, а от точного
+    # pub_date зависит порядок постов в лентах.
+    def default(self, value):
+        if isinstance(value, datetime):
+            return value.isoformat()
+        return super().default(value)
+
+
+encoder = Encoder(ensure_ascii=False)
+
+
+class NdjsonFormat:
+    extension = 'ndjson'
+
+    def write(self, stream, fields, rows):
+        for row in rows:
+            stream.write(encoder.encode(dict(zip(fields, row))))
+            stream.write('\n')
+
+    def read(self, stream):
+        for line in stream:
+            if line.strip():
+                yield json.loads(line)
+
+
+class CsvFormat:
+    extension = 'csv'
+
+    def write(self, stream, fields, rows):
+        writer = csv.writer(stream)
+        writer.writerow(fields)
+        writer.writerows(rows)
+
+    def read(self, stream):
+        yield from csv.DictReader(stream)
+
+
+FORMATS = {
+    'ndjson': NdjsonFormat,
+    'csv': CsvFormat,
+}
+
+
+def bulk_create_dated(model, objects):
+    """bulk_create, сохраняющий переданные даты auto_now_add-полей.
+
+    bulk_create вызывает pre_save() полей, и auto_now_add подставляет
+    now(). Вставка с raw=True, как у loaddata, берёт значения объектов
+    как есть, поэтому даты пишутся тем же INSERT. Переключать
+    auto_now_add у поля нельзя: оно общее для всех потоков процесса.
+    id задаются либо у всех объектов, либо ни у одного.
+    """
+    opts = model._meta
+    fields = opts.concrete_fields
+    if objects and objects[0].pk is None:
+        fields = [field for field in fields if field is not opts.auto_field]
+    db = router.db_for_write(model)
+    batch_size = connections[db].ops.bulk_batch_size(fields, objects)
+    with transaction.atomic(using=db, savepoint=False):
+        for batch in batches(objects, batch_size):
+            model.objects._insert(batch, fields=fields, using=db, raw=True)
+    for obj in objects:
+        obj._state.adding = False
+        obj._state.db = db
+
+
+def batches(rows, size):
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+
+class Progress:
+    def __init__(self, stdout, name):
+        self.stdout = stdout
+        self.name = name
+        self.rows = 0
+        self.start = time.perf_counter()
+
+    def add(self, count):
+        self.rows += count
+
+    def count(self, rows):
+        for row in rows:
+            self.rows += 1
+            yield row
+
+    def done(self):
+        elapsed = time.perf_counter() - self.start
+        rate = self.rows / elapsed if elapsed else 0
+        self.stdout.write(
+            f'{self.name}: {self.rows} строк за {elapsed:.1f} с '
+            f'({rate:.0f} строк/с)'
+        )
+
+
+def _path(directory, name, data_format):
+    return os.path.join(directory, f'{name}.{data_format.extension}')
+
+
+def export_data(directory, format_name, batch_size, with_media, stdout):
+    data_format = FORMATS[format_name]()
+    os.makedirs(directory, exist_ok=True)
+    for name, model, fields in TABLES:
+        progress = Progress(stdout, name)
+        rows = model.objects.order_by('pk').values_list(*fields).iterator(
+            chunk_size=batch_size
+        )
+        with open(_path(directory, name, data_format), 'w',
+                  encoding='utf-8', newline='') as stream:
+            data_format.write(stream, fields, progress.count(rows))
+        progress.done()
+    if with_media:
+        _export_media(directory, batch_size, stdout)
+
+
+def _export_media(directory, batch_size, stdout):
+    progress = Progress(stdout, MEDIA_DIR)
+    images = Post.objects.exclude(image='').order_by().values_list(
+        'image', flat=True
+    ).distinct().iterator(chunk_size=batch_size)
+    for image in images:
+        target = os.path.join(directory, MEDIA_DIR, image)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with default_storage.open(image) as source, \
+                open(target, 'wb') as output:
+            shutil.copyfileobj(source, output)
+        progress.add(1)
+    progress.done()
+
+
+class Importer:
+    def __init__(self, directory, format_name, batch_size, stdout):
+        self.directory = directory
+        self.format = FORMATS[format_name]()
+        self.batch_size = batch_size
+        self.stdout = stdout
+        self.users = {}
+        self.groups = {}
+        self.post_offset = Post.objects.aggregate(
+            last=Max('id')
+        )['last'] or 0
+
+    def rows(self, name, model, fields):
+        """Строки файла со значениями, приведёнными к типам полей."""
+        path = _path(self.directory, name, self.format)
+        if not os.path.exists(path):
+            return
+        model_fields = [model._meta.get_field(field) for field in fields]
+        with open(path, encoding='utf-8', newline='') as stream:
+            for record in self.format.read(stream):
+                row = {}
+                for field in model_fields:
+                    value = record[field.attname]
+                    if value in ('', None) and field.null:
+                        value = None
+                    else:
+                        value = field.to_python(value)
+                    row[field.attname] = value
+                yield row
+
+    def run(self):
+        for name, model, fields in TABLES:
+            progress = Progress(self.stdout, name)
+            load = getattr(self, f'load_{name}')
+            for batch in batches(self.rows(name, model, fields),
+                                 self.batch_size):
+                with transaction.atomic():
+                    load(batch)
+                progress.add(len(batch))
+            progress.done()
+        self.reset_sequences()
+
+    def _match(self, model, key, batch, mapping):
+        """Создать недостающие объекты и запомнить их новые id по key."""
+        keys = [row[key] for row in batch]
+        existing = set(model.objects.filter(
+            **{f'{key}__in': keys}
+        ).values_list(key, flat=True))
+        model.objects.bulk_create(
+            model(**{
+                field: value for field, value in row.items()
+                if field != 'id'
+            })
+            for row in batch if row[key] not in existing
+        )
+        new_ids = dict(model.objects.filter(
+            **{f'{key}__in': keys}
+        ).values_list(key, 'id'))
+        for row in batch:
+            mapping[row['id']] = new_ids[row[key]]
+
+    def user(self, old_id):
+        try:
+            return self.users[old_id]
+        except KeyError:
+            raise CommandError(f'Неизвестный пользователь с id {old_id}')
+
+    def group(self, old_id):
+        if old_id is None:
+            return None
+        try:
+            return self.groups[old_id]
+        except KeyError:
+            raise CommandError(f'Неизвестная группа с id {old_id}')
+
+    def load_users(self, batch):
+        self._match(User, 'username', batch, self.users)
+
+    def load_groups(self, batch):
+        self._match(Group, 'slug', batch, self.groups)
+
+    def load_posts(self, batch):
+        posts = [
+            Post(
+                id=row['id'] + self.post_offset,
+                text=row['text'],
+                pub_date=row['pub_date'],
+                author_id=self.user(row['author_id']),
+                group_id=self.group(row['group_id']),
+                image=self.import_image(row['image']),
+            )
+            for row in batch
+        ]
+        bulk_create_dated(Post, posts)
+        ThumbnailTask.objects.bulk_create(
+            ThumbnailTask(post=post) for post in posts if post.image
+        )
+
+    def import_image(self, name):
+        """Картинка из папки media выгрузки или путь как есть, если
+        хранилище общее и файла в выгрузке нет."""
+        if not name:
+            return ''
+        source = os.path.join(self.directory, MEDIA_DIR, name)
+        if not os.path.isfile(source):
+            return name
+        # Обработанные картинки названы по содержимому: если файл с таким
+        # именем уже есть, это та же картинка.
+        if uploads.is_content_addressed(name) and default_storage.exists(
+            name
+        ):
+            return name
+        with open(source, 'rb') as image:
+            return default_storage.save(name, File(image))
+
+    def load_comments(self, batch):
+        comments = [
+            Comment(
+                post_id=row['post_id'] + self.post_offset,
+                author_id=self.user(row['author_id']),
+                text=row['text'],
+                created=row['created'],
+            )
+            for row in batch
+        ]
+        bulk_create_dated(Comment, comments)
+
+    def load_follows(self, batch):
+        Follow.objects.bulk_create(
+            (
+                Follow(
+                    user_id=self.user(row['user_id']),
+                    author_id=self.user(row['author_id']),
+                )
+                for row in batch
+            ),
+            ignore_conflicts=True,
+        )
+
+    def reset_sequences(self):
+        """Посты вставлены с явными id: счётчики последовательностей
+        (PostgreSQL, Oracle) нужно подвинуть за них."""
+        statements = connection.ops.sequence_reset_sql(
+            no_style(), [model for _, model, _ in TABLES]
+        )
+        with connection.cursor() as cursor:
+            for statement in statements:
+                cursor.execute(statement)
+
+
+def import_data(directory, format_name, batch_size, rebuild, stdout):
+    if not os.path.isdir(directory):
+        raise CommandError(f'Нет каталога {directory}')
+    Importer(directory, format_name, batch_size, stdout).run()
+    if rebuild:
+        for command in ('reconcile_counters', 'rebuild_timelines',
+                        'rebuild_search_index'):
+            call_command(command, stdout=stdout)
+    cache.bump_generation()
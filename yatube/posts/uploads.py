@@ -0,0 +1,118 @@
+"""Обработка загруженных картинок постов.
+
+Загрузка пишется во временный файл (LimitedUploadHandler), но не
+больше IMAGE_MAX_UPLOAD_SIZE байт; форма проверяет размер файла и
+стороны по заголовку, и картинка как есть сохраняется в uploads/.
+Тяжёлую часть делает воркер миниатюр перед генерацией вариантов:
+уменьшает до IMAGE_MAX_SIDE, поворачивает по EXIF-ориентации,
+пережимает без метаданных и кладёт в posts/<xx>/<sha256>.<ext>. Имя -
+хеш исходного файла, поэтому одинаковые загрузки разных постов
+указывают на один файл и пережимаются один раз.
+"""
+import hashlib
+import re
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from PIL import Image, ImageOps
+
+from .models import Post
+from .settings import IMAGE_MAX_SIDE, IMAGE_MAX_UPLOAD_SIZE, IMAGE_QUALITY
+
+STAGING_DIR = Post._meta.get_field('image').upload_to
+CONTENT_DIR = 'posts/'
+CONTENT_NAME = re.compile(
+    r'^{}[0-9a-f]{{2}}/[0-9a-f]{{64}}\.(jpg|png)$'.format(CONTENT_DIR)
+)
+CHUNK_SIZE = 64 * 1024
+
+
+class LimitedUploadHandler(TemporaryFileUploadHandler):
+    """Временный файл загрузки, в который пишется не больше
+    IMAGE_MAX_UPLOAD_SIZE байт.
+
+    Остаток слишком большого файла дочитывается из запроса и
+    отбрасывается, на диск он не попадает. Форма получает пустой файл
+    с настоящим размером и отклоняет его в PostForm.clean_image.
+    """
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.oversized = False
+
+    def receive_data_chunk(self, raw_data, start):
+        if start + len(raw_data) <= IMAGE_MAX_UPLOAD_SIZE:
+            return super().receive_data_chunk(raw_data, start)
+        if not self.oversized:
+            self.oversized = True
+            self.file.seek(0)
+            self.file.truncate()
+        return None
+
+
+def is_staged(name):
+    return bool(name) and name.startswith(STAGING_DIR)
+
+
+def is_content_addressed(name):
+    return bool(CONTENT_NAME.match(name))
+
+
+def _digest(source):
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: source.read(CHUNK_SIZE), b''):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _has_alpha(image):
+    return image.mode in ('RGBA', 'LA') or (
+        image.mode == 'P' and 'transparency' in image.info
+    )
+
+
+def _encode(image, alpha):
+    # Для JPEG draft() декодирует сразу в уменьшенном масштабе.
+    image.draft('RGB', (IMAGE_MAX_SIDE, IMAGE_MAX_SIDE))
+    icc_profile = image.info.get('icc_profile')
+    image = ImageOps.exif_transpose(image)
+    image = image.convert('RGBA' if alpha else 'RGB')
+    image.thumbnail(
+        (IMAGE_MAX_SIDE, IMAGE_MAX_SIDE), Image.Resampling.LANCZOS
+    )
+    output = BytesIO()
+    # EXIF не передаётся в save() и в результат не попадает.
+    if alpha:
+        image.save(output, 'PNG', optimize=True)
+    else:
+        options = {'icc_profile': icc_profile} if icc_profile else {}
+        image.save(output, 'JPEG', quality=IMAGE_QUALITY, optimize=True,
+                   progressive=True, **options)
+    return output.getvalue()
+
+
+def normalize(post):
+    """Переложить загруженную картинку поста в постоянное хранилище.
+
+    Возвращает True, если картинка была обработана. Пост, у которого
+    картинку за это время сменили, не трогается.
+    """
+    staged = post.image.name
+    if not is_staged(staged):
+        return False
+    storage = post.image.storage
+    with storage.open(staged) as source:
+        digest = _digest(source)
+        source.seek(0)
+        image = Image.open(source)
+        alpha = _has_alpha(image)
+        name = '{}{}/{}.{}'.format(
+            CONTENT_DIR, digest[:2], digest, 'png' if alpha else 'jpg'
+        )
+        if not storage.exists(name):
+            name = storage.save(name, ContentFile(_encode(image, alpha)))
+    if Post.objects.filter(pk=post.pk, image=staged).update(image=name):
+        post.image.name = name
+    storage.delete(staged)
+    return True
@@ -1,8 +1,6 @@
-from django.conf import settings
-from django.conf.urls.static import static
 from django.urls import path
 
-from . import views
+from . import api, views
 
 
 app_name = 'posts'
@@ -16,6 +14,14 @@ urlpatterns = [
         'group/<slug:slug>/',
         views.group_posts,
         name='group_list'),
+    path(
+        'popular/',
+        views.popular,
+        name='popular'),
+    path(
+        'group/<slug:slug>/popular/',
+        views.popular,
+        name='group_popular'),
     path(
         'profile/<str:username>/',
         views.profile,
@@ -24,6 +30,14 @@ urlpatterns = [
         'posts/<int:post_id>/',
         views.post_detail,
         name='post_detail'),
+    path(
+        'posts/<int:post_id>/comments/',
+        views.post_comments,
+        name='post_comments'),
+    path(
+        'search/',
+        views.search,
+        name='search'),
     path(
         'create/',
         views.post_create,
@@ -40,6 +54,10 @@ urlpatterns = [
         'follow/',
         views.follow_index,
         name='follow_index'),
+    path(
+        'follow/bulk/',
+        views.follow_bulk,
+        name='follow_bulk'),
     path(
         'profile/<str:username>/follow/',
         views.profile_follow,
@@ -48,10 +66,28 @@ urlpatterns = [
         'profile/<str:username>/unfollow/',
         views.profile_unfollow,
         name='profile_unfollow'),
+    path(
+        'api/posts/',
+        api.index,
+        name='api_index'),
+    path(
+        'api/group/<slug:slug>/',
+        api.group_posts,
+        name='api_group_list'),
+    path(
+        'api/profile/<str:username>/',
+        api.profile,
+        name='api_profile'),
+    path(
+        'api/follow/',
+        api.follow_index,
+        name='api_follow_index'),
+    path(
+        'api/posts/<int:post_id>/',
+        api.post_detail,
+        name='api_post_detail'),
+    path(
+        'api/posts/<int:post_id>/comments/',
+        api.post_comments,
+        name='api_post_comments'),
 ]
-
-
-if settings.DEBUG:
-    urlpatterns += static(
-        settings.MEDIA_URL, document_root=settings.MEDIA_ROOT
-    )
@@ -1,29 +1,39 @@
+import json
+
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
+from django.http import Http404, JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
+from django.views.decorators.http import require_POST
 
+from . import conditional, follows
 from .forms import CommentForm, PostForm
-from .models import Follow, Group, Post, User
-from .settings import ITEMS_PER_PAGE
+from .models import Comment, Follow, Group, Post, User
+from .paginator import CursorPaginator, paginate
+from .popular import PopularPaginator
+from .search import search_posts
+from .settings import COMMENTS_PER_PAGE, FOLLOW_BULK_LIMIT, ITEMS_PER_PAGE
+from .timeline import paginate_timeline
 
 
+@conditional.conditional_page(conditional.index)
 def index(request):
-    posts = Post.objects.order_by('-pub_date')
-    paginator = Paginator(posts, ITEMS_PER_PAGE)
-    page_number = request.GET.get('page')
-    page_post_list = paginator.get_page(page_number)
+    page_post_list = paginate(
+        request,
+        Post.objects.for_feed()
+    )
     context = {
         'page_post_list': page_post_list,
     }
     return render(request, 'posts/index.html', context)
 
 
+@conditional.conditional_page(conditional.group_posts)
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    posts = Post.objects.filter(group=group).order_by('-pub_date')
-    paginator = Paginator(posts, ITEMS_PER_PAGE)
-    page_number = request.GET.get('page')
-    page_post_list = paginator.get_page(page_number)
+    page_post_list = paginate(
+        request,
+        group.posts.for_feed()
+    )
     context = {
         'group': group,
         'page_post_list': page_post_list,
@@ -31,12 +41,29 @@ def group_posts(request, slug):
     return render(request, 'posts/group_list.html', context)
 
 
+def popular(request, slug=None):
+    group = get_object_or_404(Group, slug=slug) if slug else None
+    page_post_list = PopularPaginator(group).get_page(
+        cursor=request.GET.get('cursor'),
+        number=request.GET.get('page'),
+    )
+    context = {
+        'group': group,
+        'page_post_list': page_post_list,
+    }
+    return render(request, 'posts/popular.html', context)
+
+
+@conditional.conditional_page(conditional.profile)
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    posts = Post.objects.filter(author=author).order_by('-pub_date')
-    paginator = Paginator(posts, ITEMS_PER_PAGE)
-    page_number = request.GET.get('page')
-    page_post_list = paginator.get_page(page_number)
+    author = get_object_or_404(
+        User.objects.select_related('stats'),
+        username=username
+    )
+    page_post_list = paginate(
+        request,
+        author.posts.for_feed()
+    )
     if request.user.is_authenticated:
         following = Follow.objects.filter(user=request.user, author=author)
     else:
@@ -49,18 +76,80 @@ def profile(request, username):
     return render(request, 'posts/profile.html', context)
 
 
+@conditional.conditional_page(conditional.post_detail)
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
-    post_comments = post.comments.all()
+    post = get_object_or_404(
+        Post.objects.select_related(
+            'author__stats', 'group'
+        ).prefetch_related('thumbnails'),
+        id=post_id
+    )
     comment_form = CommentForm()
     context = {
         'post': post,
-        'comments': post_comments,
+        'comments': comment_paginator(post.id).page(),
         'form': comment_form,
     }
     return render(request, 'posts/post_detail.html', context)
 
 
+def comment_paginator(post_id):
+    return CursorPaginator(
+        Comment.objects.filter(post_id=post_id).select_related('author'),
+        COMMENTS_PER_PAGE,
+        ordering=('created', 'id'),
+    )
+
+
+def post_comments(request, post_id):
+    """Следующая порция комментариев для кнопки "Показать ещё"."""
+    comments = comment_paginator(post_id).get_page(
+        cursor=request.GET.get('cursor')
+    )
+    if not comments and not Post.objects.filter(id=post_id).exists():
+        raise Http404
+    if request.GET.get('format') == 'json':
+        return JsonResponse({
+            'comments': [
+                {
+                    'id': comment.id,
+                    'author': comment.author.username,
+                    'text': comment.text,
+                    'created': comment.created.isoformat(),
+                }
+                for comment in comments
+            ],
+            'next_cursor': comments.next_cursor,
+        })
+    context = {
+        'post_id': post_id,
+        'comments': comments,
+    }
+    return render(request, 'posts/includes/comment_list.html', context)
+
+
+def search(request):
+    query = request.GET.get('q', '').strip()
+    try:
+        page_number = max(int(request.GET.get('page', 1)), 1)
+    except ValueError:
+        page_number = 1
+    posts = []
+    if query:
+        posts = search_posts(
+            query,
+            ITEMS_PER_PAGE + 1,
+            (page_number - 1) * ITEMS_PER_PAGE
+        )
+    context = {
+        'query': query,
+        'posts': posts[:ITEMS_PER_PAGE],
+        'page_number': page_number,
+        'has_next': len(posts) > ITEMS_PER_PAGE,
+    }
+    return render(request, 'posts/search.html', context)
+
+
 @login_required
 def post_create(request):
     form = PostForm(request.POST or None, files=request.FILES or None)
@@ -106,10 +195,7 @@ def add_comment(request, post_id):
 
 @login_required
 def follow_index(request):
-    posts = Post.objects.filter(author__following__user=request.user)
-    paginator = Paginator(posts, ITEMS_PER_PAGE)
-    page_number = request.GET.get('page')
-    page_post_list = paginator.get_page(page_number)
+    page_post_list = paginate_timeline(request)
     context = {
         'page_post_list': page_post_list,
     }
@@ -118,17 +204,55 @@ def follow_index(request):
 
 @login_required
 def profile_follow(request, username):
-    author = get_object_or_404(User, username=username)
-    if author != request.user:
-        Follow.objects.get_or_create(user=request.user, author=author)
+    if (not follows.follow(request.user, [username])
+            and username != request.user.username):
+        raise Http404
     return redirect('posts:profile', username)
 
 
 @login_required
 def profile_unfollow(request, username):
-    get_object_or_404(
-        Follow,
-        user=request.user,
-        author=get_object_or_404(User, username=username)
-    ).delete()
+    follows.unfollow(request.user, [username])
     return redirect('posts:profile', username)
+
+
+@login_required
+@require_POST
+def follow_bulk(request):
+    """Подписка и отписка на сотни авторов за один запрос.
+
+    Принимает JSON {"follow": [...], "unfollow": [...]} или те же поля
+    формой, отвечает текущим состоянием подписок на всех перечисленных.
+    """
+    if request.content_type == 'application/json':
+        try:
+            data = json.loads(request.body)
+            to_follow = data.get('follow', [])
+            to_unfollow = data.get('unfollow', [])
+        except (AttributeError, ValueError):
+            return JsonResponse({'error': 'Некорректный JSON'}, status=400)
+        # Строка вместо списка превратилась бы в набор отдельных букв.
+        if not all(
+            isinstance(names, list)
+            and all(isinstance(name, str) for name in names)
+            for names in (to_follow, to_unfollow)
+        ):
+            return JsonResponse(
+                {'error': 'follow и unfollow - списки имён'}, status=400)
+    else:
+        to_follow = request.POST.getlist('follow')
+        to_unfollow = request.POST.getlist('unfollow')
+    usernames = set(to_follow) | set(to_unfollow)
+    if len(usernames) > FOLLOW_BULK_LIMIT:
+        return JsonResponse(
+            {'error': f'Не больше {FOLLOW_BULK_LIMIT} авторов за раз'},
+            status=400,
+        )
+    found = {
+        **follows.follow(request.user, to_follow),
+        **follows.unfollow(request.user, to_unfollow),
+    }
+    return JsonResponse({
+        'following': sorted(follows.following(request.user, usernames)),
+        'not_found': sorted(usernames - set(found)),
+    })
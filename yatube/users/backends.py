@@ -0,0 +1,35 @@
+"""Пользователь из кеша вместо SELECT на каждый запрос.
+
+AuthenticationMiddleware вызывает get_user() бэкенда при каждом запросе
+с сессией. CachedModelBackend хранит пользователя в кеше сессий, а
+сигналы из users.signals удаляют запись при сохранении и удалении
+пользователя. Смена пароля тоже сохраняет пользователя, поэтому хеш
+сессии сверяется со свежим паролем, и старые сессии завершаются как
+обычно.
+"""
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import caches
+
+USER_CACHE_KEY = 'users:user:{}'
+
+
+def user_cache():
+    return caches[settings.SESSION_CACHE_ALIAS]
+
+
+def forget_user(user_id):
+    user_cache().delete(USER_CACHE_KEY.format(user_id))
+
+
+class CachedModelBackend(ModelBackend):
+
+    def get_user(self, user_id):
+        key = USER_CACHE_KEY.format(user_id)
+        user = user_cache().get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is None:
+                return None
+            user_cache().set(key, user, settings.USER_CACHE_TIMEOUT)
+        return user if self.user_can_authenticate(user) else None
@@ -1,6 +1,11 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
+User = get_user_model()
+
 
 UIDB64 = 'testuidb'
 TOKEN = '123456'
@@ -49,3 +54,36 @@ class Tests(TestCase):
         ]
         for exec_url, expected_url in test_exec_url_expected_url:
             self.assertEqual(exec_url, expected_url)
+
+
+class CachedAuthTests(TestCase):
+    """Сессия и пользователь читаются из кеша"""
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='test_user', password='old-password')
+        self.client.force_login(self.user)
+
+    def tables(self):
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(reverse('posts:index'))
+        self.assertEqual(response.status_code, 200)
+        return ' '.join(query['sql'] for query in captured)
+
+    def test_no_session_and_user_queries(self):
+        """Повторный запрос не читает сессию и пользователя из базы"""
+        self.tables()
+        sql = self.tables()
+        self.assertNotIn('django_session', sql)
+        self.assertNotIn('FROM "auth_user"', sql)
+
+    def test_user_changes_invalidate_cache(self):
+        """Новое имя видно сразу, смена пароля завершает сессию"""
+        self.tables()
+        self.user.username = 'renamed_user'
+        self.user.save()
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'renamed_user')
+        self.user.set_password('new-password')
+        self.user.save()
+        response = self.client.get(reverse('posts:index'))
+        self.assertFalse(response.wsgi_request.user.is_authenticated)
@@ -50,6 +50,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.PerformanceMiddleware',
+    'core.middleware.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -64,7 +66,7 @@ ROOT_URLCONF = 'yatube.urls'
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'core.template_backend.DjangoTemplates',
         'DIRS': [
             TEMPLATES_DIR
         ],
@@ -87,10 +89,20 @@ WSGI_APPLICATION = 'yatube.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/2.2/ref/settings/#databases
 
+# core.sqlite - стандартный бэкенд SQLite плюс WAL и другие PRAGMA при
+# подключении, BEGIN IMMEDIATE и повтор запросов при SQLITE_BUSY.
+# Соединение живёт между запросами CONN_MAX_AGE секунд.
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'core.sqlite',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'CONN_MAX_AGE': 60 * 10,
+        'OPTIONS': {
+            'timeout': 5,
+            'transaction_mode': 'IMMEDIATE',
+            'busy_retries': 5,
+            'busy_backoff': 0.05,
+        },
     }
 }
 
@@ -135,9 +147,42 @@ STATIC_URL = '/static/'
 
 STATICFILES_DIRS = (os.path.join(BASE_DIR, 'static'),)
 
+STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
+
+# collectstatic добавляет в имена хеш содержимого и кладёт рядом .gz/.br.
+STATICFILES_STORAGE = 'core.storage.CompressedManifestStaticFilesStorage'
+
+# Раздавать собранную статику самим Django (core.views.static_serve),
+# если перед ним нет CDN или веб-сервера.
+STATIC_SERVE = True
+
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Медиафайлы раскладываются по подпапкам MEDIA_ROOT/ab/cd/ по хешу имени;
+# существующие файлы переносит manage.py shard_media.
+DEFAULT_FILE_STORAGE = 'core.storage.ShardedFileSystemStorage'
+
+# Раздавать медиа через core.views.media_serve (Range, ETag). Если перед
+# Django стоит nginx или Apache, файл отдаёт он: MEDIA_SENDFILE_HEADER -
+# 'X-Accel-Redirect' (nginx, внутренний location MEDIA_SENDFILE_ROOT,
+# указывающий на MEDIA_ROOT) или 'X-Sendfile' (Apache, полный путь).
+MEDIA_SERVE = True
+MEDIA_SENDFILE_HEADER = None
+MEDIA_SENDFILE_ROOT = '/protected-media/'
+# Имена загруженных файлов уникальны, а содержимое не меняется.
+MEDIA_MAX_AGE = 60 * 60 * 24 * 30
+# Папки медиа, которые не отдаются по /media/: в uploads/ лежат исходники
+# загрузок с EXIF и координатами, пока воркер их не пережмёт
+# (posts.uploads.STAGING_DIR).
+MEDIA_PRIVATE_DIRS = ['uploads/']
+
+# Загрузки пишутся во временный файл по мере поступления, а не копятся
+# в памяти процесса; файл больше IMAGE_MAX_UPLOAD_SIZE на диск не пишется.
+FILE_UPLOAD_HANDLERS = [
+    'posts.uploads.LimitedUploadHandler',
+]
+
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
 LOGOUT_REDIRECT_URL = 'posts:index'
@@ -148,8 +193,54 @@ EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 
+# Тесты работают с кешами в памяти, а не с рабочими папками cache/.
+TEST_RUNNER = 'core.test_runner.LocalCacheRunner'
+
+# Файловый кеш общий для всех воркеров на одной машине и не требует
+# внешних сервисов.
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-    }
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache'),
+    },
+    # Сессии и пользователи в отдельной папке: сброс кеша страниц не
+    # должен возвращать каждый запрос к чтению сессии из базы.
+    'sessions': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache', 'sessions'),
+    },
 }
+
+# Сессия и пользователь читаются из кеша (users.backends), а не из базы
+# на каждом запросе; база остаётся надёжной копией сессий.
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+SESSION_CACHE_ALIAS = 'sessions'
+AUTHENTICATION_BACKENDS = ['users.backends.CachedModelBackend']
+# Сколько секунд хранить пользователя в кеше; изменения сбрасывают
+# запись сразу, срок лишь ограничивает объём папки.
+USER_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Замеры запросов (core.middleware.PerformanceMiddleware): доля запросов
+# с подробными замерами SQL, шаблонов и кеша, порог медленного запроса
+# и приёмники метрик. /metrics доступна только с адресов INTERNAL_IPS.
+PERFORMANCE_SAMPLE_RATE = 1.0
+PERFORMANCE_SLOW_REQUEST_MS = 500
+PERFORMANCE_SINKS = [
+    'core.metrics.LogSink',
+    'core.metrics.ServerTimingSink',
+    'core.metrics.PrometheusSink',
+]
+INTERNAL_IPS = ['127.0.0.1']
+
+# Сжатие ответов (core.middleware.CompressionMiddleware). Короткие тела
+# не сжимаются: заголовок и служебные байты gzip съедают выигрыш. Уровни
+# умеренные - ответы сжимаются на лету при каждом запросе.
+COMPRESSION_MIN_LENGTH = 200
+COMPRESSION_GZIP_LEVEL = 6
+COMPRESSION_BROTLI_QUALITY = 5
+# Убирать из HTML комментарии и лишние пробелы.
+HTML_MINIFY = True
+
+# Потоков, в которых ASGI-вход (yatube/asgi.py) выполняет запросы:
+# сколько запросов один процесс обрабатывает одновременно.
+ASGI_THREADS = 8
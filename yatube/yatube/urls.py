@@ -13,8 +13,11 @@ Including another URLconf
     1. Import the includes() function: from django.urls import includes, path
     2. Add a URL to urlpatterns:  path('blog/', includes('blog.urls'))
 """
+from django.conf import settings
 from django.contrib import admin
-from django.urls import include, path
+from django.urls import include, path, re_path
+
+from core.views import media_serve, metrics, static_serve
 
 
 handler404 = 'core.views.page_not_found'
@@ -27,4 +30,19 @@ urlpatterns = [
     path('auth/', include('django.contrib.auth.urls')),
     path('admin/', admin.site.urls),
     path('about/', include('about.urls', namespace='about')),
+    path('metrics', metrics, name='metrics'),
 ]
+
+if settings.STATIC_SERVE:
+    urlpatterns.append(re_path(
+        r'^{}(?P<path>.+)$'.format(settings.STATIC_URL.lstrip('/')),
+        static_serve,
+        name='static',
+    ))
+
+if settings.MEDIA_SERVE:
+    urlpatterns.append(re_path(
+        r'^{}(?P<path>.+)$'.format(settings.MEDIA_URL.lstrip('/')),
+        media_serve,
+        name='media',
+    ))